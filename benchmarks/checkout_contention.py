@@ -0,0 +1,169 @@
+"""Checkout contention benchmark.
+
+Hammers a single SKU with concurrent checkouts through the same order
+batch the payment Checkout function uses, then reports throughput,
+latency percentiles and whether any stock was oversold.
+
+Usage:
+    SqlConnectionString="Driver={ODBC Driver 18 for SQL Server};..." \\
+        python benchmarks/checkout_contention.py --threads 32 --buyers 500 --stock 100
+
+Creates its own product, users and carts and removes them afterwards.
+Run against a test database, not production.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "payment"))
+)
+from shared.db_utils import get_db_connection
+from shared.order_utils import create_order_from_cart
+
+
+def setup(buyers, stock, quantity):
+    """Create one product and `buyers` users, each with the product in cart"""
+    tag = uuid.uuid4().hex[:8]
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+        INSERT INTO products (name, description, price, stock_quantity, category)
+        OUTPUT INSERTED.id
+        VALUES (?, 'checkout contention benchmark', 9.99, ?, 'Benchmark')
+        """,
+        (f"bench-sku-{tag}", stock),
+    )
+    product_id = cursor.fetchone()[0]
+
+    user_ids = []
+    for i in range(buyers):
+        cursor.execute(
+            """
+            INSERT INTO shopusers (email, password, name)
+            OUTPUT INSERTED.id
+            VALUES (?, 'x', 'Benchmark Buyer')
+            """,
+            (f"bench-{tag}-{i}@example.invalid",),
+        )
+        user_ids.append(cursor.fetchone()[0])
+
+    cursor.executemany(
+        "INSERT INTO cart_items (user_id, product_id, quantity) VALUES (?, ?, ?)",
+        [(user_id, product_id, quantity) for user_id in user_ids],
+    )
+    conn.commit()
+    conn.close()
+    return product_id, user_ids, tag
+
+
+def teardown(product_id, tag):
+    """Remove everything setup() created, including orders placed by it"""
+    email_pattern = f"bench-{tag}-%@example.invalid"
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        DELETE o FROM orders o
+        JOIN shopusers u ON o.user_id = u.id
+        WHERE u.email LIKE ?
+        """,
+        (email_pattern,),
+    )
+    cursor.execute("DELETE FROM shopusers WHERE email LIKE ?", (email_pattern,))
+    cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
+    conn.commit()
+    conn.close()
+
+
+def run(user_ids, threads):
+    """Check out every user's cart concurrently. Returns per-call results."""
+    local = threading.local()
+    results = []
+    results_lock = threading.Lock()
+
+    def checkout(user_id):
+        if not hasattr(local, "conn"):
+            local.conn = get_db_connection()
+
+        start = time.perf_counter()
+        try:
+            order, shortfall = create_order_from_cart(
+                local.conn, user_id, "1 Benchmark Way"
+            )
+            outcome = "ordered" if order else "rejected" if shortfall else "empty"
+        except Exception as e:
+            outcome = f"error: {type(e).__name__}"
+        elapsed = time.perf_counter() - start
+
+        with results_lock:
+            results.append((outcome, elapsed))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(checkout, user_ids))
+    return results, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args()
+
+    product_id, user_ids, tag = setup(args.buyers, args.stock, args.quantity)
+    try:
+        results, wall_time = run(user_ids, args.threads)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT stock_quantity FROM products WHERE id = ?", (product_id,)
+        )
+        final_stock = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE product_id = ?",
+            (product_id,),
+        )
+        units_sold = cursor.fetchone()[0]
+        conn.close()
+    finally:
+        teardown(product_id, tag)
+
+    latencies = [elapsed * 1000 for _, elapsed in results]
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    oversold = max(0, units_sold - args.stock)
+    print(f"threads={args.threads} buyers={args.buyers} stock={args.stock}")
+    print(f"throughput: {len(results) / wall_time:.1f} checkouts/s ({wall_time:.2f}s)")
+    print(
+        f"latency ms: p50={statistics.median(latencies):.1f} "
+        f"p95={percentile(latencies, 95):.1f} "
+        f"p99={percentile(latencies, 99):.1f} max={max(latencies):.1f}"
+    )
+    print(f"outcomes: {outcomes}")
+    print(f"units sold: {units_sold}, final stock: {final_stock}")
+    print(f"oversold: {oversold}")
+
+    return 1 if oversold or final_stock < 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
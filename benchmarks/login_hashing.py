@@ -0,0 +1,164 @@
+"""Login password hashing benchmark.
+
+Simulates a Function App instance: a fixed pool of request threads
+(like PYTHON_THREADPOOL_THREAD_COUNT) serves a burst of logins, each
+hashing through the bounded hash pool, mixed with cheap "other" requests.
+For each hash pool size it reports login goodput (logins that succeeded,
+over the time until every request finished), how many attempts were
+refused with 503 and how many clients gave up, and latencies measured
+from submission: a login's runs from its first attempt to the one that
+succeeded, so time spent waiting for a request thread or retrying after
+a 503 (the client honours Retry-After) is included.
+
+Usage:
+    python benchmarks/login_hashing.py --request-threads 32 --logins 400 \\
+        --pool-sizes 0,1,2,4,8 --queue-depth 8 --iterations 100000
+
+A pool size of 0 hashes on the request thread, as before the pool was
+added. Needs no database.
+"""
+
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "user-auth"))
+)
+from shared.hash_pool import HashPool, HashPoolBusy
+
+
+def pbkdf2(password, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password, b"0123456789abcdef", iterations)
+
+
+def run(pool, request_threads, logins, others, iterations, retry_after, max_attempts):
+    """Serve logins and other requests concurrently. Returns the results.
+
+    Every request is submitted to the request threads up front, so
+    latencies are measured from submission and include the time spent
+    waiting for a request thread. A login refused with 503 is retried
+    by its client after retry_after seconds, up to max_attempts times; its
+    latency runs from the first attempt to the one that succeeds.
+    """
+    results = {"ok": [], "busy": 0, "gave_up": 0, "other": []}
+    lock = threading.Lock()
+    all_done = threading.Event()
+    remaining = [logins + others]
+    executor = ThreadPoolExecutor(max_workers=request_threads)
+
+    def finish():
+        with lock:
+            remaining[0] -= 1
+            if not remaining[0]:
+                all_done.set()
+
+    def login(submitted, attempt):
+        try:
+            if pool:
+                pool.run(pbkdf2, b"correct horse", iterations)
+            else:
+                pbkdf2(b"correct horse", iterations)
+        except HashPoolBusy:
+            with lock:
+                results["busy"] += 1
+            if attempt < max_attempts:
+                retry = threading.Timer(
+                    retry_after, executor.submit, (login, submitted, attempt + 1)
+                )
+                retry.daemon = True
+                retry.start()
+                return
+            with lock:
+                results["gave_up"] += 1
+            finish()
+            return
+        with lock:
+            results["ok"].append(time.perf_counter() - submitted)
+        finish()
+
+    def other(submitted, _):
+        sum(range(1000))
+        with lock:
+            results["other"].append(time.perf_counter() - submitted)
+        finish()
+
+    # Interleave the other requests through the login burst
+    requests = [login] * logins
+    for i in range(others):
+        requests.insert(i + i * logins // max(1, others), other)
+
+    started = time.perf_counter()
+    for handler in requests:
+        executor.submit(handler, time.perf_counter(), 1)
+    if requests:
+        all_done.wait()
+    wall_time = time.perf_counter() - started
+    executor.shutdown()
+    return results, wall_time
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--request-threads", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--others", type=int, default=100)
+    parser.add_argument("--pool-sizes", default=f"0,1,2,{os.cpu_count() or 2}")
+    parser.add_argument("--queue-depth", type=int, default=None)
+    parser.add_argument("--iterations", type=int, default=100000)
+    # Login and Signup answer 503 with Retry-After: 1
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--max-attempts", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"request_threads={args.request_threads} logins={args.logins} "
+        f"others={args.others} iterations={args.iterations} cpus={os.cpu_count()} "
+        f"retry_after={args.retry_after}s max_attempts={args.max_attempts}"
+    )
+    print(
+        f"{'pool':>5} {'depth':>5} {'logins/s':>9} {'ok':>5} {'503':>5} "
+        f"{'gave up':>7} {'login p50':>10} {'login p99':>10} "
+        f"{'other p50':>10} {'other p99':>10}"
+    )
+
+    for size in [int(value) for value in args.pool_sizes.split(",")]:
+        depth = args.queue_depth if args.queue_depth is not None else size * 2
+        pool = HashPool(size, depth) if size else None
+        results, wall_time = run(
+            pool,
+            args.request_threads,
+            args.logins,
+            args.others,
+            args.iterations,
+            args.retry_after,
+            args.max_attempts,
+        )
+
+        ok = [elapsed * 1000 for elapsed in results["ok"]]
+        other = [elapsed * 1000 for elapsed in results["other"]]
+        print(
+            f"{size or '-':>5} {depth if size else '-':>5} "
+            f"{len(ok) / wall_time:>9.1f} {len(ok):>5} {results['busy']:>5} "
+            f"{results['gave_up']:>7} "
+            f"{statistics.median(ok) if ok else 0:>10.1f} "
+            f"{percentile(ok, 99) if ok else 0:>10.1f} "
+            f"{statistics.median(other) if other else 0:>10.2f} "
+            f"{percentile(other, 99) if other else 0:>10.2f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Payment gateway simulator benchmark.
+
+Drives the simulated payment gateway from a pool of worker threads and
+reports throughput, latency percentiles and outcomes. Use it to size
+worker pools and timeouts against a given latency profile before
+running load tests against the Function App.
+
+Usage:
+    python benchmarks/payment_gateway.py --threads 16 --calls 1000 \\
+        --latency lognormal:80:0.6 --timeout-rate 0.01 --max-concurrency 8 --seed 42
+
+Needs no database. A fixed --seed gives the same sequence of gateway
+decisions on every run.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "payment"))
+)
+from shared.payment_gateway import GatewayError, SimulatedGateway
+
+
+def run(gateway, calls, threads):
+    """Authorize `calls` payments concurrently. Returns per-call results."""
+    results = []
+    results_lock = threading.Lock()
+
+    def charge(_):
+        start = time.perf_counter()
+        try:
+            outcome = (
+                "approved" if gateway.authorize(9.99, "credit_card") else "declined"
+            )
+        except GatewayError as e:
+            outcome = type(e).__name__
+        elapsed = time.perf_counter() - start
+
+        with results_lock:
+            results.append((outcome, elapsed))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(charge, range(calls)))
+    return results, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--latency", default="lognormal:80:0.6")
+    parser.add_argument("--approval-rate", type=float, default=0.95)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-seconds", type=float, default=2.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--acquire-timeout", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    gateway = SimulatedGateway(
+        approval_rate=args.approval_rate,
+        latency=args.latency,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        max_concurrency=args.max_concurrency,
+        acquire_timeout=args.acquire_timeout,
+        seed=args.seed,
+    )
+    results, wall_time = run(gateway, args.calls, args.threads)
+
+    latencies = [elapsed * 1000 for _, elapsed in results]
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    print(
+        f"threads={args.threads} calls={args.calls} latency={args.latency} "
+        f"max_concurrency={args.max_concurrency or 'unlimited'} seed={args.seed}"
+    )
+    print(f"throughput: {len(results) / wall_time:.1f} calls/s ({wall_time:.2f}s)")
+    print(
+        f"latency ms: p50={statistics.median(latencies):.1f} "
+        f"p95={percentile(latencies, 95):.1f} "
+        f"p99={percentile(latencies, 99):.1f} max={max(latencies):.1f}"
+    )
+    print(f"outcomes: {outcomes}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -66,4 +66,7 @@ GO
 --    or Azure Automation
 -- 2. Consider adding a cleanup_log table to track cleanup history
 -- 3. Sessions expire after 7 days by default (configured in code)
+-- 4. The CleanupSessions timer function in user-auth now does this
+--    automatically every 10 minutes, in small batches, and also caps live
+--    sessions per user; this script is kept for manual use
 -- ================================================================
@@ -0,0 +1,20 @@
+-- ================================================================
+-- Migration: Add Product Image Variants
+-- Version: 002
+-- Description: Stores resized/WebP image variant URLs (JSON) per product
+-- ================================================================
+
+IF COL_LENGTH('products', 'image_variants') IS NULL
+BEGIN
+    PRINT 'Adding image_variants column to products...';
+
+    -- JSON array of {"width", "content_type", "url"} objects
+    ALTER TABLE products ADD image_variants NVARCHAR(MAX) NULL;
+
+    PRINT 'image_variants column added successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'products.image_variants already exists. Skipping.';
+END
+GO
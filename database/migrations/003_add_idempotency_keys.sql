@@ -0,0 +1,36 @@
+-- ================================================================
+-- Migration: Add Idempotency Keys Table
+-- Version: 003
+-- Description: Stores responses for Idempotency-Key requests so that
+--              retried Checkout/ProcessPayment calls are replayed
+-- ================================================================
+
+IF OBJECT_ID('idempotency_keys', 'U') IS NULL
+BEGIN
+    PRINT 'Creating idempotency_keys table...';
+
+    CREATE TABLE idempotency_keys (
+        user_id INT NOT NULL,
+        endpoint NVARCHAR(50) NOT NULL,          -- checkout, process-payment
+        idempotency_key NVARCHAR(100) NOT NULL,  -- client-supplied Idempotency-Key header
+        request_hash CHAR(64) NOT NULL,          -- SHA-256 of the request body
+        status NVARCHAR(20) NOT NULL,            -- in_progress, completed
+        response_status INT NULL,
+        response_body NVARCHAR(MAX) NULL,
+        locked_until DATETIME2 NOT NULL,         -- in_progress claim expiry
+        expires_at DATETIME2 NOT NULL,
+        created_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+        CONSTRAINT PK_idempotency_keys PRIMARY KEY (user_id, endpoint, idempotency_key),
+        CONSTRAINT CHK_idempotency_keys_status CHECK (status IN ('in_progress', 'completed')),
+
+        INDEX IX_idempotency_keys_expires_at (expires_at)
+    );
+
+    PRINT 'idempotency_keys table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'idempotency_keys table already exists. Skipping creation.';
+END
+GO
@@ -0,0 +1,54 @@
+-- ================================================================
+-- Migration: Add User History Indexes
+-- Version: 004
+-- Description: Composite (user_id, created_at DESC, id DESC) indexes so a
+--              page of GetOrders/GetTransactions is one bounded range
+--              scan. They replace the single-column user_id indexes.
+-- ================================================================
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_orders_user_id_created_at' AND object_id = OBJECT_ID('orders'))
+BEGIN
+    PRINT 'Creating IX_orders_user_id_created_at...';
+
+    -- status is included so the status filter is applied inside the index
+    CREATE INDEX IX_orders_user_id_created_at
+        ON orders (user_id, created_at DESC, id DESC)
+        INCLUDE (status);
+
+    PRINT 'IX_orders_user_id_created_at created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'IX_orders_user_id_created_at already exists. Skipping.';
+END
+GO
+
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_orders_user_id' AND object_id = OBJECT_ID('orders'))
+BEGIN
+    PRINT 'Dropping IX_orders_user_id (covered by IX_orders_user_id_created_at)...';
+    DROP INDEX IX_orders_user_id ON orders;
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_transactions_user_id_created_at' AND object_id = OBJECT_ID('transactions'))
+BEGIN
+    PRINT 'Creating IX_transactions_user_id_created_at...';
+
+    CREATE INDEX IX_transactions_user_id_created_at
+        ON transactions (user_id, created_at DESC, id DESC)
+        INCLUDE (status);
+
+    PRINT 'IX_transactions_user_id_created_at created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'IX_transactions_user_id_created_at already exists. Skipping.';
+END
+GO
+
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_transactions_user_id' AND object_id = OBJECT_ID('transactions'))
+BEGIN
+    PRINT 'Dropping IX_transactions_user_id (covered by IX_transactions_user_id_created_at)...';
+    DROP INDEX IX_transactions_user_id ON transactions;
+END
+GO
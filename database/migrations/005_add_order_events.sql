@@ -0,0 +1,34 @@
+-- ================================================================
+-- Migration: Add Order Events Table
+-- Version: 005
+-- Description: Append-only log of order changes, read incrementally by
+--              GET /orders/events?since=<cursor>
+-- ================================================================
+
+IF OBJECT_ID('order_events', 'U') IS NULL
+BEGIN
+    PRINT 'Creating order_events table...';
+
+    CREATE TABLE order_events (
+        id BIGINT IDENTITY(1,1) PRIMARY KEY,
+        order_id INT NOT NULL,
+        user_id INT NOT NULL,                    -- order owner, so the feed is one range per user
+        event_type NVARCHAR(50) NOT NULL,        -- created, payment_queued, paid, payment_failed, status_changed, tracking_updated
+        status NVARCHAR(50) NULL,                -- order status after the event
+        details NVARCHAR(MAX) NULL,              -- JSON, e.g. transaction_id or tracking_number
+        created_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+        version ROWVERSION NOT NULL,             -- feed cursor, see GetOrderEvents
+
+        CONSTRAINT FK_order_events_order_id FOREIGN KEY (order_id)
+            REFERENCES orders(id) ON DELETE CASCADE,
+
+        INDEX IX_order_events_user_id_version (user_id, version)
+    );
+
+    PRINT 'order_events table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'order_events table already exists. Skipping creation.';
+END
+GO
@@ -0,0 +1,105 @@
+-- ================================================================
+-- Migration: Add Bulk Order Status Update
+-- Version: 006
+-- Description: Table type and procedure used by POST /orders/status/bulk
+--              to apply many fulfilment updates in one statement
+-- ================================================================
+
+IF TYPE_ID('order_status_update') IS NULL
+BEGIN
+    PRINT 'Creating order_status_update table type...';
+
+    CREATE TYPE order_status_update AS TABLE (
+        order_id INT NOT NULL PRIMARY KEY,
+        status NVARCHAR(50) NOT NULL,            -- '' leaves the status unchanged
+        tracking_number NVARCHAR(100) NOT NULL   -- '' leaves the tracking number unchanged
+    );
+
+    PRINT 'order_status_update table type created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'order_status_update table type already exists. Skipping creation.';
+END
+GO
+
+PRINT 'Creating bulk_update_order_status procedure...';
+GO
+
+CREATE OR ALTER PROCEDURE bulk_update_order_status
+    @updates order_status_update READONLY
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @now DATETIME2 = SYSUTCDATETIME();
+    DECLARE @applied TABLE (
+        order_id INT PRIMARY KEY,
+        user_id INT,
+        previous_status NVARCHAR(50),
+        status NVARCHAR(50)
+    );
+
+    -- Only rows that change something, through an allowed fulfilment
+    -- transition. Repeating the current status is allowed so a tracking
+    -- number can be added on its own, and a replayed batch is a no-op.
+    UPDATE o
+    SET o.status = COALESCE(NULLIF(u.status, ''), o.status),
+        o.tracking_number = COALESCE(NULLIF(u.tracking_number, ''), o.tracking_number),
+        o.shipped_at = CASE WHEN u.status = 'shipped' AND o.status <> 'shipped' THEN @now ELSE o.shipped_at END,
+        o.delivered_at = CASE WHEN u.status = 'delivered' AND o.status <> 'delivered' THEN @now ELSE o.delivered_at END
+    OUTPUT INSERTED.id, INSERTED.user_id, DELETED.status, INSERTED.status INTO @applied
+    FROM orders o
+    JOIN @updates u ON u.order_id = o.id
+    WHERE (
+          (u.status <> '' AND u.status <> o.status)
+          OR (u.tracking_number <> '' AND u.tracking_number <> COALESCE(o.tracking_number, ''))
+      )
+      AND (
+          u.status IN ('', o.status)
+          OR EXISTS (
+              SELECT 1
+              FROM (VALUES
+                  ('pending', 'cancelled'),
+                  ('paid', 'processing'),
+                  ('paid', 'shipped'),
+                  ('paid', 'cancelled'),
+                  ('processing', 'shipped'),
+                  ('processing', 'cancelled'),
+                  ('shipped', 'delivered')
+              ) t (from_status, to_status)
+              WHERE t.from_status = o.status AND t.to_status = u.status
+          )
+      );
+
+    INSERT INTO order_events (order_id, user_id, event_type, status, details)
+    SELECT a.order_id,
+           a.user_id,
+           CASE WHEN a.status <> a.previous_status THEN 'status_changed' ELSE 'tracking_updated' END,
+           a.status,
+           (SELECT a.previous_status AS previous_status,
+                   NULLIF(u.tracking_number, '') AS tracking_number
+            FOR JSON PATH, WITHOUT_ARRAY_WRAPPER)
+    FROM @applied a
+    JOIN @updates u ON u.order_id = a.order_id;
+
+    -- One outcome row per requested order
+    SELECT u.order_id,
+           CASE
+               WHEN a.order_id IS NOT NULL THEN 'updated'
+               WHEN o.id IS NULL THEN 'not_found'
+               WHEN u.status IN ('', o.status)
+                    AND u.tracking_number IN ('', COALESCE(o.tracking_number, '')) THEN 'unchanged'
+               ELSE 'invalid_transition'
+           END AS outcome,
+           COALESCE(a.previous_status, o.status) AS previous_status,
+           o.status
+    FROM @updates u
+    LEFT JOIN @applied a ON a.order_id = u.order_id
+    LEFT JOIN orders o ON o.id = u.order_id;
+END
+GO
+
+PRINT 'bulk_update_order_status procedure created successfully.';
+GO
@@ -0,0 +1,32 @@
+-- ================================================================
+-- Migration: Add Admin Order Search Index
+-- Version: 007
+-- Description: Covering (status, created_at DESC, id DESC) index for
+--              GET /admin/orders?status=..., the most common ops query.
+--              It replaces the single-column status index.
+-- ================================================================
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_orders_status_created_at' AND object_id = OBJECT_ID('orders'))
+BEGIN
+    PRINT 'Creating IX_orders_status_created_at...';
+
+    -- Includes every column the admin listing returns except the
+    -- shipping address, so a status page never touches the clustered index
+    CREATE INDEX IX_orders_status_created_at
+        ON orders (status, created_at DESC, id DESC)
+        INCLUDE (user_id, total_amount, tracking_number, paid_at, shipped_at, delivered_at);
+
+    PRINT 'IX_orders_status_created_at created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'IX_orders_status_created_at already exists. Skipping.';
+END
+GO
+
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_orders_status' AND object_id = OBJECT_ID('orders'))
+BEGIN
+    PRINT 'Dropping IX_orders_status (covered by IX_orders_status_created_at)...';
+    DROP INDEX IX_orders_status ON orders;
+END
+GO
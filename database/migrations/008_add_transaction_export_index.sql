@@ -0,0 +1,30 @@
+-- ================================================================
+-- Migration: Add Transaction Export Index
+-- Version: 008
+-- Description: Makes the created_at index on transactions covering, so
+--              GET /admin/transactions/export reads a date range in
+--              (created_at, id) order without key lookups or a sort.
+-- ================================================================
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_transactions_created_at_covering' AND object_id = OBJECT_ID('transactions'))
+BEGIN
+    PRINT 'Creating IX_transactions_created_at_covering...';
+
+    CREATE INDEX IX_transactions_created_at_covering
+        ON transactions (created_at, id)
+        INCLUDE (transaction_id, order_id, user_id, amount, payment_method, status);
+
+    PRINT 'IX_transactions_created_at_covering created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'IX_transactions_created_at_covering already exists. Skipping.';
+END
+GO
+
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_transactions_created_at' AND object_id = OBJECT_ID('transactions'))
+BEGIN
+    PRINT 'Dropping IX_transactions_created_at (covered by IX_transactions_created_at_covering)...';
+    DROP INDEX IX_transactions_created_at ON transactions;
+END
+GO
@@ -0,0 +1,111 @@
+-- ================================================================
+-- Migration: Add Sales Rollup Tables
+-- Version: 009
+-- Description: Per-day sales totals overall, per product and per
+--              category, maintained incrementally by the RollupDailySales
+--              timer from a high-water mark in rollup_state and read by
+--              GET /admin/stats/sales.
+-- ================================================================
+
+IF OBJECT_ID('sales_daily', 'U') IS NULL
+BEGIN
+    PRINT 'Creating sales_daily table...';
+
+    CREATE TABLE sales_daily (
+        sales_date DATE NOT NULL PRIMARY KEY,
+        orders INT NOT NULL DEFAULT 0,           -- orders paid that day
+        units INT NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        failed_payments INT NOT NULL DEFAULT 0,
+        updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE()
+    );
+
+    PRINT 'sales_daily table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'sales_daily table already exists. Skipping creation.';
+END
+GO
+
+IF OBJECT_ID('sales_daily_product', 'U') IS NULL
+BEGIN
+    PRINT 'Creating sales_daily_product table...';
+
+    CREATE TABLE sales_daily_product (
+        sales_date DATE NOT NULL,
+        product_id INT NOT NULL,                 -- no FK, so history outlives deleted products
+        orders INT NOT NULL DEFAULT 0,
+        units INT NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        failed_payments INT NOT NULL DEFAULT 0,
+        updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+        CONSTRAINT PK_sales_daily_product PRIMARY KEY (sales_date, product_id)
+    );
+
+    PRINT 'sales_daily_product table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'sales_daily_product table already exists. Skipping creation.';
+END
+GO
+
+IF OBJECT_ID('sales_daily_category', 'U') IS NULL
+BEGIN
+    PRINT 'Creating sales_daily_category table...';
+
+    CREATE TABLE sales_daily_category (
+        sales_date DATE NOT NULL,
+        category NVARCHAR(100) NOT NULL,         -- 'Uncategorized' when the product has none
+        orders INT NOT NULL DEFAULT 0,
+        units INT NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        failed_payments INT NOT NULL DEFAULT 0,
+        updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+        CONSTRAINT PK_sales_daily_category PRIMARY KEY (sales_date, category)
+    );
+
+    PRINT 'sales_daily_category table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'sales_daily_category table already exists. Skipping creation.';
+END
+GO
+
+IF OBJECT_ID('rollup_state', 'U') IS NULL
+BEGIN
+    PRINT 'Creating rollup_state table...';
+
+    CREATE TABLE rollup_state (
+        name NVARCHAR(50) NOT NULL PRIMARY KEY,  -- e.g. daily_sales
+        high_water_mark DATETIME2 NOT NULL,      -- facts up to and including this time are rolled up
+        updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE()
+    );
+
+    PRINT 'rollup_state table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'rollup_state table already exists. Skipping creation.';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_orders_paid_at' AND object_id = OBJECT_ID('orders'))
+BEGIN
+    PRINT 'Creating IX_orders_paid_at...';
+
+    CREATE INDEX IX_orders_paid_at
+        ON orders (paid_at)
+        WHERE paid_at IS NOT NULL;
+
+    PRINT 'IX_orders_paid_at created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'IX_orders_paid_at already exists. Skipping.';
+END
+GO
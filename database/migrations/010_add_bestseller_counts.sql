@@ -0,0 +1,26 @@
+-- ================================================================
+-- Migration: Add Best-Seller Counts
+-- Version: 010
+-- Description: Units sold per product, persisted by the PersistBestSellers
+--              timer from the 'bestsellers' high-water mark in
+--              rollup_state (migration 009) and loaded by product-catalog
+--              instances to seed their in-memory best-seller rankings.
+-- ================================================================
+
+IF OBJECT_ID('bestseller_counts', 'U') IS NULL
+BEGIN
+    PRINT 'Creating bestseller_counts table...';
+
+    CREATE TABLE bestseller_counts (
+        product_id INT NOT NULL PRIMARY KEY,     -- category is read from products, so edits re-rank
+        units_sold INT NOT NULL DEFAULT 0,       -- units in paid orders up to the high-water mark
+        updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE()
+    );
+
+    PRINT 'bestseller_counts table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'bestseller_counts table already exists. Skipping creation.';
+END
+GO
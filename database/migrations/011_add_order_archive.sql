@@ -0,0 +1,89 @@
+-- ================================================================
+-- Migration: Add Order Archive Tables
+-- Version: 011
+-- Description: Cold copies of orders, order_items and transactions. The
+--              ArchiveOrders timer moves delivered/cancelled orders older
+--              than ARCHIVE_AFTER_DAYS here in batches, and records its
+--              cutoff as the 'order_archive' mark in rollup_state (009).
+--              GetOrder, GetOrders, GetTransaction and GetTransactions
+--              read the archive when a request reaches past that mark.
+--              Rows keep their original ids; there are no foreign keys
+--              and the tables are page-compressed.
+-- ================================================================
+
+IF OBJECT_ID('orders_archive', 'U') IS NULL
+BEGIN
+    PRINT 'Creating orders_archive table...';
+
+    CREATE TABLE orders_archive (
+        id INT NOT NULL PRIMARY KEY,
+        user_id INT NOT NULL,
+        total_amount DECIMAL(10, 2) NOT NULL,
+        status NVARCHAR(50) NOT NULL,            -- delivered or cancelled
+        shipping_address NVARCHAR(MAX) NULL,
+        tracking_number NVARCHAR(100) NULL,
+        created_at DATETIME2 NOT NULL,
+        paid_at DATETIME2 NULL,
+        shipped_at DATETIME2 NULL,
+        delivered_at DATETIME2 NULL,
+        archived_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+        INDEX IX_orders_archive_user_id_created_at (user_id, created_at DESC, id DESC) INCLUDE (status)
+    ) WITH (DATA_COMPRESSION = PAGE);
+
+    PRINT 'orders_archive table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'orders_archive table already exists. Skipping creation.';
+END
+GO
+
+IF OBJECT_ID('order_items_archive', 'U') IS NULL
+BEGIN
+    PRINT 'Creating order_items_archive table...';
+
+    CREATE TABLE order_items_archive (
+        id INT NOT NULL PRIMARY KEY,
+        order_id INT NOT NULL,
+        product_id INT NOT NULL,
+        quantity INT NOT NULL,
+        price_at_purchase DECIMAL(10, 2) NOT NULL,
+
+        INDEX IX_order_items_archive_order_id (order_id)
+    ) WITH (DATA_COMPRESSION = PAGE);
+
+    PRINT 'order_items_archive table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'order_items_archive table already exists. Skipping creation.';
+END
+GO
+
+IF OBJECT_ID('transactions_archive', 'U') IS NULL
+BEGIN
+    PRINT 'Creating transactions_archive table...';
+
+    CREATE TABLE transactions_archive (
+        id INT NOT NULL PRIMARY KEY,
+        order_id INT NOT NULL,
+        user_id INT NOT NULL,
+        amount DECIMAL(10, 2) NOT NULL,
+        payment_method NVARCHAR(50) NOT NULL,
+        status NVARCHAR(50) NOT NULL,
+        transaction_id NVARCHAR(100) NOT NULL,
+        created_at DATETIME2 NOT NULL,
+        archived_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+        INDEX IX_transactions_archive_order_id (order_id),
+        INDEX IX_transactions_archive_user_id_created_at (user_id, created_at DESC, id DESC) INCLUDE (status)
+    ) WITH (DATA_COMPRESSION = PAGE);
+
+    PRINT 'transactions_archive table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'transactions_archive table already exists. Skipping creation.';
+END
+GO
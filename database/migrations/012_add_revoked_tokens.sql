@@ -0,0 +1,29 @@
+-- ================================================================
+-- Migration: Add Revoked Tokens Table
+-- Version: 012
+-- Description: Logouts of signed session tokens. Every app checks signed
+--              tokens locally and keeps an in-memory set of revoked token
+--              IDs, refreshed incrementally from this table by revoked_at.
+-- ================================================================
+
+IF OBJECT_ID('revoked_tokens', 'U') IS NULL
+BEGIN
+    PRINT 'Creating revoked_tokens table...';
+
+    CREATE TABLE revoked_tokens (
+        token_id NVARCHAR(32) NOT NULL PRIMARY KEY,  -- token_id field of the signed token
+        user_id INT NOT NULL,
+        expires_at DATETIME2 NOT NULL,               -- token expiry; the row is useless after it
+        revoked_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+
+        INDEX IX_revoked_tokens_revoked_at (revoked_at) INCLUDE (expires_at),
+        INDEX IX_revoked_tokens_expires_at (expires_at)
+    );
+
+    PRINT 'revoked_tokens table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'revoked_tokens table already exists. Skipping creation.';
+END
+GO
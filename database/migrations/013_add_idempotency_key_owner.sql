@@ -0,0 +1,23 @@
+-- ================================================================
+-- Migration: Add Idempotency Key Owner
+-- Version: 013
+-- Description: Each claim of an idempotency key gets a random owner
+--              token. The request that stores or releases the key only
+--              touches the row while it still owns it, so a request that
+--              lost its claim to a takeover cannot overwrite or delete
+--              the new owner's row.
+-- ================================================================
+
+IF COL_LENGTH('idempotency_keys', 'owner') IS NULL
+BEGIN
+    PRINT 'Adding owner column to idempotency_keys...';
+
+    ALTER TABLE idempotency_keys ADD owner UNIQUEIDENTIFIER NULL;
+
+    PRINT 'owner column added successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'idempotency_keys.owner already exists. Skipping.';
+END
+GO
@@ -0,0 +1,51 @@
+-- ================================================================
+-- Migration: Add Transaction Status Change Time
+-- Version: 014
+-- Description: transactions.status_changed_at records when a transaction
+--              last changed status. An asynchronous payment is created
+--              'pending' and only turns 'failed' later, so the sales
+--              rollup counts failed payments by this time rather than by
+--              created_at. Existing rows are backfilled from created_at.
+-- ================================================================
+
+IF COL_LENGTH('transactions', 'status_changed_at') IS NULL
+BEGIN
+    PRINT 'Adding status_changed_at to transactions...';
+
+    ALTER TABLE transactions ADD status_changed_at DATETIME2 NULL;
+END
+ELSE
+BEGIN
+    PRINT 'transactions.status_changed_at already exists. Skipping.';
+END
+GO
+
+UPDATE transactions SET status_changed_at = created_at WHERE status_changed_at IS NULL;
+GO
+
+IF COLUMNPROPERTY(OBJECT_ID('transactions'), 'status_changed_at', 'AllowsNull') = 1
+BEGIN
+    ALTER TABLE transactions ALTER COLUMN status_changed_at DATETIME2 NOT NULL;
+    ALTER TABLE transactions
+        ADD CONSTRAINT DF_transactions_status_changed_at DEFAULT GETUTCDATE() FOR status_changed_at;
+
+    PRINT 'status_changed_at added successfully.';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_transactions_failed_status_changed_at' AND object_id = OBJECT_ID('transactions'))
+BEGIN
+    PRINT 'Creating IX_transactions_failed_status_changed_at...';
+
+    CREATE INDEX IX_transactions_failed_status_changed_at
+        ON transactions (status_changed_at)
+        INCLUDE (order_id)
+        WHERE status = 'failed';
+
+    PRINT 'IX_transactions_failed_status_changed_at created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'IX_transactions_failed_status_changed_at already exists. Skipping.';
+END
+GO
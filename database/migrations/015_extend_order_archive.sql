@@ -0,0 +1,77 @@
+-- ================================================================
+-- Migration: Extend Order Archive
+-- Version: 015
+-- Description: Keeps more of an archived order and makes the archive
+--              searchable by the readers that now fall back to it:
+--              - transactions_archive.status_changed_at (added to
+--                transactions in 014); existing rows use created_at
+--              - order_events_archive, so an order's event history is
+--                kept when ArchiveOrders deletes it
+--              - indexes for the admin order search (created_at,
+--                tracking_number) and the transaction export (created_at)
+-- ================================================================
+
+IF COL_LENGTH('transactions_archive', 'status_changed_at') IS NULL
+BEGIN
+    PRINT 'Adding status_changed_at to transactions_archive...';
+
+    ALTER TABLE transactions_archive ADD status_changed_at DATETIME2 NULL;
+END
+ELSE
+BEGIN
+    PRINT 'transactions_archive.status_changed_at already exists. Skipping.';
+END
+GO
+
+UPDATE transactions_archive SET status_changed_at = created_at WHERE status_changed_at IS NULL;
+GO
+
+IF OBJECT_ID('order_events_archive', 'U') IS NULL
+BEGIN
+    PRINT 'Creating order_events_archive table...';
+
+    CREATE TABLE order_events_archive (
+        id BIGINT NOT NULL PRIMARY KEY,          -- original order_events.id
+        order_id INT NOT NULL,
+        user_id INT NOT NULL,
+        event_type NVARCHAR(50) NOT NULL,
+        status NVARCHAR(50) NULL,
+        details NVARCHAR(MAX) NULL,
+        created_at DATETIME2 NOT NULL,
+        archived_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+        INDEX IX_order_events_archive_order_id (order_id)
+    ) WITH (DATA_COMPRESSION = PAGE);
+
+    PRINT 'order_events_archive table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'order_events_archive table already exists. Skipping creation.';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_orders_archive_created_at' AND object_id = OBJECT_ID('orders_archive'))
+BEGIN
+    PRINT 'Creating archive search indexes...';
+
+    CREATE INDEX IX_orders_archive_created_at
+        ON orders_archive (created_at DESC, id DESC) INCLUDE (status)
+        WITH (DATA_COMPRESSION = PAGE);
+
+    CREATE INDEX IX_orders_archive_tracking_number
+        ON orders_archive (tracking_number)
+        WITH (DATA_COMPRESSION = PAGE);
+
+    CREATE INDEX IX_transactions_archive_created_at
+        ON transactions_archive (created_at, id)
+        INCLUDE (transaction_id, order_id, user_id, amount, payment_method, status)
+        WITH (DATA_COMPRESSION = PAGE);
+
+    PRINT 'Archive search indexes created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'Archive search indexes already exist. Skipping.';
+END
+GO
@@ -7,12 +7,26 @@
 
 -- Drop existing tables if they exist (CASCADE for foreign keys)
 -- Order matters due to foreign key constraints
+IF OBJECT_ID('bulk_update_order_status', 'P') IS NOT NULL DROP PROCEDURE bulk_update_order_status;
+IF TYPE_ID('order_status_update') IS NOT NULL DROP TYPE order_status_update;
+IF OBJECT_ID('order_events_archive', 'U') IS NOT NULL DROP TABLE order_events_archive;
+IF OBJECT_ID('transactions_archive', 'U') IS NOT NULL DROP TABLE transactions_archive;
+IF OBJECT_ID('order_items_archive', 'U') IS NOT NULL DROP TABLE order_items_archive;
+IF OBJECT_ID('orders_archive', 'U') IS NOT NULL DROP TABLE orders_archive;
+IF OBJECT_ID('bestseller_counts', 'U') IS NOT NULL DROP TABLE bestseller_counts;
+IF OBJECT_ID('rollup_state', 'U') IS NOT NULL DROP TABLE rollup_state;
+IF OBJECT_ID('sales_daily_category', 'U') IS NOT NULL DROP TABLE sales_daily_category;
+IF OBJECT_ID('sales_daily_product', 'U') IS NOT NULL DROP TABLE sales_daily_product;
+IF OBJECT_ID('sales_daily', 'U') IS NOT NULL DROP TABLE sales_daily;
+IF OBJECT_ID('idempotency_keys', 'U') IS NOT NULL DROP TABLE idempotency_keys;
+IF OBJECT_ID('order_events', 'U') IS NOT NULL DROP TABLE order_events;
 IF OBJECT_ID('order_items', 'U') IS NOT NULL DROP TABLE order_items;
 IF OBJECT_ID('transactions', 'U') IS NOT NULL DROP TABLE transactions;
 IF OBJECT_ID('orders', 'U') IS NOT NULL DROP TABLE orders;
 IF OBJECT_ID('cart_items', 'U') IS NOT NULL DROP TABLE cart_items;
 IF OBJECT_ID('wishlist', 'U') IS NOT NULL DROP TABLE wishlist;
 IF OBJECT_ID('payment_methods', 'U') IS NOT NULL DROP TABLE payment_methods;
+IF OBJECT_ID('revoked_tokens', 'U') IS NOT NULL DROP TABLE revoked_tokens;
 IF OBJECT_ID('sessions', 'U') IS NOT NULL DROP TABLE sessions;
 IF OBJECT_ID('products', 'U') IS NOT NULL DROP TABLE products;
 IF OBJECT_ID('shopusers', 'U') IS NOT NULL DROP TABLE shopusers;
@@ -55,6 +69,18 @@ CREATE TABLE sessions (
     INDEX IX_sessions_expires_at (expires_at)
 );
 
+-- Revoked Tokens Table (logged-out signed session tokens)
+CREATE TABLE revoked_tokens (
+    token_id NVARCHAR(32) NOT NULL PRIMARY KEY,  -- token_id field of the signed token
+    user_id INT NOT NULL,
+    expires_at DATETIME2 NOT NULL,               -- token expiry; the row is useless after it
+    revoked_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+
+    -- Indexes
+    INDEX IX_revoked_tokens_revoked_at (revoked_at) INCLUDE (expires_at),
+    INDEX IX_revoked_tokens_expires_at (expires_at)
+);
+
 -- ================================================================
 -- PAYMENT METHODS TABLE
 -- ================================================================
@@ -100,6 +126,7 @@ CREATE TABLE products (
     stock_quantity INT NOT NULL DEFAULT 0,
     category NVARCHAR(100) NOT NULL,
     image_url NVARCHAR(500) NULL,
+    image_variants NVARCHAR(MAX) NULL,      -- JSON array of resized/WebP variant URLs
     created_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
     updated_at DATETIME2 NULL,
 
@@ -189,10 +216,12 @@ CREATE TABLE orders (
     CONSTRAINT CHK_orders_status CHECK (status IN ('pending', 'paid', 'processing', 'shipped', 'delivered', 'cancelled')),
 
     -- Indexes
-    INDEX IX_orders_user_id (user_id),
-    INDEX IX_orders_status (status),
+    INDEX IX_orders_user_id_created_at (user_id, created_at DESC, id DESC) INCLUDE (status),
+    INDEX IX_orders_status_created_at (status, created_at DESC, id DESC)
+        INCLUDE (user_id, total_amount, tracking_number, paid_at, shipped_at, delivered_at),
     INDEX IX_orders_created_at (created_at),
-    INDEX IX_orders_tracking_number (tracking_number)
+    INDEX IX_orders_tracking_number (tracking_number),
+    INDEX IX_orders_paid_at (paid_at) WHERE paid_at IS NOT NULL
 );
 
 -- Order Items Table (products in each order)
@@ -218,6 +247,25 @@ CREATE TABLE order_items (
     INDEX IX_order_items_product_id (product_id)
 );
 
+-- Order Events Table (append-only change feed for GET /orders/events)
+CREATE TABLE order_events (
+    id BIGINT IDENTITY(1,1) PRIMARY KEY,
+    order_id INT NOT NULL,
+    user_id INT NOT NULL,                    -- order owner, so the feed is one range per user
+    event_type NVARCHAR(50) NOT NULL,        -- created, payment_queued, paid, payment_failed, status_changed, tracking_updated
+    status NVARCHAR(50) NULL,                -- order status after the event
+    details NVARCHAR(MAX) NULL,              -- JSON, e.g. transaction_id or tracking_number
+    created_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+    version ROWVERSION NOT NULL,             -- feed cursor
+
+    -- Foreign keys
+    CONSTRAINT FK_order_events_order_id FOREIGN KEY (order_id)
+        REFERENCES orders(id) ON DELETE CASCADE,
+
+    -- Indexes
+    INDEX IX_order_events_user_id_version (user_id, version)
+);
+
 -- ================================================================
 -- PAYMENT TABLES
 -- ================================================================
@@ -232,6 +280,7 @@ CREATE TABLE transactions (
     status NVARCHAR(50) NOT NULL,          -- completed, failed, pending, refunded
     transaction_id NVARCHAR(100) NOT NULL UNIQUE,  -- External transaction reference
     created_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+    status_changed_at DATETIME2 NOT NULL CONSTRAINT DF_transactions_status_changed_at DEFAULT GETUTCDATE(),  -- last status change
 
     -- Foreign keys
     CONSTRAINT FK_transactions_order_id FOREIGN KEY (order_id)
@@ -246,12 +295,246 @@ CREATE TABLE transactions (
 
     -- Indexes
     INDEX IX_transactions_order_id (order_id),
-    INDEX IX_transactions_user_id (user_id),
+    INDEX IX_transactions_user_id_created_at (user_id, created_at DESC, id DESC) INCLUDE (status),
     INDEX IX_transactions_transaction_id (transaction_id),
     INDEX IX_transactions_status (status),
-    INDEX IX_transactions_created_at (created_at)
+    INDEX IX_transactions_created_at_covering (created_at, id)
+        INCLUDE (transaction_id, order_id, user_id, amount, payment_method, status),
+    INDEX IX_transactions_failed_status_changed_at (status_changed_at)
+        INCLUDE (order_id) WHERE status = 'failed'
+);
+
+-- Idempotency Keys Table (stored responses for retried payment requests)
+CREATE TABLE idempotency_keys (
+    user_id INT NOT NULL,
+    endpoint NVARCHAR(50) NOT NULL,          -- checkout, process-payment
+    idempotency_key NVARCHAR(100) NOT NULL,  -- client-supplied Idempotency-Key header
+    request_hash CHAR(64) NOT NULL,          -- SHA-256 of the request body
+    status NVARCHAR(20) NOT NULL,            -- in_progress, completed
+    response_status INT NULL,
+    response_body NVARCHAR(MAX) NULL,
+    locked_until DATETIME2 NOT NULL,         -- in_progress claim expiry
+    owner UNIQUEIDENTIFIER NULL,             -- claim token of the request that holds the key
+    expires_at DATETIME2 NOT NULL,
+    created_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+    CONSTRAINT PK_idempotency_keys PRIMARY KEY (user_id, endpoint, idempotency_key),
+    CONSTRAINT CHK_idempotency_keys_status CHECK (status IN ('in_progress', 'completed')),
+
+    INDEX IX_idempotency_keys_expires_at (expires_at)
+);
+
+-- ================================================================
+-- ARCHIVE TABLES (finished orders moved by ArchiveOrders)
+-- ================================================================
+
+-- Orders Archive (delivered/cancelled orders older than ARCHIVE_AFTER_DAYS)
+CREATE TABLE orders_archive (
+    id INT NOT NULL PRIMARY KEY,             -- original orders.id
+    user_id INT NOT NULL,
+    total_amount DECIMAL(10, 2) NOT NULL,
+    status NVARCHAR(50) NOT NULL,            -- delivered or cancelled
+    shipping_address NVARCHAR(MAX) NULL,
+    tracking_number NVARCHAR(100) NULL,
+    created_at DATETIME2 NOT NULL,
+    paid_at DATETIME2 NULL,
+    shipped_at DATETIME2 NULL,
+    delivered_at DATETIME2 NULL,
+    archived_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+    -- Indexes
+    INDEX IX_orders_archive_user_id_created_at (user_id, created_at DESC, id DESC) INCLUDE (status),
+    INDEX IX_orders_archive_created_at (created_at DESC, id DESC) INCLUDE (status),
+    INDEX IX_orders_archive_tracking_number (tracking_number)
+) WITH (DATA_COMPRESSION = PAGE);
+
+-- Order Items Archive
+CREATE TABLE order_items_archive (
+    id INT NOT NULL PRIMARY KEY,             -- original order_items.id
+    order_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    price_at_purchase DECIMAL(10, 2) NOT NULL,
+
+    -- Indexes
+    INDEX IX_order_items_archive_order_id (order_id)
+) WITH (DATA_COMPRESSION = PAGE);
+
+-- Transactions Archive
+CREATE TABLE transactions_archive (
+    id INT NOT NULL PRIMARY KEY,             -- original transactions.id
+    order_id INT NOT NULL,
+    user_id INT NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    payment_method NVARCHAR(50) NOT NULL,
+    status NVARCHAR(50) NOT NULL,
+    transaction_id NVARCHAR(100) NOT NULL,
+    created_at DATETIME2 NOT NULL,
+    status_changed_at DATETIME2 NULL,
+    archived_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+    -- Indexes
+    INDEX IX_transactions_archive_order_id (order_id),
+    INDEX IX_transactions_archive_user_id_created_at (user_id, created_at DESC, id DESC) INCLUDE (status),
+    INDEX IX_transactions_archive_created_at (created_at, id)
+        INCLUDE (transaction_id, order_id, user_id, amount, payment_method, status)
+) WITH (DATA_COMPRESSION = PAGE);
+
+-- Order Events Archive
+CREATE TABLE order_events_archive (
+    id BIGINT NOT NULL PRIMARY KEY,          -- original order_events.id
+    order_id INT NOT NULL,
+    user_id INT NOT NULL,
+    event_type NVARCHAR(50) NOT NULL,
+    status NVARCHAR(50) NULL,
+    details NVARCHAR(MAX) NULL,
+    created_at DATETIME2 NOT NULL,
+    archived_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+    -- Indexes
+    INDEX IX_order_events_archive_order_id (order_id)
+) WITH (DATA_COMPRESSION = PAGE);
+
+-- ================================================================
+-- REPORTING TABLES
+-- ================================================================
+
+-- Daily Sales Rollup (maintained by RollupDailySales, read by GET /admin/stats/sales)
+CREATE TABLE sales_daily (
+    sales_date DATE NOT NULL PRIMARY KEY,
+    orders INT NOT NULL DEFAULT 0,           -- orders paid that day
+    units INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    failed_payments INT NOT NULL DEFAULT 0,
+    updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE()
 );
 
+-- Daily Sales per Product
+CREATE TABLE sales_daily_product (
+    sales_date DATE NOT NULL,
+    product_id INT NOT NULL,                 -- no FK, so history outlives deleted products
+    orders INT NOT NULL DEFAULT 0,
+    units INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    failed_payments INT NOT NULL DEFAULT 0,
+    updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+    CONSTRAINT PK_sales_daily_product PRIMARY KEY (sales_date, product_id)
+);
+
+-- Daily Sales per Category
+CREATE TABLE sales_daily_category (
+    sales_date DATE NOT NULL,
+    category NVARCHAR(100) NOT NULL,         -- 'Uncategorized' when the product has none
+    orders INT NOT NULL DEFAULT 0,
+    units INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    failed_payments INT NOT NULL DEFAULT 0,
+    updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE(),
+
+    CONSTRAINT PK_sales_daily_category PRIMARY KEY (sales_date, category)
+);
+
+-- Rollup State (high-water mark of each incremental rollup)
+CREATE TABLE rollup_state (
+    name NVARCHAR(50) NOT NULL PRIMARY KEY,  -- e.g. daily_sales
+    high_water_mark DATETIME2 NOT NULL,      -- facts up to and including this time are rolled up
+    updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE()
+);
+
+-- Best-Seller Counts (persisted by PersistBestSellers, loaded by GET /products/bestsellers)
+CREATE TABLE bestseller_counts (
+    product_id INT NOT NULL PRIMARY KEY,     -- category is read from products, so edits re-rank
+    units_sold INT NOT NULL DEFAULT 0,       -- units in paid orders up to the high-water mark
+    updated_at DATETIME2 NOT NULL DEFAULT GETUTCDATE()
+);
+
+-- ================================================================
+-- STORED PROCEDURES
+-- ================================================================
+
+-- Bulk fulfilment updates (POST /orders/status/bulk)
+CREATE TYPE order_status_update AS TABLE (
+    order_id INT NOT NULL PRIMARY KEY,
+    status NVARCHAR(50) NOT NULL,            -- '' leaves the status unchanged
+    tracking_number NVARCHAR(100) NOT NULL   -- '' leaves the tracking number unchanged
+);
+GO
+
+CREATE PROCEDURE bulk_update_order_status
+    @updates order_status_update READONLY
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @now DATETIME2 = SYSUTCDATETIME();
+    DECLARE @applied TABLE (
+        order_id INT PRIMARY KEY,
+        user_id INT,
+        previous_status NVARCHAR(50),
+        status NVARCHAR(50)
+    );
+
+    -- Only rows that change something, through an allowed fulfilment
+    -- transition. Repeating the current status is allowed so a tracking
+    -- number can be added on its own, and a replayed batch is a no-op.
+    UPDATE o
+    SET o.status = COALESCE(NULLIF(u.status, ''), o.status),
+        o.tracking_number = COALESCE(NULLIF(u.tracking_number, ''), o.tracking_number),
+        o.shipped_at = CASE WHEN u.status = 'shipped' AND o.status <> 'shipped' THEN @now ELSE o.shipped_at END,
+        o.delivered_at = CASE WHEN u.status = 'delivered' AND o.status <> 'delivered' THEN @now ELSE o.delivered_at END
+    OUTPUT INSERTED.id, INSERTED.user_id, DELETED.status, INSERTED.status INTO @applied
+    FROM orders o
+    JOIN @updates u ON u.order_id = o.id
+    WHERE (
+          (u.status <> '' AND u.status <> o.status)
+          OR (u.tracking_number <> '' AND u.tracking_number <> COALESCE(o.tracking_number, ''))
+      )
+      AND (
+          u.status IN ('', o.status)
+          OR EXISTS (
+              SELECT 1
+              FROM (VALUES
+                  ('pending', 'cancelled'),
+                  ('paid', 'processing'),
+                  ('paid', 'shipped'),
+                  ('paid', 'cancelled'),
+                  ('processing', 'shipped'),
+                  ('processing', 'cancelled'),
+                  ('shipped', 'delivered')
+              ) t (from_status, to_status)
+              WHERE t.from_status = o.status AND t.to_status = u.status
+          )
+      );
+
+    INSERT INTO order_events (order_id, user_id, event_type, status, details)
+    SELECT a.order_id,
+           a.user_id,
+           CASE WHEN a.status <> a.previous_status THEN 'status_changed' ELSE 'tracking_updated' END,
+           a.status,
+           (SELECT a.previous_status AS previous_status,
+                   NULLIF(u.tracking_number, '') AS tracking_number
+            FOR JSON PATH, WITHOUT_ARRAY_WRAPPER)
+    FROM @applied a
+    JOIN @updates u ON u.order_id = a.order_id;
+
+    -- One outcome row per requested order
+    SELECT u.order_id,
+           CASE
+               WHEN a.order_id IS NOT NULL THEN 'updated'
+               WHEN o.id IS NULL THEN 'not_found'
+               WHEN u.status IN ('', o.status)
+                    AND u.tracking_number IN ('', COALESCE(o.tracking_number, '')) THEN 'unchanged'
+               ELSE 'invalid_transition'
+           END AS outcome,
+           COALESCE(a.previous_status, o.status) AS previous_status,
+           o.status
+    FROM @updates u
+    LEFT JOIN @applied a ON a.order_id = u.order_id
+    LEFT JOIN orders o ON o.id = u.order_id;
+END
+GO
 
 -- ================================================================
 -- SEED DATA (Optional - for testing)
@@ -281,6 +564,8 @@ SELECT 'shopusers' AS TableName, COUNT(*) AS RowCount FROM shopusers
 UNION ALL
 SELECT 'sessions', COUNT(*) FROM sessions
 UNION ALL
+SELECT 'revoked_tokens', COUNT(*) FROM revoked_tokens
+UNION ALL
 SELECT 'payment_methods', COUNT(*) FROM payment_methods
 UNION ALL
 SELECT 'products', COUNT(*) FROM products
@@ -293,7 +578,29 @@ SELECT 'orders', COUNT(*) FROM orders
 UNION ALL
 SELECT 'order_items', COUNT(*) FROM order_items
 UNION ALL
-SELECT 'transactions', COUNT(*) FROM transactions;
+SELECT 'transactions', COUNT(*) FROM transactions
+UNION ALL
+SELECT 'idempotency_keys', COUNT(*) FROM idempotency_keys
+UNION ALL
+SELECT 'order_events', COUNT(*) FROM order_events
+UNION ALL
+SELECT 'sales_daily', COUNT(*) FROM sales_daily
+UNION ALL
+SELECT 'sales_daily_product', COUNT(*) FROM sales_daily_product
+UNION ALL
+SELECT 'sales_daily_category', COUNT(*) FROM sales_daily_category
+UNION ALL
+SELECT 'rollup_state', COUNT(*) FROM rollup_state
+UNION ALL
+SELECT 'bestseller_counts', COUNT(*) FROM bestseller_counts
+UNION ALL
+SELECT 'orders_archive', COUNT(*) FROM orders_archive
+UNION ALL
+SELECT 'order_items_archive', COUNT(*) FROM order_items_archive
+UNION ALL
+SELECT 'transactions_archive', COUNT(*) FROM transactions_archive
+UNION ALL
+SELECT 'order_events_archive', COUNT(*) FROM order_events_archive;
 
 -- Show table information
 SELECT
@@ -305,7 +612,7 @@ SELECT
 FROM sys.tables t
 INNER JOIN sys.columns c ON t.object_id = c.object_id
 INNER JOIN sys.types ty ON c.user_type_id = ty.user_type_id
-WHERE t.name IN ('shopusers', 'sessions', 'payment_methods', 'products', 'cart_items', 'wishlist', 'orders', 'order_items', 'transactions')
+WHERE t.name IN ('shopusers', 'sessions', 'revoked_tokens', 'payment_methods', 'products', 'cart_items', 'wishlist', 'orders', 'order_items', 'transactions', 'idempotency_keys', 'order_events', 'sales_daily', 'sales_daily_product', 'sales_daily_category', 'rollup_state', 'bestseller_counts', 'orders_archive', 'order_items_archive', 'transactions_archive', 'order_events_archive')
 ORDER BY t.name, c.column_id;
 
 -- ================================================================
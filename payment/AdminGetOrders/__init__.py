@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.archive import fetch_history_page
+from shared.db_utils import get_db_connection, verify_admin
+from shared.order_utils import ORDER_STATUSES
+from shared.pagination import next_cursor, parse_page_params
+
+# Every filter is an equality or range on an indexed column, so each page is
+# a seek on one of: IX_orders_tracking_number, IX_orders_user_id_created_at,
+# IX_orders_status_created_at (covering) or IX_orders_created_at, and the
+# matching orders_archive index when the page reaches into the archive.
+ADMIN_ORDER_COLUMNS = (
+    "id, user_id, total_amount, status, tracking_number, created_at, "
+    "paid_at, shipped_at, delivered_at"
+)
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Search all orders (admin only)"""
+    logging.info("Admin get orders function triggered")
+
+    session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
+    is_admin, admin_id = verify_admin(session_token)
+
+    if not is_admin:
+        return func.HttpResponse(
+            json.dumps({"error": "Unauthorized"}),
+            status_code=403,
+            mimetype="application/json",
+        )
+
+    try:
+        page = parse_page_params(req, ORDER_STATUSES)
+    except ValueError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    filters = {}
+
+    if req.params.get("user_id"):
+        try:
+            filters["user_id"] = int(req.params["user_id"])
+        except ValueError:
+            return func.HttpResponse(
+                json.dumps({"error": "user_id must be an integer"}),
+                status_code=400,
+                mimetype="application/json",
+            )
+
+    if req.params.get("tracking_number"):
+        filters["tracking_number"] = req.params["tracking_number"]
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        rows = fetch_history_page(
+            cursor, ADMIN_ORDER_COLUMNS, "orders", page, filters, 5
+        )
+        rows, cursor_token = next_cursor(rows, page["limit"], 5)
+
+        emails = {}
+        user_ids = sorted({row[1] for row in rows})
+        if user_ids:
+            cursor.execute(
+                f"SELECT id, email FROM shopusers WHERE id IN ({', '.join('?' * len(user_ids))})",
+                user_ids,
+            )
+            emails = dict(cursor.fetchall())
+
+        conn.close()
+
+        orders = [
+            {
+                "id": row[0],
+                "user_id": row[1],
+                "user_email": emails.get(row[1]),
+                "total_amount": float(row[2]),
+                "status": row[3],
+                "tracking_number": row[4],
+                "created_at": row[5].isoformat() if row[5] else None,
+                "paid_at": row[6].isoformat() if row[6] else None,
+                "shipped_at": row[7].isoformat() if row[7] else None,
+                "delivered_at": row[8].isoformat() if row[8] else None,
+            }
+            for row in rows
+        ]
+
+        return func.HttpResponse(
+            json.dumps({"orders": orders, "next_cursor": cursor_token}),
+            status_code=200,
+            mimetype="application/json",
+        )
+
+    except Exception as e:
+        logging.error(f"Admin get orders error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Internal server error"}),
+            status_code=500,
+            mimetype="application/json",
+        )
@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection, verify_admin
+from shared.pagination import parse_date_range
+from shared.sales_rollup import ROLLUP_NAME
+
+DEFAULT_STATS_DAYS = 30
+MAX_STATS_ROWS = 1000
+
+# Each grouping reads one rollup table; none of them touch orders or
+# transactions. "day" rows are ordered by date, the others by revenue.
+STATS_QUERIES = {
+    "day": """
+        SELECT TOP (?) sales_date, orders, units, revenue, failed_payments
+        FROM sales_daily
+        WHERE sales_date >= ? AND sales_date < ?
+        ORDER BY sales_date
+    """,
+    "product": """
+        SELECT TOP (?) s.product_id, p.name, SUM(s.orders), SUM(s.units),
+               SUM(s.revenue), SUM(s.failed_payments)
+        FROM sales_daily_product s
+        LEFT JOIN products p ON p.id = s.product_id
+        WHERE s.sales_date >= ? AND s.sales_date < ?
+        GROUP BY s.product_id, p.name
+        ORDER BY SUM(s.revenue) DESC, s.product_id
+    """,
+    "category": """
+        SELECT TOP (?) category, SUM(orders), SUM(units), SUM(revenue),
+               SUM(failed_payments)
+        FROM sales_daily_category
+        WHERE sales_date >= ? AND sales_date < ?
+        GROUP BY category
+        ORDER BY SUM(revenue) DESC, category
+    """,
+}
+
+TOTALS_QUERY = """
+    SELECT COALESCE(SUM(orders), 0), COALESCE(SUM(units), 0),
+           COALESCE(SUM(revenue), 0), COALESCE(SUM(failed_payments), 0)
+    FROM sales_daily
+    WHERE sales_date >= ? AND sales_date < ?
+"""
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Get sales totals by day, product or category (admin only)"""
+    logging.info("Admin sales stats function triggered")
+
+    session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
+    is_admin, user_id = verify_admin(session_token)
+
+    if not is_admin:
+        return func.HttpResponse(
+            json.dumps({"error": "Unauthorized"}),
+            status_code=403,
+            mimetype="application/json",
+        )
+
+    group = req.params.get("group", "day")
+
+    try:
+        date_from, date_to = parse_date_range(req)
+        limit = int(req.params.get("limit", MAX_STATS_ROWS))
+
+        if group not in STATS_QUERIES:
+            raise ValueError("group must be one of: day, product, category")
+        if limit < 1 or limit > MAX_STATS_ROWS:
+            raise ValueError(f"limit must be between 1 and {MAX_STATS_ROWS}")
+    except ValueError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    # Rollups are by whole day, so the range is too
+    date_to = (date_to or datetime.utcnow() + timedelta(days=1)).date()
+    date_from = (
+        date_from.date() if date_from else date_to - timedelta(days=DEFAULT_STATS_DAYS)
+    )
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(STATS_QUERIES[group], (limit, date_from, date_to))
+        rows = [_row_to_dict(group, row) for row in cursor.fetchall()]
+
+        cursor.execute(TOTALS_QUERY, (date_from, date_to))
+        totals = _measures(cursor.fetchone())
+
+        cursor.execute(
+            "SELECT high_water_mark FROM rollup_state WHERE name = ?", (ROLLUP_NAME,)
+        )
+        state = cursor.fetchone()
+
+        conn.close()
+
+        return func.HttpResponse(
+            json.dumps(
+                {
+                    "group": group,
+                    "from": date_from.isoformat(),
+                    "to": (date_to - timedelta(days=1)).isoformat(),
+                    # Sales after this time are not in the rollups yet
+                    "as_of": state[0].isoformat() if state else None,
+                    "rows": rows,
+                    "totals": totals,
+                }
+            ),
+            status_code=200,
+            mimetype="application/json",
+        )
+
+    except Exception as e:
+        logging.error(f"Admin sales stats error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Internal server error"}),
+            status_code=500,
+            mimetype="application/json",
+        )
+
+
+def _measures(values):
+    orders, units, revenue, failed_payments = values
+    return {
+        "orders": int(orders),
+        "units": int(units),
+        "revenue": float(revenue),
+        "failed_payments": int(failed_payments),
+    }
+
+
+def _row_to_dict(group, row):
+    if group == "day":
+        return {"date": row[0].isoformat(), **_measures(row[1:])}
+    if group == "product":
+        return {"product_id": row[0], "name": row[1], **_measures(row[2:])}
+    return {"category": row[0], **_measures(row[1:])}
@@ -0,0 +1,104 @@
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.archive import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_STATE_NAME,
+    ARCHIVE_STATUSES,
+)
+from shared.db_utils import get_db_connection
+
+ORDER_COLUMNS = (
+    "id, user_id, total_amount, status, shipping_address, tracking_number, "
+    "created_at, paid_at, shipped_at, delivered_at"
+)
+ORDER_ITEM_COLUMNS = "id, order_id, product_id, quantity, price_at_purchase"
+TRANSACTION_COLUMNS = (
+    "id, order_id, user_id, amount, payment_method, status, transaction_id, "
+    "created_at, status_changed_at"
+)
+ORDER_EVENT_COLUMNS = "id, order_id, user_id, event_type, status, details, created_at"
+
+# Moves one batch of finished orders, with their items and transactions, in
+# one transaction. READPAST skips orders another request has locked; they go
+# in a later batch. Deleting the order cascades to order_items and
+# order_events, which are copied first.
+ARCHIVE_BATCH = f"""
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @batch TABLE (id INT PRIMARY KEY);
+
+    INSERT INTO @batch (id)
+    SELECT TOP (?) id
+    FROM orders WITH (UPDLOCK, READPAST)
+    WHERE status IN ({', '.join('?' * len(ARCHIVE_STATUSES))}) AND created_at < ?;
+
+    INSERT INTO orders_archive ({ORDER_COLUMNS})
+    SELECT {ORDER_COLUMNS} FROM orders WHERE id IN (SELECT id FROM @batch);
+
+    INSERT INTO order_items_archive ({ORDER_ITEM_COLUMNS})
+    SELECT {ORDER_ITEM_COLUMNS} FROM order_items WHERE order_id IN (SELECT id FROM @batch);
+
+    INSERT INTO transactions_archive ({TRANSACTION_COLUMNS})
+    SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE order_id IN (SELECT id FROM @batch);
+
+    INSERT INTO order_events_archive ({ORDER_EVENT_COLUMNS})
+    SELECT {ORDER_EVENT_COLUMNS} FROM order_events WHERE order_id IN (SELECT id FROM @batch);
+
+    DELETE FROM transactions WHERE order_id IN (SELECT id FROM @batch);
+    DELETE FROM orders WHERE id IN (SELECT id FROM @batch);
+
+    SELECT COUNT(*) FROM @batch;
+"""
+
+
+def main(timer: func.TimerRequest) -> None:
+    """Move finished orders older than ARCHIVE_AFTER_DAYS to the archive tables (daily)"""
+    logging.info("Archive orders function triggered")
+
+    cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # Publish the horizon before moving anything, so readers know to
+        # look in the archive for anything older
+        cursor.execute(
+            """
+            MERGE rollup_state AS t
+            USING (SELECT ? AS name, ? AS cutoff) AS s ON t.name = s.name
+            WHEN MATCHED AND t.high_water_mark < s.cutoff THEN
+                UPDATE SET high_water_mark = s.cutoff, updated_at = SYSUTCDATETIME()
+            WHEN NOT MATCHED THEN
+                INSERT (name, high_water_mark, updated_at)
+                VALUES (s.name, s.cutoff, SYSUTCDATETIME());
+            """,
+            (ARCHIVE_STATE_NAME, cutoff),
+        )
+        conn.commit()
+
+        archived = 0
+        while True:
+            cursor.execute(
+                ARCHIVE_BATCH, (ARCHIVE_BATCH_SIZE, *ARCHIVE_STATUSES, cutoff)
+            )
+            batch = cursor.fetchone()[0]
+            conn.commit()
+            archived += batch
+            if batch < ARCHIVE_BATCH_SIZE:
+                break
+
+        conn.close()
+        logging.info(f"Archived {archived} orders created before {cutoff.isoformat()}")
+
+    except Exception as e:
+        logging.error(f"Archive orders error: {str(e)}")
+        raise
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection, verify_admin
+from shared.order_utils import ORDER_STATUSES
+
+MAX_BULK_UPDATES = int(os.getenv("MAX_BULK_STATUS_UPDATES", "5000"))
+BULK_UPDATE_BATCH_SIZE = int(os.getenv("BULK_STATUS_BATCH_SIZE", "1000"))
+# orders.id is an INT IDENTITY; anything outside this range would make the
+# whole table-valued parameter fail to bind
+MAX_ORDER_ID = 2**31 - 1
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Update the status of many orders at once (admin only)"""
+    logging.info("Bulk update order status function triggered")
+
+    session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
+    is_admin, user_id = verify_admin(session_token)
+
+    if not is_admin:
+        return func.HttpResponse(
+            json.dumps({"error": "Unauthorized"}),
+            status_code=403,
+            mimetype="application/json",
+        )
+
+    try:
+        req_body = req.get_json()
+    except ValueError:
+        return func.HttpResponse(
+            json.dumps({"error": "Invalid JSON"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    updates = req_body.get("updates") if isinstance(req_body, dict) else req_body
+
+    if not isinstance(updates, list) or not updates:
+        return func.HttpResponse(
+            json.dumps({"error": "updates must be a non-empty list"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    if len(updates) > MAX_BULK_UPDATES:
+        return func.HttpResponse(
+            json.dumps({"error": f"At most {MAX_BULK_UPDATES} updates per request"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    rows, results = validate_updates(updates)
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # One procedure call (one UPDATE statement) and commit per batch
+        for start in range(0, len(rows), BULK_UPDATE_BATCH_SIZE):
+            batch = rows[start : start + BULK_UPDATE_BATCH_SIZE]
+            cursor.execute("{CALL bulk_update_order_status (?)}", (batch,))
+            for order_id, outcome, previous_status, status in cursor.fetchall():
+                results[order_id].update(
+                    {
+                        "outcome": outcome,
+                        "previous_status": previous_status,
+                        "status": status,
+                    }
+                )
+            conn.commit()
+
+        conn.close()
+
+        outcomes = {}
+        for result in results.values():
+            outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+
+        logging.info(f"Bulk order status update: {outcomes}")
+        return func.HttpResponse(
+            json.dumps({"summary": outcomes, "results": list(results.values())}),
+            status_code=200,
+            mimetype="application/json",
+        )
+
+    except Exception as e:
+        logging.error(f"Bulk update order status error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Internal server error"}),
+            status_code=500,
+            mimetype="application/json",
+        )
+
+
+def validate_updates(updates):
+    """Check each requested update.
+
+    Returns (rows, results): rows are (order_id, status, tracking_number)
+    tuples for the table-valued parameter, with '' for "unchanged"; results
+    maps each order ID, or position for unusable entries, to its outcome.
+    """
+    rows = []
+    results = {}
+
+    for index, update in enumerate(updates):
+        if not isinstance(update, dict):
+            results[f"#{index}"] = {
+                "index": index,
+                "outcome": "invalid",
+                "error": "Each update must be an object",
+            }
+            continue
+
+        order_id = update.get("order_id")
+        status = update.get("status") or ""
+        tracking_number = update.get("tracking_number") or ""
+        result = {"order_id": order_id}
+
+        if not isinstance(order_id, int) or isinstance(order_id, bool):
+            result.update(outcome="invalid", error="order_id must be an integer")
+            results[f"#{index}"] = result
+        elif not 1 <= order_id <= MAX_ORDER_ID:
+            result.update(
+                outcome="invalid",
+                error=f"order_id must be between 1 and {MAX_ORDER_ID}",
+            )
+            results[f"#{index}"] = result
+        elif order_id in results:
+            result.update(outcome="invalid", error="Duplicate order_id")
+            results[f"#{index}"] = result
+        elif status and status not in ORDER_STATUSES:
+            result.update(
+                outcome="invalid",
+                error=f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}",
+            )
+            results[order_id] = result
+        elif not isinstance(tracking_number, str) or len(tracking_number) > 100:
+            result.update(
+                outcome="invalid",
+                error="tracking_number must be a string of at most 100 characters",
+            )
+            results[order_id] = result
+        else:
+            results[order_id] = result
+            rows.append((order_id, status, tracking_number))
+
+    return rows, results
@@ -2,12 +2,13 @@ import json
 import logging
 import os
 import sys
-from datetime import datetime
 
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from shared.db_utils import get_db_connection, verify_session
+from shared.idempotency import run_idempotent
+from shared.order_utils import create_order_from_cart
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -24,6 +25,11 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
+    return run_idempotent(req, user_id, "checkout", lambda: create_order(req, user_id))
+
+
+def create_order(req: func.HttpRequest, user_id) -> func.HttpResponse:
+    """Create a pending order from the user's cart"""
     try:
         req_body = req.get_json()
     except ValueError:
@@ -44,79 +50,34 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            SELECT c.product_id, c.quantity, p.price, p.stock_quantity, p.name
-            FROM cart_items c
-            JOIN products p ON c.product_id = p.id
-            WHERE c.user_id = ?
-            """,
-            (user_id,),
-        )
-        cart_items = cursor.fetchall()
+        order, shortfall = create_order_from_cart(conn, user_id, shipping_address)
+        conn.close()
 
-        if not cart_items:
-            conn.close()
+        if shortfall:
             return func.HttpResponse(
-                json.dumps({"error": "Cart is empty"}),
-                status_code=400,
+                json.dumps(
+                    {
+                        "error": "Insufficient stock for "
+                        + ", ".join(
+                            f"{item['name']} (available: {item['available']})"
+                            for item in shortfall
+                        ),
+                        "insufficient_stock": shortfall,
+                    }
+                ),
+                status_code=409,
                 mimetype="application/json",
             )
 
-        total_amount = 0
-        order_items = []
-        for item in cart_items:
-            product_id, quantity, price, stock, name = item
-            if stock < quantity:
-                conn.close()
-                return func.HttpResponse(
-                    json.dumps(
-                        {"error": f"Insufficient stock for {name}. Available: {stock}"}
-                    ),
-                    status_code=400,
-                    mimetype="application/json",
-                )
-            item_total = float(price) * quantity
-            total_amount += item_total
-            order_items.append(
-                {
-                    "product_id": product_id,
-                    "quantity": quantity,
-                    "price": float(price),
-                }
-            )
-
-        cursor.execute(
-            """
-            INSERT INTO orders (user_id, total_amount, status, shipping_address, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (user_id, total_amount, "pending", shipping_address, datetime.utcnow()),
-        )
-        conn.commit()
-
-        order_id = cursor.execute("SELECT @@IDENTITY").fetchone()[0]
-
-        for item in order_items:
-            cursor.execute(
-                """
-                INSERT INTO order_items (order_id, product_id, quantity, price_at_purchase)
-                VALUES (?, ?, ?, ?)
-                """,
-                (order_id, item["product_id"], item["quantity"], item["price"]),
-            )
-
-            cursor.execute(
-                "UPDATE products SET stock_quantity = stock_quantity - ? WHERE id = ?",
-                (item["quantity"], item["product_id"]),
+        if not order:
+            return func.HttpResponse(
+                json.dumps({"error": "Cart is empty"}),
+                status_code=400,
+                mimetype="application/json",
             )
 
-        cursor.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
-
-        conn.commit()
-        conn.close()
+        order_id = order["order_id"]
+        total_amount = order["total_amount"]
 
         logging.info(f"Order {order_id} created for user {user_id}")
         return func.HttpResponse(
@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection, verify_session
+from shared.idempotency import run_idempotent
+from shared.order_utils import create_order_from_cart
+from shared.payment_gateway import GatewayError
+from shared.payment_utils import (
+    VALID_PAYMENT_METHODS,
+    authorize_payment,
+    record_payment,
+)
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Convert cart to order and pay for it in one request"""
+    logging.info("Checkout and pay function triggered")
+
+    session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
+    user_id = verify_session(session_token)
+
+    if not user_id:
+        return func.HttpResponse(
+            json.dumps({"error": "Unauthorized"}),
+            status_code=401,
+            mimetype="application/json",
+        )
+
+    return run_idempotent(
+        req, user_id, "checkout-pay", lambda: checkout_and_pay(req, user_id)
+    )
+
+
+def checkout_and_pay(req: func.HttpRequest, user_id) -> func.HttpResponse:
+    """Create the order and charge it in a single DB transaction.
+
+    A declined payment still commits the pending order and the failed
+    transaction, matching the two-step flow, so the order can be retried.
+    """
+    try:
+        req_body = req.get_json()
+    except ValueError:
+        return func.HttpResponse(
+            json.dumps({"error": "Invalid JSON"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    shipping_address = req_body.get("shipping_address")
+    payment_method = req_body.get("payment_method", "credit_card")
+
+    if not shipping_address:
+        return func.HttpResponse(
+            json.dumps({"error": "Shipping address is required"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    if payment_method not in VALID_PAYMENT_METHODS:
+        return func.HttpResponse(
+            json.dumps(
+                {
+                    "error": f"Invalid payment method. Must be one of: {', '.join(VALID_PAYMENT_METHODS)}"
+                }
+            ),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    try:
+        conn = get_db_connection()
+        order, shortfall = create_order_from_cart(
+            conn, user_id, shipping_address, commit=False
+        )
+
+        if shortfall:
+            conn.close()
+            return func.HttpResponse(
+                json.dumps(
+                    {
+                        "error": "Insufficient stock for "
+                        + ", ".join(
+                            f"{item['name']} (available: {item['available']})"
+                            for item in shortfall
+                        ),
+                        "insufficient_stock": shortfall,
+                    }
+                ),
+                status_code=409,
+                mimetype="application/json",
+            )
+
+        if not order:
+            conn.close()
+            return func.HttpResponse(
+                json.dumps({"error": "Cart is empty"}),
+                status_code=400,
+                mimetype="application/json",
+            )
+
+        order_id = order["order_id"]
+        total_amount = order["total_amount"]
+
+        try:
+            payment_successful = authorize_payment(total_amount, payment_method)
+        except GatewayError as e:
+            conn.rollback()
+            conn.close()
+            logging.warning(f"Payment gateway error for order {order_id}: {str(e)}")
+            return func.HttpResponse(
+                json.dumps({"error": "Payment gateway unavailable, please retry"}),
+                status_code=503,
+                mimetype="application/json",
+            )
+
+        transaction_id = record_payment(
+            conn.cursor(),
+            order_id,
+            user_id,
+            total_amount,
+            payment_method,
+            payment_successful,
+        )
+        conn.commit()
+        conn.close()
+
+        result = {
+            "success": payment_successful,
+            "order": {
+                "order_id": order_id,
+                "total_amount": total_amount,
+                "status": "paid" if payment_successful else "pending",
+            },
+            "transaction": {
+                "transaction_id": transaction_id,
+                "amount": total_amount,
+                "payment_method": payment_method,
+                "status": "completed" if payment_successful else "failed",
+            },
+        }
+
+        if not payment_successful:
+            result["error"] = (
+                "Payment declined. Please try again or use a different payment method."
+            )
+            return func.HttpResponse(
+                json.dumps(result),
+                status_code=402,
+                mimetype="application/json",
+            )
+
+        logging.info(f"Order {order_id} created and paid for user {user_id}")
+        return func.HttpResponse(
+            json.dumps(result),
+            status_code=201,
+            mimetype="application/json",
+        )
+
+    except Exception as e:
+        logging.error(f"Checkout and pay error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Internal server error"}),
+            status_code=500,
+            mimetype="application/json",
+        )
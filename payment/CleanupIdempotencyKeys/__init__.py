@@ -0,0 +1,39 @@
+import logging
+import os
+import sys
+from datetime import datetime
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection
+
+BATCH_SIZE = 5000
+
+
+def main(timer: func.TimerRequest) -> None:
+    """Purge expired idempotency keys (hourly)"""
+    logging.info("Cleanup idempotency keys function triggered")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        deleted = 0
+        while True:
+            cursor.execute(
+                "DELETE TOP (?) FROM idempotency_keys WHERE expires_at < ?",
+                (BATCH_SIZE, datetime.utcnow()),
+            )
+            batch = cursor.rowcount
+            conn.commit()
+            deleted += batch
+            if batch < BATCH_SIZE:
+                break
+
+        conn.close()
+        logging.info(f"Deleted {deleted} expired idempotency keys")
+
+    except Exception as e:
+        logging.error(f"Cleanup idempotency keys error: {str(e)}")
+        raise
@@ -0,0 +1,55 @@
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection
+from shared.order_utils import expire_pending_orders, fail_stale_payments
+
+PENDING_ORDER_TTL_MINUTES = int(os.getenv("PENDING_ORDER_TTL_MINUTES", "60"))
+# Queued payments still pending after this long are failed; the queue gives
+# up on a message within a couple of minutes, so this only catches lost ones
+PENDING_PAYMENT_TIMEOUT_MINUTES = int(
+    os.getenv("PENDING_PAYMENT_TIMEOUT_MINUTES", "30")
+)
+BATCH_SIZE = int(os.getenv("PENDING_EXPIRY_BATCH_SIZE", "500"))
+
+
+def main(timer: func.TimerRequest) -> None:
+    """Cancel unpaid orders older than PENDING_ORDER_TTL_MINUTES and release their stock (every 5 minutes)"""
+    logging.info("Expire pending orders function triggered")
+
+    now = datetime.utcnow()
+    cutoff = now - timedelta(minutes=PENDING_ORDER_TTL_MINUTES)
+    payment_cutoff = now - timedelta(minutes=PENDING_PAYMENT_TIMEOUT_MINUTES)
+
+    try:
+        conn = get_db_connection()
+
+        # First, so orders whose payment was lost can expire in this run
+        stale_payments = 0
+        while True:
+            batch = fail_stale_payments(conn, payment_cutoff, BATCH_SIZE)
+            stale_payments += batch
+            if batch < BATCH_SIZE:
+                break
+
+        expired = 0
+        while True:
+            batch = expire_pending_orders(conn, cutoff, BATCH_SIZE)
+            expired += batch
+            if batch < BATCH_SIZE:
+                break
+
+        conn.close()
+        logging.info(
+            f"Failed {stale_payments} stale queued payments; expired {expired} "
+            f"pending orders created before {cutoff.isoformat()}"
+        )
+
+    except Exception as e:
+        logging.error(f"Expire pending orders error: {str(e)}")
+        raise
@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection, verify_admin
+from shared.pagination import decode_cursor, encode_cursor, parse_date_range
+from shared.payment_utils import TRANSACTION_STATUSES
+
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "5000"))
+# The Python worker buffers the whole response body, so an export is served
+# in parts of at most this many rows/bytes, each ending with a resume cursor
+EXPORT_MAX_ROWS = int(os.getenv("EXPORT_MAX_ROWS", "200000"))
+EXPORT_MAX_BYTES = int(os.getenv("EXPORT_MAX_MB", "20")) * 1024 * 1024
+
+EXPORT_COLUMNS = [
+    "id",
+    "transaction_id",
+    "order_id",
+    "user_id",
+    "amount",
+    "payment_method",
+    "status",
+    "created_at",
+]
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Export transactions in a date range as CSV or NDJSON (admin only)"""
+    logging.info("Export transactions function triggered")
+
+    session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
+    is_admin, user_id = verify_admin(session_token)
+
+    if not is_admin:
+        return func.HttpResponse(
+            json.dumps({"error": "Unauthorized"}),
+            status_code=403,
+            mimetype="application/json",
+        )
+
+    export_format = req.params.get("format", "csv")
+    status = req.params.get("status")
+    cursor_param = req.params.get("cursor")
+
+    try:
+        date_from, date_to = parse_date_range(req)
+        after = decode_cursor(cursor_param) if cursor_param else None
+
+        if not date_from or not date_to:
+            raise ValueError("from and to are required")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError("format must be csv or ndjson")
+        if status and status not in TRANSACTION_STATUSES:
+            raise ValueError(
+                f"Invalid status. Must be one of: {', '.join(TRANSACTION_STATUSES)}"
+            )
+    except ValueError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    # Archived transactions are included; both tables are range-scanned on
+    # their (created_at, id) covering index
+    query = f"""
+        SELECT TOP (?) {', '.join(EXPORT_COLUMNS)}
+        FROM (
+            SELECT {', '.join(EXPORT_COLUMNS)} FROM transactions
+            UNION ALL
+            SELECT {', '.join(EXPORT_COLUMNS)} FROM transactions_archive
+        ) t
+        WHERE created_at >= ? AND created_at < ?
+    """
+    params = [EXPORT_MAX_ROWS, date_from, date_to]
+
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+
+    if after:
+        query += " AND (created_at > ? OR (created_at = ? AND id > ?))"
+        params.extend([after[0], after[0], after[1]])
+
+    query += " ORDER BY created_at, id"
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+
+        body, next_cursor = write_export(cursor, export_format, header=not after)
+
+        cursor.close()
+        conn.close()
+
+        headers = {
+            "Content-Disposition": (
+                f"attachment; filename=transactions-{date_from.date()}.{export_format}"
+            )
+        }
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+
+        return func.HttpResponse(
+            body,
+            status_code=200,
+            headers=headers,
+            mimetype=EXPORT_FORMATS[export_format],
+        )
+
+    except Exception as e:
+        logging.error(f"Export transactions error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Internal server error"}),
+            status_code=500,
+            mimetype="application/json",
+        )
+
+
+def write_export(cursor, export_format, header):
+    """Encode rows from the cursor in fetchmany batches.
+
+    Stops after the batch that reaches EXPORT_MAX_ROWS or EXPORT_MAX_BYTES.
+    Returns (body bytes, cursor to resume from, or None when the range is
+    exhausted).
+    """
+    out = io.BytesIO()
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text) if export_format == "csv" else None
+
+    if writer and header:
+        writer.writerow(EXPORT_COLUMNS)
+
+    exported = 0
+
+    while True:
+        rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+        if not rows:
+            return _finish(text, out), None
+
+        for row in rows:
+            if writer:
+                writer.writerow([*row[:7], row[7].isoformat() if row[7] else None])
+            else:
+                text.write(json.dumps(_row_to_dict(row)) + "\n")
+
+        text.flush()
+        exported += len(rows)
+
+        if exported >= EXPORT_MAX_ROWS or out.tell() >= EXPORT_MAX_BYTES:
+            # Any rows not yet fetched are discarded when the cursor closes
+            last = rows[-1]
+            return _finish(text, out), encode_cursor(last[7], last[0])
+
+
+def _row_to_dict(row):
+    record = dict(zip(EXPORT_COLUMNS, row))
+    record["amount"] = float(record["amount"])
+    record["created_at"] = row[7].isoformat() if row[7] else None
+    return record
+
+
+def _finish(text, out):
+    text.flush()
+    return out.getvalue()
@@ -7,14 +7,52 @@ from decimal import Decimal
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.archive import ARCHIVE_TABLES
 from shared.db_utils import get_db_connection, verify_session
+from shared.order_utils import build_status_history
+
+INCLUDE_OPTIONS = {"tracking", "transactions"}
+
+# Order, items and (optionally) transactions in one round trip. The items
+# and transactions queries repeat the ownership check so nothing leaks for
+# another user's order id. Table names are filled in from HOT_TABLES or
+# ARCHIVE_TABLES.
+ORDER_QUERY = """
+    SET NOCOUNT ON;
+
+    SELECT id, total_amount, status, shipping_address, tracking_number,
+           created_at, paid_at, shipped_at, delivered_at
+    FROM {orders}
+    WHERE id = ? AND user_id = ?;
+
+    SELECT oi.id, oi.product_id, oi.quantity, oi.price_at_purchase,
+           p.name, p.image_url
+    FROM {order_items} oi
+    JOIN {orders} o ON o.id = oi.order_id AND o.user_id = ?
+    LEFT JOIN products p ON oi.product_id = p.id
+    WHERE oi.order_id = ?;
+"""
+
+TRANSACTIONS_QUERY = """
+    SELECT id, amount, payment_method, status, transaction_id, created_at
+    FROM {transactions}
+    WHERE order_id = ? AND user_id = ?
+    ORDER BY created_at DESC, id DESC;
+"""
+
+HOT_TABLES = {table: table for table in ARCHIVE_TABLES}
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
-    """Get order details with items."""
+    """Get order details with items, optionally with tracking and transactions."""
     logging.info("Get order function triggered")
 
     order_id = req.route_params.get("id")
+    include = {
+        part.strip()
+        for part in req.params.get("include", "").split(",")
+        if part.strip()
+    }
 
     session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
     user_id = verify_session(session_token)
@@ -26,43 +64,50 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
+    if include - INCLUDE_OPTIONS:
+        return func.HttpResponse(
+            json.dumps(
+                {
+                    "error": f"Invalid include. Must be any of: {', '.join(sorted(INCLUDE_OPTIONS))}"
+                }
+            ),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    # Tracking reports the latest payment attempt, so it needs transactions too
+    with_transactions = bool(include)
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
-            """
-            SELECT id, total_amount, status, shipping_address, tracking_number,
-                   created_at, paid_at, shipped_at, delivered_at
-            FROM orders
-            WHERE id = ? AND user_id = ?
-            """,
-            (order_id, user_id),
-        )
-        order = cursor.fetchone()
+        query = ORDER_QUERY
+        params = [order_id, user_id, user_id, order_id]
+        if with_transactions:
+            query += TRANSACTIONS_QUERY
+            params.extend([order_id, user_id])
+
+        # Finished orders past ARCHIVE_AFTER_DAYS live in the archive tables
+        for tables in (HOT_TABLES, ARCHIVE_TABLES):
+            cursor.execute(query.format(**tables), params)
+            order = cursor.fetchone()
+            items = cursor.fetchall() if cursor.nextset() else []
+            transactions = (
+                cursor.fetchall() if with_transactions and cursor.nextset() else []
+            )
+            if order:
+                break
+
+        conn.close()
 
         if not order:
-            conn.close()
             return func.HttpResponse(
                 json.dumps({"error": "Order not found"}),
                 status_code=404,
                 mimetype="application/json",
             )
 
-        cursor.execute(
-            """
-            SELECT oi.id, oi.product_id, oi.quantity, oi.price_at_purchase,
-                   p.name, p.image_url
-            FROM order_items oi
-            LEFT JOIN products p ON oi.product_id = p.id
-            WHERE oi.order_id = ?
-            """,
-            (order_id,),
-        )
-        items = cursor.fetchall()
-
-        conn.close()
-
         order_dict = {
             "id": order[0],
             "total_amount": float(order[1])
@@ -102,6 +147,45 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
         order_dict["items"] = items_list
 
+        transactions_list = [
+            {
+                "id": row[0],
+                "order_id": order[0],
+                "amount": float(row[1]),
+                "payment_method": row[2],
+                "status": row[3],
+                "transaction_id": row[4],
+                "created_at": row[5].isoformat() if row[5] else None,
+            }
+            for row in transactions
+        ]
+
+        if "transactions" in include:
+            order_dict["transactions"] = transactions_list
+
+        if "tracking" in include:
+            latest = transactions_list[0] if transactions_list else None
+            order_dict["tracking"] = {
+                "order_id": order[0],
+                "status": order[2],
+                "tracking_number": order[4],
+                "created_at": order_dict["created_at"],
+                "paid_at": order_dict["paid_at"],
+                "shipped_at": order_dict["shipped_at"],
+                "delivered_at": order_dict["delivered_at"],
+                "payment": (
+                    {
+                        "transaction_id": latest["transaction_id"],
+                        "status": latest["status"],
+                    }
+                    if latest
+                    else None
+                ),
+                "status_history": build_status_history(
+                    order[5], order[6], order[7], order[8]
+                ),
+            }
+
         return func.HttpResponse(
             json.dumps(order_dict),
             status_code=200,
@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection, verify_session
+
+DEFAULT_EVENT_LIMIT = 100
+MAX_EVENT_LIMIT = 500
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Get the caller's order events newer than a cursor"""
+    logging.info("Get order events function triggered")
+
+    session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
+    user_id = verify_session(session_token)
+
+    if not user_id:
+        return func.HttpResponse(
+            json.dumps({"error": "Unauthorized"}),
+            status_code=401,
+            mimetype="application/json",
+        )
+
+    try:
+        since = int(req.params.get("since", "0"))
+        limit = int(req.params.get("limit", DEFAULT_EVENT_LIMIT))
+    except ValueError:
+        return func.HttpResponse(
+            json.dumps({"error": "since and limit must be integers"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    if since < 0 or limit < 1 or limit > MAX_EVENT_LIMIT:
+        return func.HttpResponse(
+            json.dumps(
+                {
+                    "error": f"since must be >= 0 and limit between 1 and {MAX_EVENT_LIMIT}"
+                }
+            ),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # The cursor is the event's rowversion. Events at or above
+        # MIN_ACTIVE_ROWVERSION() may belong to transactions that have not
+        # committed yet; holding them back means an event that commits late
+        # can never land behind a cursor a client already has.
+        cursor.execute(
+            """
+            SELECT TOP (?) CONVERT(BIGINT, version), id, order_id, event_type, status, details, created_at
+            FROM order_events
+            WHERE user_id = ?
+              AND version > CONVERT(BINARY(8), CAST(? AS BIGINT))
+              AND version < MIN_ACTIVE_ROWVERSION()
+            ORDER BY version
+            """,
+            (limit, user_id, since),
+        )
+        rows = cursor.fetchall()
+
+        conn.close()
+
+        events = [
+            {
+                "id": row[1],
+                "order_id": row[2],
+                "event_type": row[3],
+                "status": row[4],
+                "details": json.loads(row[5]) if row[5] else None,
+                "created_at": row[6].isoformat() if row[6] else None,
+            }
+            for row in rows
+        ]
+
+        return func.HttpResponse(
+            json.dumps(
+                {
+                    "events": events,
+                    "next_cursor": str(rows[-1][0]) if rows else str(since),
+                    "has_more": len(rows) == limit,
+                }
+            ),
+            status_code=200,
+            mimetype="application/json",
+        )
+
+    except Exception as e:
+        logging.error(f"Get order events error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Internal server error"}),
+            status_code=500,
+            mimetype="application/json",
+        )
@@ -6,7 +6,10 @@ import sys
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.archive import fetch_history_page
 from shared.db_utils import get_db_connection, verify_session
+from shared.order_utils import ORDER_STATUSES
+from shared.pagination import next_cursor, parse_page_params
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -23,23 +26,31 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
+    try:
+        page = parse_page_params(req, ORDER_STATUSES)
+    except ValueError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
-            """
-            SELECT id, total_amount, status, shipping_address, tracking_number,
-                   created_at, paid_at, shipped_at, delivered_at
-            FROM orders
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            """,
-            (user_id,),
+        rows = fetch_history_page(
+            cursor,
+            "id, total_amount, status, shipping_address, tracking_number, created_at, paid_at, shipped_at, delivered_at",
+            "orders",
+            page,
+            {"user_id": user_id},
+            5,
         )
+        rows, cursor_token = next_cursor(rows, page["limit"], 5)
 
         orders = []
-        for row in cursor.fetchall():
+        for row in rows:
             orders.append(
                 {
                     "id": row[0],
@@ -57,7 +68,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         conn.close()
 
         return func.HttpResponse(
-            json.dumps({"orders": orders}),
+            json.dumps({"orders": orders, "next_cursor": cursor_token}),
             status_code=200,
             mimetype="application/json",
         )
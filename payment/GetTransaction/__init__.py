@@ -34,8 +34,12 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             SELECT id, order_id, amount, payment_method, status, transaction_id, created_at
             FROM transactions
             WHERE id = ? AND user_id = ?
+            UNION ALL
+            SELECT id, order_id, amount, payment_method, status, transaction_id, created_at
+            FROM transactions_archive
+            WHERE id = ? AND user_id = ?
             """,
-            (transaction_id, user_id),
+            (transaction_id, user_id, transaction_id, user_id),
         )
 
         transaction = cursor.fetchone()
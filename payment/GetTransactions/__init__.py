@@ -6,7 +6,10 @@ import sys
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.archive import fetch_history_page
 from shared.db_utils import get_db_connection, verify_session
+from shared.payment_utils import TRANSACTION_STATUSES
+from shared.pagination import next_cursor, parse_page_params
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -23,22 +26,31 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
+    try:
+        page = parse_page_params(req, TRANSACTION_STATUSES)
+    except ValueError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
-            """
-            SELECT id, order_id, amount, payment_method, status, transaction_id, created_at
-            FROM transactions
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            """,
-            (user_id,),
+        rows = fetch_history_page(
+            cursor,
+            "id, order_id, amount, payment_method, status, transaction_id, created_at",
+            "transactions",
+            page,
+            {"user_id": user_id},
+            6,
         )
+        rows, cursor_token = next_cursor(rows, page["limit"], 6)
 
         transactions = []
-        for row in cursor.fetchall():
+        for row in rows:
             transactions.append(
                 {
                     "id": row[0],
@@ -54,7 +66,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         conn.close()
 
         return func.HttpResponse(
-            json.dumps({"transactions": transactions}),
+            json.dumps({"transactions": transactions, "next_cursor": cursor_token}),
             status_code=200,
             mimetype="application/json",
         )
@@ -1,20 +1,25 @@
 import json
 import logging
 import os
-import random
 import sys
-import uuid
-from datetime import datetime
 
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from shared.db_utils import get_db_connection, verify_session
+from shared.idempotency import run_idempotent
+from shared.payment_gateway import GatewayError
+from shared.payment_queue import enqueue_payment
+from shared.payment_utils import (
+    VALID_PAYMENT_METHODS,
+    authorize_payment,
+    find_pending_transaction,
+    record_payment,
+    record_pending_payment,
+)
 
-
-def generate_transaction_id():
-    """Generate a unique transaction ID"""
-    return f"TXN-{uuid.uuid4().hex[:12].upper()}"
+# "async" queues payments by default; clients can also opt in per request
+PAYMENT_PROCESSING_MODE = os.getenv("PAYMENT_PROCESSING_MODE", "sync")
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -31,6 +36,13 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
+    return run_idempotent(
+        req, user_id, "process-payment", lambda: process_payment(req, user_id)
+    )
+
+
+def process_payment(req: func.HttpRequest, user_id) -> func.HttpResponse:
+    """Charge an order and record the transaction"""
     try:
         req_body = req.get_json()
     except ValueError:
@@ -43,6 +55,14 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     order_id = req_body.get("order_id")
     amount = req_body.get("amount")
     payment_method = req_body.get("payment_method", "credit_card")
+    async_mode = req_body.get("async", PAYMENT_PROCESSING_MODE == "async")
+
+    if not isinstance(async_mode, bool):
+        return func.HttpResponse(
+            json.dumps({"error": "async must be true or false"}),
+            status_code=400,
+            mimetype="application/json",
+        )
 
     if not order_id or not amount:
         return func.HttpResponse(
@@ -51,12 +71,11 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
-    valid_methods = ["credit_card", "debit_card", "paypal", "apple_pay", "google_pay"]
-    if payment_method not in valid_methods:
+    if payment_method not in VALID_PAYMENT_METHODS:
         return func.HttpResponse(
             json.dumps(
                 {
-                    "error": f"Invalid payment method. Must be one of: {', '.join(valid_methods)}"
+                    "error": f"Invalid payment method. Must be one of: {', '.join(VALID_PAYMENT_METHODS)}"
                 }
             ),
             status_code=400,
@@ -67,13 +86,15 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         conn = get_db_connection()
         cursor = conn.cursor()
 
+        # Lock the order row so concurrent payments for it are serialized
         cursor.execute(
-            "SELECT id, total_amount, status FROM orders WHERE id = ? AND user_id = ?",
+            "SELECT id, total_amount, status FROM orders WITH (UPDLOCK) WHERE id = ? AND user_id = ?",
             (order_id, user_id),
         )
         order = cursor.fetchone()
 
         if not order:
+            conn.rollback()
             conn.close()
             return func.HttpResponse(
                 json.dumps({"error": "Order not found"}),
@@ -84,42 +105,72 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         order_id_db, total_amount, order_status = order
 
         if order_status == "paid":
+            conn.rollback()
+            conn.close()
             return func.HttpResponse(
                 json.dumps({"error": "Order is already paid"}),
                 status_code=400,
                 mimetype="application/json",
             )
 
+        # Expired orders have been cancelled and their stock released
+        if order_status != "pending":
+            conn.rollback()
+            conn.close()
+            return func.HttpResponse(
+                json.dumps({"error": f"Order is {order_status}"}),
+                status_code=409,
+                mimetype="application/json",
+            )
+
         if abs(float(amount) - float(total_amount)) > 0.01:
+            conn.rollback()
+            conn.close()
             return func.HttpResponse(
                 json.dumps({"error": "Amount does not match order total"}),
                 status_code=400,
                 mimetype="application/json",
             )
 
-        transaction_id = generate_transaction_id()
-
-        payment_successful = random.random() < 0.95
-
-        if not payment_successful:
-            cursor.execute(
-                """
-                INSERT INTO transactions (order_id, user_id, amount, payment_method, status, transaction_id, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    order_id,
-                    user_id,
-                    amount,
-                    payment_method,
-                    "failed",
-                    transaction_id,
-                    datetime.utcnow(),
+        # A queued charge for this order may not have run yet; charging
+        # again here (sync or async) would bill the customer twice
+        pending_transaction_id = find_pending_transaction(cursor, order_id)
+        if pending_transaction_id:
+            conn.rollback()
+            conn.close()
+            return func.HttpResponse(
+                json.dumps(
+                    {
+                        "error": "A payment for this order is already being processed",
+                        "transaction_id": pending_transaction_id,
+                    }
                 ),
+                status_code=409,
+                mimetype="application/json",
             )
-            conn.commit()
+
+        if async_mode:
+            return queue_payment(conn, order_id, user_id, amount, payment_method)
+
+        try:
+            payment_successful = authorize_payment(amount, payment_method)
+        except GatewayError as e:
+            conn.rollback()
             conn.close()
+            logging.warning(f"Payment gateway error for order {order_id}: {str(e)}")
+            return func.HttpResponse(
+                json.dumps({"error": "Payment gateway unavailable, please retry"}),
+                status_code=503,
+                mimetype="application/json",
+            )
+
+        transaction_id = record_payment(
+            cursor, order_id, user_id, amount, payment_method, payment_successful
+        )
+        conn.commit()
+        conn.close()
 
+        if not payment_successful:
             return func.HttpResponse(
                 json.dumps(
                     {
@@ -132,30 +183,6 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json",
             )
 
-        cursor.execute(
-            """
-            INSERT INTO transactions (order_id, user_id, amount, payment_method, status, transaction_id, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                order_id,
-                user_id,
-                amount,
-                payment_method,
-                "completed",
-                transaction_id,
-                datetime.utcnow(),
-            ),
-        )
-
-        cursor.execute(
-            "UPDATE orders SET status = ?, paid_at = ? WHERE id = ?",
-            ("paid", datetime.utcnow(), order_id),
-        )
-
-        conn.commit()
-        conn.close()
-
         logging.info(f"Payment processed successfully for order {order_id}")
         return func.HttpResponse(
             json.dumps(
@@ -179,3 +206,56 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             status_code=500,
             mimetype="application/json",
         )
+
+
+def queue_payment(conn, order_id, user_id, amount, payment_method):
+    """Record a pending transaction and hand it to the payment queue.
+
+    The caller holds the order lock and has checked there is no pending
+    transaction for the order already.
+    """
+    cursor = conn.cursor()
+
+    transaction_id = record_pending_payment(
+        cursor, order_id, user_id, amount, payment_method
+    )
+    conn.commit()
+
+    try:
+        enqueue_payment(transaction_id)
+    except Exception as e:
+        logging.error(f"Failed to queue payment {transaction_id}: {str(e)}")
+        cursor.execute(
+            """
+            UPDATE transactions SET status = 'failed', status_changed_at = SYSUTCDATETIME()
+            WHERE transaction_id = ? AND status = 'pending'
+            """,
+            (transaction_id,),
+        )
+        conn.commit()
+        conn.close()
+        return func.HttpResponse(
+            json.dumps({"error": "Payment service unavailable, please retry"}),
+            status_code=503,
+            mimetype="application/json",
+        )
+
+    conn.close()
+
+    logging.info(f"Payment {transaction_id} queued for order {order_id}")
+    return func.HttpResponse(
+        json.dumps(
+            {
+                "success": True,
+                "status": "pending",
+                "transaction_id": transaction_id,
+                "order_id": int(order_id),
+                "amount": float(amount),
+                "payment_method": payment_method,
+                "status_url": f"/api/orders/{int(order_id)}/track",
+                "message": "Payment accepted for processing",
+            }
+        ),
+        status_code=202,
+        mimetype="application/json",
+    )
@@ -0,0 +1,21 @@
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.payment_queue import handle_poison_message
+
+
+def main(msg: func.QueueMessage) -> None:
+    """Fail payments whose queue message ran out of retries"""
+    logging.info("Process payment poison function triggered")
+
+    try:
+        handle_poison_message(
+            msg.get_body().decode("utf-8"), "payment queue retries exhausted"
+        )
+    except Exception as e:
+        logging.error(f"Process payment poison error: {str(e)}")
+        raise
@@ -0,0 +1,21 @@
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.payment_queue import handle_payment_message
+
+
+def main(msg: func.QueueMessage) -> None:
+    """Process a queued payment request"""
+    logging.info(
+        f"Process payment queue function triggered (dequeue {msg.dequeue_count})"
+    )
+
+    try:
+        handle_payment_message(msg.get_body().decode("utf-8"))
+    except Exception as e:
+        logging.error(f"Process payment queue error: {str(e)}")
+        raise
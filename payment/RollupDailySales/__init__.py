@@ -0,0 +1,24 @@
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import get_db_connection
+from shared.sales_rollup import run_rollup
+
+
+def main(timer: func.TimerRequest) -> None:
+    """Fold new orders and failed payments into the daily sales rollups (every 15 minutes)"""
+    logging.info("Rollup daily sales function triggered")
+
+    try:
+        conn = get_db_connection()
+        processed = run_rollup(conn)
+        conn.close()
+        logging.info(f"Daily sales rollup processed {processed} paid order lines")
+
+    except Exception as e:
+        logging.error(f"Rollup daily sales error: {str(e)}")
+        raise
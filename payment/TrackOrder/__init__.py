@@ -7,6 +7,7 @@ import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from shared.db_utils import get_db_connection, verify_session
+from shared.order_utils import build_status_history
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -31,11 +32,29 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
         cursor.execute(
             """
-            SELECT id, status, tracking_number, created_at, paid_at, shipped_at, delivered_at
-            FROM orders
-            WHERE id = ? AND user_id = ?
+            SELECT o.id, o.status, o.tracking_number, o.created_at, o.paid_at, o.shipped_at, o.delivered_at,
+                   t.transaction_id, t.status
+            FROM orders o
+            OUTER APPLY (
+                SELECT TOP 1 transaction_id, status
+                FROM transactions
+                WHERE order_id = o.id
+                ORDER BY created_at DESC, id DESC
+            ) t
+            WHERE o.id = ? AND o.user_id = ?
+            UNION ALL
+            SELECT o.id, o.status, o.tracking_number, o.created_at, o.paid_at, o.shipped_at, o.delivered_at,
+                   t.transaction_id, t.status
+            FROM orders_archive o
+            OUTER APPLY (
+                SELECT TOP 1 transaction_id, status
+                FROM transactions_archive
+                WHERE order_id = o.id
+                ORDER BY created_at DESC, id DESC
+            ) t
+            WHERE o.id = ? AND o.user_id = ?
             """,
-            (order_id, user_id),
+            (order_id, user_id, order_id, user_id),
         )
 
         order = cursor.fetchone()
@@ -58,25 +77,15 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             "paid_at": order[4].isoformat() if order[4] else None,
             "shipped_at": order[5].isoformat() if order[5] else None,
             "delivered_at": order[6].isoformat() if order[6] else None,
+            # Latest payment attempt; "pending" while it is still queued
+            "payment": (
+                {"transaction_id": order[7], "status": order[8]} if order[7] else None
+            ),
         }
 
-        status_history = []
-        if order[3]:
-            status_history.append(
-                {"status": "pending", "timestamp": order[3].isoformat()}
-            )
-        if order[4]:
-            status_history.append({"status": "paid", "timestamp": order[4].isoformat()})
-        if order[5]:
-            status_history.append(
-                {"status": "shipped", "timestamp": order[5].isoformat()}
-            )
-        if order[6]:
-            status_history.append(
-                {"status": "delivered", "timestamp": order[6].isoformat()}
-            )
-
-        tracking["status_history"] = status_history
+        tracking["status_history"] = build_status_history(
+            order[3], order[4], order[5], order[6]
+        )
 
         return func.HttpResponse(
             json.dumps({"tracking": tracking}),
@@ -8,6 +8,7 @@ import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from shared.db_utils import get_db_connection, verify_admin
+from shared.order_utils import record_order_event
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -96,6 +97,16 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         query = f"UPDATE orders SET {', '.join(update_fields)} WHERE id = ?"
 
         cursor.execute(query, tuple(params))
+
+        details = {"previous_status": order[1]}
+        if tracking_number:
+            details["tracking_number"] = tracking_number
+        record_order_event(
+            cursor,
+            order_id,
+            "status_changed" if status else "tracking_updated",
+            details=details,
+        )
         conn.commit()
         conn.close()
 
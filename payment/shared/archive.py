@@ -0,0 +1,64 @@
+import os
+
+from shared.pagination import keyset_query
+
+ARCHIVE_STATE_NAME = "order_archive"
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_STATUSES = ("delivered", "cancelled")
+
+ARCHIVE_TABLES = {
+    "orders": "orders_archive",
+    "order_items": "order_items_archive",
+    "transactions": "transactions_archive",
+}
+
+
+def read_archive_horizon(cursor):
+    """Return the newest cutoff the archival job has used, or None.
+
+    Every archived order (and its transactions) was created before it.
+    """
+    cursor.execute(
+        "SELECT high_water_mark FROM rollup_state WHERE name = ?",
+        (ARCHIVE_STATE_NAME,),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def fetch_history_page(cursor, columns, table, page, filters, created_at_index):
+    """Fetch one keyset page from a table and, when needed, its archive.
+
+    The archive is only read when the hot page is short or reaches back
+    past the archive horizon; otherwise no archived row can belong on it.
+    Rows are matched on their first column (id), so one moved to the
+    archive mid-page appears once. Returns up to limit + 1 rows, newest
+    first, for next_cursor.
+    """
+    sql, params = keyset_query(columns, table, page, filters)
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+
+    limit = page["limit"]
+    if len(rows) > limit:
+        horizon = read_archive_horizon(cursor)
+        if horizon is None or rows[limit - 1][created_at_index] >= horizon:
+            return rows
+
+    sql, params = keyset_query(columns, ARCHIVE_TABLES[table], page, filters)
+    cursor.execute(sql, params)
+    archived = cursor.fetchall()
+    if not archived:
+        return rows
+
+    # An order archived between the two queries is returned by both
+    unique = {row[0]: row for row in archived}
+    unique.update((row[0], row) for row in rows)
+
+    merged = sorted(
+        unique.values(),
+        key=lambda row: (row[created_at_index], row[0]),
+        reverse=True,
+    )
+    return merged[: limit + 1]
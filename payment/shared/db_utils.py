@@ -4,6 +4,8 @@ from datetime import datetime
 
 import pyodbc
 
+from shared.session_tokens import is_signed_token, verify_signed_token
+
 
 def get_db_connection():
     """Create database connection using pyodbc"""
@@ -21,11 +23,19 @@ def get_db_connection():
 
 
 def verify_session(session_token):
-    """Verify session and return user_id"""
+    """Verify session and return user_id.
+
+    Accepts both signed tokens (checked locally) and opaque tokens from the
+    sessions table.
+    """
     if not session_token:
         return None
 
     try:
+        if is_signed_token(session_token):
+            claims = verify_signed_token(session_token, get_db_connection)
+            return claims["user_id"] if claims else None
+
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -53,6 +63,10 @@ def verify_admin(session_token):
         return False, None
 
     try:
+        if is_signed_token(session_token):
+            claims = verify_signed_token(session_token, get_db_connection)
+            return (claims["is_admin"], claims["user_id"]) if claims else (False, None)
+
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import azure.functions as func
+import pyodbc
+
+from shared.db_utils import get_db_connection
+
+IDEMPOTENCY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+# How long an in-flight request holds its key before a retry may take over.
+# Longer than functionTimeout in host.json, so a handler that is still
+# running always keeps its claim.
+IDEMPOTENCY_LOCK = timedelta(
+    seconds=float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "360"))
+)
+# How long a concurrent duplicate waits for the in-flight result
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "15"))
+POLL_INTERVAL_SECONDS = 0.2
+MAX_KEY_LENGTH = 100
+
+
+def _error(message, status_code):
+    return func.HttpResponse(
+        json.dumps({"error": message}),
+        status_code=status_code,
+        mimetype="application/json",
+    )
+
+
+def _claim(cursor, user_id, endpoint, key, request_hash, owner):
+    """Try to become the owner of a key. Returns True on success."""
+    now = datetime.utcnow()
+    try:
+        cursor.execute(
+            """
+            INSERT INTO idempotency_keys
+                (user_id, endpoint, idempotency_key, request_hash, status, locked_until, owner, expires_at)
+            VALUES (?, ?, ?, ?, 'in_progress', ?, ?, ?)
+            """,
+            (
+                user_id,
+                endpoint,
+                key,
+                request_hash,
+                now + IDEMPOTENCY_LOCK,
+                owner,
+                now + IDEMPOTENCY_TTL,
+            ),
+        )
+        cursor.connection.commit()
+        return True
+    except pyodbc.IntegrityError:
+        cursor.connection.rollback()
+
+    # Take over keys that have expired or whose owner died mid-request
+    cursor.execute(
+        """
+        UPDATE idempotency_keys
+        SET request_hash = ?, status = 'in_progress', response_status = NULL,
+            response_body = NULL, locked_until = ?, owner = ?, expires_at = ?
+        WHERE user_id = ? AND endpoint = ? AND idempotency_key = ?
+          AND (expires_at < ? OR (status = 'in_progress' AND locked_until < ?))
+        """,
+        (
+            request_hash,
+            now + IDEMPOTENCY_LOCK,
+            owner,
+            now + IDEMPOTENCY_TTL,
+            user_id,
+            endpoint,
+            key,
+            now,
+            now,
+        ),
+    )
+    claimed = cursor.rowcount == 1
+    cursor.connection.commit()
+    return claimed
+
+
+def run_idempotent(req, user_id, endpoint, handler):
+    """Run handler() at most once per Idempotency-Key.
+
+    Without the header, handler() simply runs. With it, the first request
+    stores its response; later requests with the same key get that
+    response back (marked Idempotent-Replayed) without re-executing, and
+    duplicates that arrive while the first is still running wait for its
+    result. 5xx responses are not stored, so those can be retried.
+    The response is only stored (or the key released) while this request
+    still owns the key, so a takeover's result is never clobbered.
+    """
+    key = req.headers.get("Idempotency-Key")
+    if not key:
+        return handler()
+
+    if len(key) > MAX_KEY_LENGTH:
+        return _error(
+            f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters", 400
+        )
+
+    request_hash = hashlib.sha256(req.get_body() or b"").hexdigest()
+    owner = str(uuid.uuid4())
+    conn = None
+
+    try:
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+        except Exception as e:
+            logging.warning(f"Idempotency store unavailable for {endpoint}: {str(e)}")
+            return _error("Idempotency store unavailable, please retry", 503)
+
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while not _claim(cursor, user_id, endpoint, key, request_hash, owner):
+            cursor.execute(
+                """
+                SELECT request_hash, status, response_status, response_body
+                FROM idempotency_keys
+                WHERE user_id = ? AND endpoint = ? AND idempotency_key = ?
+                """,
+                (user_id, endpoint, key),
+            )
+            row = cursor.fetchone()
+            conn.commit()
+
+            if row and row[0] != request_hash:
+                return _error(
+                    "Idempotency-Key was already used with a different request", 422
+                )
+
+            if row and row[1] == "completed":
+                logging.info(f"Replaying {endpoint} response for key {key}")
+                return func.HttpResponse(
+                    row[3],
+                    status_code=row[2],
+                    mimetype="application/json",
+                    headers={"Idempotent-Replayed": "true"},
+                )
+
+            if time.monotonic() >= deadline:
+                return _error("A request with this Idempotency-Key is in progress", 409)
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+        response = handler()
+
+        if response.status_code >= 500:
+            cursor.execute(
+                """
+                DELETE FROM idempotency_keys
+                WHERE user_id = ? AND endpoint = ? AND idempotency_key = ?
+                  AND owner = ?
+                """,
+                (user_id, endpoint, key, owner),
+            )
+        else:
+            cursor.execute(
+                """
+                UPDATE idempotency_keys
+                SET status = 'completed', response_status = ?, response_body = ?
+                WHERE user_id = ? AND endpoint = ? AND idempotency_key = ?
+                  AND owner = ?
+                """,
+                (
+                    response.status_code,
+                    response.get_body().decode("utf-8"),
+                    user_id,
+                    endpoint,
+                    key,
+                    owner,
+                ),
+            )
+        if cursor.rowcount == 0:
+            logging.warning(f"Lost {endpoint} idempotency key {key} to another request")
+        conn.commit()
+        return response
+    finally:
+        if conn is not None:
+            conn.close()
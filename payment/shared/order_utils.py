@@ -0,0 +1,257 @@
+import json
+import logging
+import time
+from datetime import datetime
+
+import pyodbc
+
+DEADLOCK_RETRIES = 3
+
+ORDER_STATUSES = ["pending", "paid", "processing", "shipped", "delivered", "cancelled"]
+
+# Reserves stock, creates the order and its items, and clears the cart in
+# one round trip. The cart is read once, under UPDLOCK, into @cart so a
+# concurrent cart edit can neither slip in between the reservation and the
+# item insert nor leave the two disagreeing. The stock decrement is
+# conditional per line, so concurrent checkouts can never take a product
+# below zero. Result sets:
+#   1. cart lines that could not be reserved (empty on success)
+#   2. the created order (empty on shortfall or an empty cart)
+CREATE_ORDER_BATCH = """
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @cart TABLE (product_id INT PRIMARY KEY, quantity INT);
+    DECLARE @reserved TABLE (product_id INT PRIMARY KEY);
+    DECLARE @created TABLE (id INT, total_amount DECIMAL(10, 2));
+
+    INSERT INTO @cart (product_id, quantity)
+    SELECT product_id, quantity FROM cart_items WITH (UPDLOCK) WHERE user_id = ?;
+
+    UPDATE p
+    SET p.stock_quantity = p.stock_quantity - c.quantity
+    OUTPUT INSERTED.id INTO @reserved
+    FROM products p
+    JOIN @cart c ON c.product_id = p.id
+    WHERE p.stock_quantity >= c.quantity;
+
+    SELECT c.product_id, p.name, c.quantity, p.stock_quantity
+    FROM @cart c
+    JOIN products p ON c.product_id = p.id
+    WHERE c.product_id NOT IN (SELECT product_id FROM @reserved);
+
+    IF @@ROWCOUNT = 0
+    BEGIN
+        INSERT INTO orders (user_id, total_amount, status, shipping_address, created_at)
+        OUTPUT INSERTED.id, INSERTED.total_amount INTO @created
+        SELECT ?, SUM(p.price * c.quantity), 'pending', ?, ?
+        FROM @cart c
+        JOIN products p ON c.product_id = p.id
+        HAVING COUNT(*) > 0;
+
+        DECLARE @order_id INT = (SELECT id FROM @created);
+
+        INSERT INTO order_events (order_id, user_id, event_type, status)
+        SELECT id, user_id, 'created', status FROM orders WHERE id = @order_id;
+
+        INSERT INTO order_items (order_id, product_id, quantity, price_at_purchase)
+        SELECT @order_id, c.product_id, c.quantity, p.price
+        FROM @cart c
+        JOIN products p ON c.product_id = p.id
+        WHERE @order_id IS NOT NULL;
+
+        DELETE ci
+        FROM cart_items ci
+        JOIN @cart c ON c.product_id = ci.product_id
+        WHERE ci.user_id = ? AND @order_id IS NOT NULL;
+    END
+
+    SELECT id, total_amount FROM @created;
+"""
+
+
+def _is_deadlock(error):
+    """SQLSTATE 40001: chosen as deadlock victim"""
+    return bool(error.args) and error.args[0] == "40001"
+
+
+def create_order_from_cart(conn, user_id, shipping_address, commit=True):
+    """Turn the user's cart into a pending order in one transaction.
+
+    Returns (order, shortfall). On success order is {"order_id",
+    "total_amount"} and the transaction is committed, unless commit is
+    False, in which case the caller owns the open transaction. If any line cannot
+    be reserved, nothing is changed, order is None and shortfall lists
+    {"product_id", "name", "requested", "available"} per line. Both are
+    empty/None for an empty cart. Deadlock victims are retried.
+    """
+    cursor = conn.cursor()
+
+    for attempt in range(DEADLOCK_RETRIES + 1):
+        try:
+            cursor.execute(
+                CREATE_ORDER_BATCH,
+                (
+                    user_id,
+                    user_id,
+                    shipping_address,
+                    datetime.utcnow(),
+                    user_id,
+                ),
+            )
+
+            shortfall = [
+                {
+                    "product_id": row[0],
+                    "name": row[1],
+                    "requested": row[2],
+                    "available": row[3],
+                }
+                for row in cursor.fetchall()
+            ]
+            created = cursor.fetchone() if cursor.nextset() else None
+            break
+        except pyodbc.Error as e:
+            conn.rollback()
+            if not _is_deadlock(e) or attempt == DEADLOCK_RETRIES:
+                raise
+            logging.warning(f"Checkout deadlock for user {user_id}, retrying")
+            time.sleep(0.05 * (attempt + 1))
+
+    if shortfall or not created:
+        conn.rollback()
+        return None, shortfall
+
+    if commit:
+        conn.commit()
+    return {"order_id": int(created[0]), "total_amount": float(created[1])}, []
+
+
+def build_status_history(created_at, paid_at, shipped_at, delivered_at):
+    """List the status changes an order has gone through, oldest first"""
+    steps = [
+        ("pending", created_at),
+        ("paid", paid_at),
+        ("shipped", shipped_at),
+        ("delivered", delivered_at),
+    ]
+    return [
+        {"status": status, "timestamp": timestamp.isoformat()}
+        for status, timestamp in steps
+        if timestamp
+    ]
+
+
+def record_order_event(cursor, order_id, event_type, details=None):
+    """Append an event to the order's change feed. Does not commit.
+
+    Call after updating the order: the event records its current status.
+    """
+    cursor.execute(
+        """
+        INSERT INTO order_events (order_id, user_id, event_type, status, details)
+        SELECT id, user_id, ?, status, ?
+        FROM orders WHERE id = ?
+        """,
+        (event_type, json.dumps(details) if details else None, order_id),
+    )
+
+
+# Cancels one batch of expired pending orders and puts their stock back,
+# in one transaction. READPAST skips orders that ProcessPayment (or anything
+# else) has locked, and orders with a queued payment are left for the
+# payment worker, so nothing is cancelled while it is being paid for.
+EXPIRE_PENDING_BATCH = """
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @expired TABLE (id INT PRIMARY KEY);
+
+    UPDATE TOP (?) o
+    SET status = 'cancelled'
+    OUTPUT INSERTED.id INTO @expired
+    FROM orders o WITH (READPAST)
+    WHERE o.status = 'pending' AND o.created_at < ?
+      AND NOT EXISTS (
+          SELECT 1 FROM transactions t
+          WHERE t.order_id = o.id AND t.status = 'pending'
+      );
+
+    UPDATE p
+    SET p.stock_quantity = p.stock_quantity + released.quantity
+    FROM products p
+    JOIN (
+        SELECT oi.product_id, SUM(oi.quantity) AS quantity
+        FROM order_items oi
+        JOIN @expired e ON e.id = oi.order_id
+        GROUP BY oi.product_id
+    ) released ON released.product_id = p.id;
+
+    INSERT INTO order_events (order_id, user_id, event_type, status, details)
+    SELECT o.id, o.user_id, 'status_changed', o.status,
+           '{"previous_status": "pending", "reason": "expired"}'
+    FROM orders o
+    JOIN @expired e ON e.id = o.id;
+
+    SELECT COUNT(*) FROM @expired;
+"""
+
+
+def expire_pending_orders(conn, cutoff, batch_size):
+    """Cancel up to batch_size pending orders created before cutoff.
+
+    Restores their reserved stock and commits. Returns the number of
+    orders cancelled. Deadlock victims (e.g. against a checkout reserving
+    the same products) are retried.
+    """
+    cursor = conn.cursor()
+
+    for attempt in range(DEADLOCK_RETRIES + 1):
+        try:
+            cursor.execute(EXPIRE_PENDING_BATCH, (batch_size, cutoff))
+            expired = cursor.fetchone()[0]
+            conn.commit()
+            return expired
+        except pyodbc.Error as e:
+            conn.rollback()
+            if not _is_deadlock(e) or attempt == DEADLOCK_RETRIES:
+                raise
+            logging.warning("Pending order expiry deadlock, retrying")
+            time.sleep(0.05 * (attempt + 1))
+
+
+# Fails one batch of queued payments that have been pending too long (their
+# message was lost or gave up), so the order can be paid again or expired.
+# READPAST skips transactions the payment worker is charging right now.
+FAIL_STALE_PAYMENTS_BATCH = """
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @failed TABLE (order_id INT, transaction_id NVARCHAR(100));
+
+    UPDATE TOP (?) t
+    SET status = 'failed', status_changed_at = SYSUTCDATETIME()
+    OUTPUT INSERTED.order_id, INSERTED.transaction_id INTO @failed
+    FROM transactions t WITH (READPAST)
+    WHERE t.status = 'pending' AND t.created_at < ?;
+
+    INSERT INTO order_events (order_id, user_id, event_type, status, details)
+    SELECT o.id, o.user_id, 'payment_failed', o.status,
+           '{"transaction_id": "' + f.transaction_id + '", "reason": "timed out in queue"}'
+    FROM orders o
+    JOIN @failed f ON f.order_id = o.id;
+
+    SELECT COUNT(*) FROM @failed;
+"""
+
+
+def fail_stale_payments(conn, cutoff, batch_size):
+    """Fail up to batch_size pending transactions created before cutoff.
+
+    Commits. Returns the number of transactions failed.
+    """
+    cursor = conn.cursor()
+    cursor.execute(FAIL_STALE_PAYMENTS_BATCH, (batch_size, cutoff))
+    failed = cursor.fetchone()[0]
+    conn.commit()
+    return failed
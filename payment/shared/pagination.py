@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at, row_id):
+    """Encode the (created_at, id) of the last row on a page"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} date, expected YYYY-MM-DD")
+
+
+def parse_date_range(req):
+    """Read the from and to query parameters as (date_from, date_to).
+
+    Either may be None. A bare date for "to" includes that whole day, so
+    date_to is exclusive. Raises ValueError if a date is malformed.
+    """
+    date_from = req.params.get("from")
+    date_to = req.params.get("to")
+
+    start = _parse_date(date_from, "from") if date_from else None
+    end = _parse_date(date_to, "to") if date_to else None
+
+    if date_to and len(date_to) == 10:
+        end += timedelta(days=1)
+
+    return start, end
+
+
+def parse_page_params(req, valid_statuses):
+    """Read limit, cursor, status, from and to from the query string.
+
+    Returns a dict of filters for keyset_query. Raises ValueError with a
+    message suitable for a 400 response.
+    """
+    try:
+        limit = int(req.params.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    status = req.params.get("status")
+    if status and status not in valid_statuses:
+        raise ValueError(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
+
+    date_from, date_to = parse_date_range(req)
+    cursor = req.params.get("cursor")
+
+    return {
+        "limit": limit,
+        "status": status,
+        "date_from": date_from,
+        "date_to": date_to,
+        "after": decode_cursor(cursor) if cursor else None,
+    }
+
+
+def keyset_query(columns, table, page, filters):
+    """Build a query for one page, newest first, keyed on (created_at, id).
+
+    filters maps column names to values that must match exactly. Fetches
+    one row more than the limit so the caller can tell whether another
+    page follows. Returns (sql, params).
+    """
+    conditions = []
+    params = [page["limit"] + 1]
+
+    for column, value in filters.items():
+        conditions.append(f"{column} = ?")
+        params.append(value)
+
+    if page["status"]:
+        conditions.append("status = ?")
+        params.append(page["status"])
+
+    if page["date_from"]:
+        conditions.append("created_at >= ?")
+        params.append(page["date_from"])
+
+    if page["date_to"]:
+        conditions.append("created_at < ?")
+        params.append(page["date_to"])
+
+    if page["after"]:
+        created_at, row_id = page["after"]
+        conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+        params.extend([created_at, created_at, row_id])
+
+    sql = f"SELECT TOP (?) {columns} FROM {table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY created_at DESC, id DESC"
+    return sql, params
+
+
+def next_cursor(rows, limit, created_at_index, id_index=0):
+    """Trim the extra row and return (rows, cursor for the next page or None)"""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[created_at_index], last[id_index])
@@ -0,0 +1,166 @@
+import importlib
+import logging
+import math
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# "simulator", or "package.module:ClassName" for any class with authorize()
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "simulator")
+
+
+class GatewayError(Exception):
+    """The gateway could not give an answer; the charge outcome is unknown"""
+
+
+class GatewayTimeout(GatewayError):
+    """The gateway did not answer within the timeout"""
+
+
+class GatewayBusy(GatewayError):
+    """No gateway connection became free in time"""
+
+
+class PaymentGateway(ABC):
+    """Interface for payment gateways"""
+
+    @abstractmethod
+    def authorize(self, amount, payment_method):
+        """Charge `amount`. Returns True if approved, False if declined.
+
+        Raises GatewayError when the outcome is unknown.
+        """
+
+
+def parse_latency(spec):
+    """Parse a latency spec into a sampler returning seconds.
+
+    Specs are in milliseconds:
+        fixed:50
+        uniform:20:200
+        normal:100:25          (mean, stddev; clipped at 0)
+        lognormal:80:0.6       (median, sigma; long right tail)
+        exponential:100        (mean)
+    """
+    kind, _, args = spec.partition(":")
+    params = [float(p) / 1000 for p in args.split(":")] if args else []
+
+    if kind == "fixed" and len(params) == 1:
+        return lambda rng: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "normal" and len(params) == 2:
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal" and len(params) == 2:
+        # sigma is dimensionless, undo the ms -> s scaling
+        mu, sigma = math.log(params[0]), params[1] * 1000
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    if kind == "exponential" and len(params) == 1:
+        return lambda rng: rng.expovariate(1 / params[0]) if params[0] else 0.0
+
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+class SimulatedGateway(PaymentGateway):
+    """Gateway stand-in with configurable latency, failures and concurrency.
+
+    Given the same seed and call order, a run makes the same decisions, so
+    benchmark runs can be reproduced.
+    """
+
+    def __init__(
+        self,
+        approval_rate=0.95,
+        latency="fixed:0",
+        timeout_rate=0.0,
+        timeout_seconds=10.0,
+        max_concurrency=0,
+        acquire_timeout=5.0,
+        seed=None,
+    ):
+        self.approval_rate = approval_rate
+        self.sample_latency = parse_latency(latency)
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.acquire_timeout = acquire_timeout
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._slots = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv("PAYMENT_GATEWAY_SEED")
+        return cls(
+            approval_rate=float(os.getenv("PAYMENT_GATEWAY_APPROVAL_RATE", "0.95")),
+            latency=os.getenv("PAYMENT_GATEWAY_LATENCY", "fixed:0"),
+            timeout_rate=float(os.getenv("PAYMENT_GATEWAY_TIMEOUT_RATE", "0")),
+            timeout_seconds=float(os.getenv("PAYMENT_GATEWAY_TIMEOUT_SECONDS", "10")),
+            max_concurrency=int(os.getenv("PAYMENT_GATEWAY_MAX_CONCURRENCY", "0")),
+            acquire_timeout=float(os.getenv("PAYMENT_GATEWAY_ACQUIRE_TIMEOUT", "5")),
+            seed=int(seed) if seed else None,
+        )
+
+    def _draw(self):
+        # Draw every random value for a call under one lock so the sequence
+        # of outcomes only depends on the seed and the call order
+        with self._rng_lock:
+            latency = self.sample_latency(self._rng)
+            timed_out = self._rng.random() < self.timeout_rate
+            approved = self._rng.random() < self.approval_rate
+        return latency, timed_out, approved
+
+    def authorize(self, amount, payment_method):
+        latency, timed_out, approved = self._draw()
+
+        if self._slots and not self._slots.acquire(timeout=self.acquire_timeout):
+            raise GatewayBusy("Payment gateway concurrency limit reached")
+
+        try:
+            if timed_out or latency >= self.timeout_seconds:
+                time.sleep(self.timeout_seconds)
+                raise GatewayTimeout(
+                    f"Payment gateway timed out after {self.timeout_seconds}s"
+                )
+            time.sleep(latency)
+            return approved
+        finally:
+            if self._slots:
+                self._slots.release()
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def load_gateway(name):
+    """Build the gateway named by PAYMENT_GATEWAY"""
+    if name == "simulator":
+        return SimulatedGateway.from_env()
+
+    module_name, _, class_name = name.partition(":")
+    gateway_class = getattr(importlib.import_module(module_name), class_name)
+    # A PaymentGateway subclass missing authorize() fails here (TypeError)
+    if hasattr(gateway_class, "from_env"):
+        gateway = gateway_class.from_env()
+    else:
+        gateway = gateway_class()
+
+    if not callable(getattr(gateway, "authorize", None)):
+        raise TypeError(f"Payment gateway {name} has no authorize() method")
+    return gateway
+
+
+def get_payment_gateway():
+    """Get the configured gateway (shared by all requests in the process)"""
+    global _gateway
+
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = load_gateway(PAYMENT_GATEWAY)
+            logging.info(f"Using payment gateway {type(_gateway).__name__}")
+
+    return _gateway
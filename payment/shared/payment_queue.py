@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared.db_utils import get_db_connection
+from shared.payment_utils import complete_pending_payment, fail_pending_payment
+
+PAYMENT_QUEUE_NAME = os.getenv("PAYMENT_QUEUE_NAME", "payment-requests")
+# "azure" sends to the Storage Queue read by ProcessPaymentQueue; "memory"
+# processes messages on a local bounded thread pool (no storage needed).
+PAYMENT_QUEUE_BACKEND = os.getenv("PAYMENT_QUEUE_BACKEND", "azure")
+LOCAL_WORKER_CONCURRENCY = int(os.getenv("PAYMENT_WORKER_CONCURRENCY", "4"))
+# Attempts per message before it is given up on; matches maxDequeueCount in
+# host.json, after which the Storage Queue moves it to the poison queue
+MAX_PAYMENT_ATTEMPTS = 5
+LOCAL_RETRY_BACKOFF_SECONDS = 1.0
+
+_queue_client = None
+_local_executor = None
+_lock = threading.Lock()
+
+
+def _get_queue_client():
+    """Get the shared Storage Queue client, creating the queue if needed"""
+    global _queue_client
+
+    with _lock:
+        if _queue_client is None:
+            from azure.core.exceptions import ResourceExistsError
+            from azure.storage.queue import QueueClient, TextBase64EncodePolicy
+
+            client = QueueClient.from_connection_string(
+                os.environ["AzureWebJobsStorage"],
+                PAYMENT_QUEUE_NAME,
+                # The Functions queue trigger expects base64 messages
+                message_encode_policy=TextBase64EncodePolicy(),
+            )
+            try:
+                client.create_queue()
+            except ResourceExistsError:
+                pass
+            _queue_client = client
+
+    return _queue_client
+
+
+def _get_local_executor():
+    global _local_executor
+
+    with _lock:
+        if _local_executor is None:
+            _local_executor = ThreadPoolExecutor(
+                max_workers=LOCAL_WORKER_CONCURRENCY,
+                thread_name_prefix="payment-worker",
+            )
+
+    return _local_executor
+
+
+def enqueue_payment(transaction_id):
+    """Queue a pending transaction for processing"""
+    body = json.dumps({"transaction_id": transaction_id})
+
+    if PAYMENT_QUEUE_BACKEND == "memory":
+        future = _get_local_executor().submit(_handle_local_message, body)
+        future.add_done_callback(_log_local_failure)
+    else:
+        _get_queue_client().send_message(body)
+
+
+def handle_payment_message(body):
+    """Process one queued payment. Raises on failure so the queue retries."""
+    transaction_id = json.loads(body)["transaction_id"]
+
+    conn = get_db_connection()
+    try:
+        status = complete_pending_payment(conn, transaction_id)
+    finally:
+        conn.close()
+
+    if status is None:
+        logging.info(f"Payment {transaction_id} already processed, skipping")
+    else:
+        logging.info(f"Payment {transaction_id} processed: {status}")
+    return status
+
+
+def handle_poison_message(body, reason):
+    """Fail the transaction of a message that will not be retried again"""
+    transaction_id = json.loads(body)["transaction_id"]
+
+    conn = get_db_connection()
+    try:
+        failed = fail_pending_payment(conn, transaction_id, reason)
+    finally:
+        conn.close()
+
+    if failed:
+        logging.warning(f"Payment {transaction_id} failed: {reason}")
+    return failed
+
+
+def _handle_local_message(body):
+    """Process a message on the local pool, the way the queue trigger would:
+    retried with backoff, then given up on after MAX_PAYMENT_ATTEMPTS."""
+    for attempt in range(1, MAX_PAYMENT_ATTEMPTS + 1):
+        try:
+            return handle_payment_message(body)
+        except Exception as e:
+            logging.warning(f"Queued payment attempt {attempt} failed: {str(e)}")
+            if attempt < MAX_PAYMENT_ATTEMPTS:
+                time.sleep(LOCAL_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+    return handle_poison_message(
+        body, f"not processed after {MAX_PAYMENT_ATTEMPTS} attempts"
+    )
+
+
+def _log_local_failure(future):
+    error = future.exception()
+    if error is not None:
+        # The transaction stays pending; ExpirePendingOrders fails it later
+        logging.error(f"Queued payment could not be processed: {str(error)}")
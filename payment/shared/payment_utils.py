@@ -0,0 +1,221 @@
+import uuid
+from datetime import datetime
+
+from shared.order_utils import record_order_event
+from shared.payment_gateway import get_payment_gateway
+
+VALID_PAYMENT_METHODS = [
+    "credit_card",
+    "debit_card",
+    "paypal",
+    "apple_pay",
+    "google_pay",
+]
+
+TRANSACTION_STATUSES = ["completed", "failed", "pending", "refunded"]
+
+
+def generate_transaction_id():
+    """Generate a unique transaction ID"""
+    return f"TXN-{uuid.uuid4().hex[:12].upper()}"
+
+
+def authorize_payment(amount, payment_method):
+    """Charge through the configured gateway. Returns True if approved.
+
+    Raises GatewayError if the gateway gave no answer.
+    """
+    return get_payment_gateway().authorize(amount, payment_method)
+
+
+def _insert_transaction(cursor, order_id, user_id, amount, payment_method, status):
+    """Insert a transaction row. Returns (transaction_id, created_at)."""
+    transaction_id = generate_transaction_id()
+    now = datetime.utcnow()
+
+    cursor.execute(
+        """
+        INSERT INTO transactions (order_id, user_id, amount, payment_method, status, transaction_id, created_at, status_changed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            order_id,
+            user_id,
+            amount,
+            payment_method,
+            status,
+            transaction_id,
+            now,
+            now,
+        ),
+    )
+    return transaction_id, now
+
+
+def record_payment(cursor, order_id, user_id, amount, payment_method, successful):
+    """Insert the transaction row and, on success, mark the order paid.
+
+    Does not commit. Returns the transaction ID.
+    """
+    transaction_id, now = _insert_transaction(
+        cursor,
+        order_id,
+        user_id,
+        amount,
+        payment_method,
+        "completed" if successful else "failed",
+    )
+
+    if successful:
+        cursor.execute(
+            "UPDATE orders SET status = ?, paid_at = ? WHERE id = ?",
+            ("paid", now, order_id),
+        )
+
+    record_order_event(
+        cursor,
+        order_id,
+        "paid" if successful else "payment_failed",
+        details={"transaction_id": transaction_id},
+    )
+
+    return transaction_id
+
+
+def record_pending_payment(cursor, order_id, user_id, amount, payment_method):
+    """Insert a pending transaction for asynchronous processing.
+
+    Does not commit. Returns the transaction ID.
+    """
+    transaction_id, _ = _insert_transaction(
+        cursor, order_id, user_id, amount, payment_method, "pending"
+    )
+    record_order_event(
+        cursor, order_id, "payment_queued", details={"transaction_id": transaction_id}
+    )
+    return transaction_id
+
+
+def find_pending_transaction(cursor, order_id):
+    """Return the ID of an order's in-flight (pending) transaction, or None"""
+    cursor.execute(
+        "SELECT transaction_id FROM transactions WHERE order_id = ? AND status = 'pending'",
+        (order_id,),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def complete_pending_payment(conn, transaction_id):
+    """Charge a pending transaction and record the outcome.
+
+    Safe to call more than once for the same transaction (queue messages
+    can be delivered twice): only a transaction still in 'pending' is
+    charged. The order row is locked before the gateway is called, the same
+    as ProcessPayment does, and an order that is no longer pending (e.g.
+    cancelled by an admin or by expiry) is not charged: its transaction is
+    marked failed. Returns the final status, or None if there was nothing
+    to do. A GatewayError propagates with the transaction still pending, so
+    the queue retries the message.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT order_id FROM transactions WHERE transaction_id = ?",
+        (transaction_id,),
+    )
+    row = cursor.fetchone()
+    if not row:
+        conn.rollback()
+        return None
+
+    # Order first, then transaction: the same lock order as ProcessPayment
+    cursor.execute(
+        "SELECT status FROM orders WITH (UPDLOCK) WHERE id = ?",
+        (row[0],),
+    )
+    order = cursor.fetchone()
+
+    cursor.execute(
+        """
+        SELECT order_id, amount, payment_method
+        FROM transactions WITH (UPDLOCK)
+        WHERE transaction_id = ? AND status = 'pending'
+        """,
+        (transaction_id,),
+    )
+    pending = cursor.fetchone()
+
+    if not pending:
+        conn.rollback()
+        return None
+
+    order_id, amount, payment_method = pending
+
+    if not order or order[0] != "pending":
+        cursor.execute(
+            "UPDATE transactions SET status = 'failed', status_changed_at = ? WHERE transaction_id = ?",
+            (datetime.utcnow(), transaction_id),
+        )
+        record_order_event(
+            cursor,
+            order_id,
+            "payment_failed",
+            details={
+                "transaction_id": transaction_id,
+                "reason": f"order is {order[0] if order else 'missing'}",
+            },
+        )
+        conn.commit()
+        return "failed"
+
+    successful = authorize_payment(amount, payment_method)
+    status = "completed" if successful else "failed"
+
+    cursor.execute(
+        "UPDATE transactions SET status = ?, status_changed_at = ? WHERE transaction_id = ?",
+        (status, datetime.utcnow(), transaction_id),
+    )
+    if successful:
+        cursor.execute(
+            "UPDATE orders SET status = ?, paid_at = ? WHERE id = ?",
+            ("paid", datetime.utcnow(), order_id),
+        )
+
+    record_order_event(
+        cursor,
+        order_id,
+        "paid" if successful else "payment_failed",
+        details={"transaction_id": transaction_id},
+    )
+    conn.commit()
+    return status
+
+
+def fail_pending_payment(conn, transaction_id, reason):
+    """Give up on a queued payment: mark it failed if it is still pending.
+
+    Used when its queue message can no longer be processed, so the order is
+    not left waiting on it forever (checkout can be retried, and expiry can
+    release its stock). Commits. Returns True if the transaction was failed.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        UPDATE transactions
+        SET status = 'failed', status_changed_at = ?
+        OUTPUT INSERTED.order_id
+        WHERE transaction_id = ? AND status = 'pending'
+        """,
+        (datetime.utcnow(), transaction_id),
+    )
+    row = cursor.fetchone()
+
+    if row:
+        record_order_event(
+            cursor,
+            row[0],
+            "payment_failed",
+            details={"transaction_id": transaction_id, "reason": reason},
+        )
+    conn.commit()
+    return row is not None
@@ -0,0 +1,214 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROLLUP_NAME = "daily_sales"
+# Facts younger than this are left for the next run, so a transaction that
+# commits a little after its timestamp is still picked up
+ROLLUP_LAG_MINUTES = int(os.getenv("ROLLUP_LAG_MINUTES", "5"))
+# Backfills are processed (and committed) one window at a time
+ROLLUP_WINDOW_HOURS = int(os.getenv("ROLLUP_WINDOW_HOURS", "24"))
+ROLLUP_MAX_WINDOWS = int(os.getenv("ROLLUP_MAX_WINDOWS", "31"))
+FETCH_SIZE = 10000
+
+MEASURES = ["orders", "units", "revenue", "failed_payments"]
+
+# rollup table -> key columns
+ROLLUP_TABLES = {
+    "sales_daily": ["sales_date"],
+    "sales_daily_product": ["sales_date", "product_id"],
+    "sales_daily_category": ["sales_date", "category"],
+}
+
+PAID_LINES_QUERY = """
+    SELECT o.id, o.paid_at, oi.product_id, COALESCE(p.category, 'Uncategorized'),
+           oi.quantity, oi.price_at_purchase
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    LEFT JOIN products p ON p.id = oi.product_id
+    WHERE o.paid_at > ? AND o.paid_at <= ?
+"""
+
+# Windowed on when the payment failed, not when the transaction was
+# created: a queued payment is created 'pending' and may only fail after
+# the mark has moved past its created_at
+FAILED_LINES_QUERY = """
+    SELECT t.id, t.status_changed_at, oi.product_id, COALESCE(p.category, 'Uncategorized')
+    FROM transactions t
+    JOIN order_items oi ON oi.order_id = t.order_id
+    LEFT JOIN products p ON p.id = oi.product_id
+    WHERE t.status = 'failed' AND t.status_changed_at > ? AND t.status_changed_at <= ?
+"""
+
+
+def _fetch_frame(cursor, query, params, columns):
+    """Run a query and load the result into a DataFrame in fetchmany batches"""
+    cursor.execute(query, params)
+    frames = []
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        frames.append(pd.DataFrame.from_records(rows, columns=columns))
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def aggregate_window(paid_lines, failed_lines):
+    """Aggregate one window of facts into deltas for each rollup table.
+
+    paid_lines has one row per paid order line (order_id, paid_at,
+    product_id, category, quantity, price); failed_lines one row per line of
+    an order with a failed payment (transaction_id, failed_at, product_id,
+    category). Every order and transaction falls in exactly one window, so
+    distinct counts within a window add up correctly across windows.
+    Returns {table: DataFrame of key columns + MEASURES}.
+    """
+    paid = paid_lines.assign(
+        sales_date=pd.to_datetime(paid_lines["paid_at"]).dt.date,
+        # Whole cents keep revenue exact through the sums
+        revenue_cents=np.rint(paid_lines["price"].astype(float) * 100).astype(np.int64)
+        * paid_lines["quantity"].astype(np.int64),
+    )
+    failed = failed_lines.assign(
+        sales_date=pd.to_datetime(failed_lines["failed_at"]).dt.date
+    )
+
+    deltas = {}
+    for table, keys in ROLLUP_TABLES.items():
+        sales = paid.groupby(keys).agg(
+            orders=("order_id", "nunique"),
+            units=("quantity", "sum"),
+            revenue_cents=("revenue_cents", "sum"),
+        )
+        failures = failed.groupby(keys).agg(
+            failed_payments=("transaction_id", "nunique")
+        )
+
+        delta = sales.join(failures, how="outer").fillna(0).reset_index()
+        for column in ["orders", "units", "revenue_cents", "failed_payments"]:
+            delta[column] = delta[column].astype(np.int64)
+        delta["revenue"] = delta.pop("revenue_cents") / 100
+        deltas[table] = delta[keys + MEASURES]
+
+    return deltas
+
+
+def _merge_delta(cursor, table, keys, delta):
+    """Add a delta into a rollup table with one staged MERGE"""
+    if delta.empty:
+        return
+
+    columns = keys + MEASURES
+    staging = f"#{table}_delta"
+
+    cursor.execute(f"""
+        IF OBJECT_ID('tempdb..{staging}') IS NULL
+            SELECT TOP 0 {', '.join(columns)} INTO {staging} FROM {table};
+        TRUNCATE TABLE {staging};
+        """)
+
+    cursor.fast_executemany = True
+    cursor.executemany(
+        f"INSERT INTO {staging} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        [
+            tuple(value.item() if hasattr(value, "item") else value for value in row)
+            for row in delta.itertuples(index=False, name=None)
+        ],
+    )
+    cursor.fast_executemany = False
+
+    match = " AND ".join(f"t.{key} = s.{key}" for key in keys)
+    updates = ", ".join(f"{m} = t.{m} + s.{m}" for m in MEASURES)
+    cursor.execute(f"""
+        MERGE {table} AS t
+        USING {staging} AS s ON {match}
+        WHEN MATCHED THEN
+            UPDATE SET {updates}, updated_at = SYSUTCDATETIME()
+        WHEN NOT MATCHED THEN
+            INSERT ({', '.join(columns)}, updated_at)
+            VALUES ({', '.join('s.' + c for c in columns)}, SYSUTCDATETIME());
+        """)
+
+
+def _read_high_water_mark(cursor):
+    """Lock and return the rollup's high-water mark, initialising it if new"""
+    cursor.execute(
+        "SELECT high_water_mark FROM rollup_state WITH (UPDLOCK, HOLDLOCK) WHERE name = ?",
+        (ROLLUP_NAME,),
+    )
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+
+    # First run: start just before the oldest fact
+    cursor.execute("""
+        SELECT MIN(d) FROM (
+            SELECT MIN(paid_at) AS d FROM orders
+            UNION ALL
+            SELECT MIN(status_changed_at) FROM transactions WHERE status = 'failed'
+        ) facts
+        """)
+    oldest = cursor.fetchone()[0]
+    start = (oldest or datetime.utcnow()) - timedelta(seconds=1)
+
+    cursor.execute(
+        "INSERT INTO rollup_state (name, high_water_mark, updated_at) VALUES (?, ?, ?)",
+        (ROLLUP_NAME, start, datetime.utcnow()),
+    )
+    return start
+
+
+def run_rollup(conn):
+    """Fold facts newer than the high-water mark into the rollup tables.
+
+    Each window's deltas and the advanced mark commit together, so a
+    failed run never double counts or skips anything. Returns the number of
+    paid order lines processed.
+    """
+    cursor = conn.cursor()
+    upper = datetime.utcnow() - timedelta(minutes=ROLLUP_LAG_MINUTES)
+    processed = 0
+
+    for _ in range(ROLLUP_MAX_WINDOWS):
+        start = _read_high_water_mark(cursor)
+        if start >= upper:
+            conn.commit()
+            break
+
+        end = min(upper, start + timedelta(hours=ROLLUP_WINDOW_HOURS))
+
+        paid_lines = _fetch_frame(
+            cursor,
+            PAID_LINES_QUERY,
+            (start, end),
+            ["order_id", "paid_at", "product_id", "category", "quantity", "price"],
+        )
+        failed_lines = _fetch_frame(
+            cursor,
+            FAILED_LINES_QUERY,
+            (start, end),
+            ["transaction_id", "failed_at", "product_id", "category"],
+        )
+
+        for table, delta in aggregate_window(paid_lines, failed_lines).items():
+            _merge_delta(cursor, table, ROLLUP_TABLES[table], delta)
+
+        cursor.execute(
+            "UPDATE rollup_state SET high_water_mark = ?, updated_at = ? WHERE name = ?",
+            (end, datetime.utcnow(), ROLLUP_NAME),
+        )
+        conn.commit()
+
+        processed += len(paid_lines)
+        logging.info(
+            f"Rolled up {len(paid_lines)} paid lines and {len(failed_lines)} "
+            f"failed payment lines up to {end.isoformat()}"
+        )
+
+    return processed
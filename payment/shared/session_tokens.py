@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Signed session tokens: "v1.<user_id>.<admin>.<expires>.<token_id>.<signature>"
+# where expires is a Unix timestamp and signature is HMAC-SHA256 over
+# everything before it. Any app holding the key can check one without a
+# database round trip; logouts are published through revoked_tokens.
+#
+# This file is kept identical in user-auth, product-catalog and payment.
+
+SIGNED_TOKEN_PREFIX = "v1."
+# Format user-auth issues at login/signup: "opaque" (sessions table) or "signed"
+SESSION_TOKEN_FORMAT = os.getenv("SESSION_TOKEN_FORMAT", "opaque")
+# Comma-separated; the first key signs, all of them verify (for rotation)
+SIGNING_KEYS = [
+    key.encode()
+    for key in os.getenv("SESSION_SIGNING_KEYS", "").split(",")
+    if key.strip()
+]
+REVOCATION_REFRESH_SECONDS = int(os.getenv("SESSION_REVOCATION_REFRESH_SECONDS", "30"))
+# Re-read revocations this far back on each refresh, so rows committed out
+# of order or stamped by a skewed clock are not missed
+REVOCATION_OVERLAP = timedelta(minutes=2)
+
+
+def is_signed_token(token):
+    return token.startswith(SIGNED_TOKEN_PREFIX)
+
+
+def _sign(payload, key):
+    digest = hmac.new(key, payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def issue_signed_token(user_id, is_admin, expires_at):
+    """Create a signed token for a user. Raises ValueError if no key is set."""
+    if not SIGNING_KEYS:
+        raise ValueError("SESSION_SIGNING_KEYS environment variable not set")
+
+    expires = int(expires_at.replace(tzinfo=timezone.utc).timestamp())
+    token_id = secrets.token_urlsafe(12)
+    payload = f"{SIGNED_TOKEN_PREFIX}{int(user_id)}.{int(bool(is_admin))}.{expires}.{token_id}"
+    return f"{payload}.{_sign(payload, SIGNING_KEYS[0])}"
+
+
+def decode_signed_token(token):
+    """Check a signed token's signature and expiry.
+
+    Returns {"user_id", "is_admin", "expires_at", "token_id"}, or None if
+    the token is malformed, forged or expired. Does not check revocation.
+    """
+    payload, _, signature = token.rpartition(".")
+
+    if not any(
+        hmac.compare_digest(signature.encode(), _sign(payload, key).encode())
+        for key in SIGNING_KEYS
+    ):
+        return None
+
+    try:
+        user_id, is_admin, expires, token_id = payload[
+            len(SIGNED_TOKEN_PREFIX) :
+        ].split(".")
+        expires_at = datetime.utcfromtimestamp(int(expires))
+        claims = {
+            "user_id": int(user_id),
+            "is_admin": is_admin == "1",
+            "expires_at": expires_at,
+            "token_id": token_id,
+        }
+    except ValueError:
+        return None
+
+    return claims if expires_at > datetime.utcnow() else None
+
+
+class RevocationSet:
+    """Token IDs of signed sessions that were logged out before expiring.
+
+    Refreshed incrementally from revoked_tokens at most every
+    REVOCATION_REFRESH_SECONDS; entries drop out once the token would have
+    expired anyway, so the set only holds a few days of logouts.
+    """
+
+    def __init__(self):
+        self.revoked = {}
+        self.since = None
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+
+    def add(self, token_id, expires_at):
+        with self.lock:
+            self.revoked[token_id] = expires_at
+
+    def is_revoked(self, token_id, conn_factory):
+        """Raises if the set has never been loaded and cannot be, so
+        callers fail closed rather than accept a revoked token."""
+        with self.lock:
+            now = time.monotonic()
+            if (
+                self.refreshed_at is None
+                or now - self.refreshed_at >= REVOCATION_REFRESH_SECONDS
+            ):
+                try:
+                    self._refresh(conn_factory)
+                    self.refreshed_at = now
+                except Exception as e:
+                    if self.refreshed_at is None:
+                        raise
+                    logging.warning(f"Revocation refresh failed: {str(e)}")
+
+            return token_id in self.revoked
+
+    def _refresh(self, conn_factory):
+        utcnow = datetime.utcnow()
+        conn = conn_factory()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT token_id, expires_at, revoked_at
+                FROM revoked_tokens
+                WHERE revoked_at >= ? AND expires_at > ?
+                """,
+                (self.since or datetime(1900, 1, 1), utcnow),
+            )
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        for token_id, expires_at, revoked_at in rows:
+            self.revoked[token_id] = expires_at
+            if self.since is None or revoked_at - REVOCATION_OVERLAP > self.since:
+                self.since = revoked_at - REVOCATION_OVERLAP
+
+        self.revoked = {
+            token_id: expires_at
+            for token_id, expires_at in self.revoked.items()
+            if expires_at > utcnow
+        }
+
+
+_revocations = RevocationSet()
+
+
+def verify_signed_token(token, conn_factory):
+    """Return the token's claims if it is valid and not revoked, else None"""
+    claims = decode_signed_token(token)
+    if not claims:
+        return None
+    if _revocations.is_revoked(claims["token_id"], conn_factory):
+        return None
+    return claims
+
+
+def revoke_signed_token(cursor, claims):
+    """Record a logout. Does not commit."""
+    cursor.execute(
+        """
+        INSERT INTO revoked_tokens (token_id, user_id, expires_at, revoked_at)
+        SELECT ?, ?, ?, SYSUTCDATETIME()
+        WHERE NOT EXISTS (SELECT 1 FROM revoked_tokens WHERE token_id = ?)
+        """,
+        (
+            claims["token_id"],
+            claims["user_id"],
+            claims["expires_at"],
+            claims["token_id"],
+        ),
+    )
+    _revocations.add(claims["token_id"], claims["expires_at"])
@@ -0,0 +1,133 @@
+import logging
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.blob_utils import (
+    CDN_BASE_URL,
+    delete_images_batch,
+    iter_product_image_blobs,
+)
+from shared.db_utils import get_db_connection
+
+GRACE_PERIOD_HOURS = float(os.getenv("ORPHAN_GC_GRACE_HOURS", "24"))
+DRY_RUN = os.getenv("ORPHAN_GC_DRY_RUN", "false").lower() == "true"
+DELETE_BATCH_SIZE = 256  # Blob batch API limit
+FETCH_SIZE = 5000
+
+# Every URL referenced by a product (original and variants)
+REFERENCED_URLS = """
+    WITH urls AS (
+        SELECT image_url AS url FROM products WHERE image_url IS NOT NULL
+        UNION ALL
+        SELECT JSON_VALUE(v.value, '$.url')
+        FROM products p
+        CROSS APPLY OPENJSON(p.image_variants) v
+        WHERE p.image_variants IS NOT NULL
+    )
+"""
+
+# Full blob path (URL minus "<CDN_BASE_URL>/") of every referenced URL under
+# the CDN base, sorted with a binary collation so the order matches the
+# blob listing
+REFERENCED_BLOBS_QUERY = REFERENCED_URLS + """
+    SELECT DISTINCT SUBSTRING(url, LEN(?) + 2, 4000)
+        COLLATE Latin1_General_BIN2 AS blob_name
+    FROM urls
+    WHERE LEFT(url, LEN(?) + 1) = ? + '/'
+    ORDER BY blob_name
+"""
+
+# Referenced URLs that are not under CDN_BASE_URL (e.g. after it was
+# changed), whose blob paths cannot be worked out
+FOREIGN_URLS_QUERY = REFERENCED_URLS + """
+    SELECT COUNT(*) FROM urls
+    WHERE url IS NOT NULL AND url LIKE 'http%' AND LEFT(url, LEN(?) + 1) <> ? + '/'
+"""
+
+
+def iter_referenced_blob_names(cursor):
+    """Stream referenced blob paths in sorted order"""
+    cursor.execute(REFERENCED_BLOBS_QUERY, (CDN_BASE_URL, CDN_BASE_URL, CDN_BASE_URL))
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        for row in rows:
+            yield row[0]
+
+
+def iter_orphans(blobs, referenced_names):
+    """Merge-join two name-ordered streams, yielding unreferenced blobs.
+
+    Only the current item of each stream is held in memory.
+    """
+    referenced = next(referenced_names, None)
+    for blob in blobs:
+        while referenced is not None and referenced < blob.name:
+            referenced = next(referenced_names, None)
+        if referenced != blob.name:
+            yield blob
+
+
+def main(timer: func.TimerRequest) -> None:
+    """Delete product image blobs that no product references (scheduled)"""
+    logging.info("Cleanup orphan images function triggered")
+
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=GRACE_PERIOD_HOURS)
+    scanned = orphaned = deleted = 0
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) FROM products WHERE image_url IS NOT NULL")
+        if cursor.fetchone()[0] == 0:
+            conn.close()
+            logging.warning("No product image references found, skipping cleanup")
+            return
+
+        cursor.execute(FOREIGN_URLS_QUERY, (CDN_BASE_URL, CDN_BASE_URL))
+        foreign = cursor.fetchone()[0]
+        if foreign:
+            conn.close()
+            logging.warning(
+                f"{foreign} product image URLs are not under {CDN_BASE_URL}, "
+                "skipping cleanup"
+            )
+            return
+
+        def counted(blobs):
+            nonlocal scanned
+            for blob in blobs:
+                scanned += 1
+                yield blob
+
+        batch = []
+        for blob in iter_orphans(
+            counted(iter_product_image_blobs()), iter_referenced_blob_names(cursor)
+        ):
+            if blob.last_modified > cutoff:
+                continue
+
+            orphaned += 1
+            batch.append(blob)
+            if len(batch) >= DELETE_BATCH_SIZE:
+                deleted += 0 if DRY_RUN else delete_images_batch(batch)
+                batch = []
+
+        deleted += 0 if DRY_RUN else delete_images_batch(batch)
+        conn.close()
+
+        logging.info(
+            f"Orphan image cleanup: scanned {scanned} blobs, "
+            f"{orphaned} orphaned, {deleted} deleted"
+            + (" (dry run)" if DRY_RUN else "")
+        )
+
+    except Exception as e:
+        logging.error(f"Cleanup orphan images error: {str(e)}")
+        raise
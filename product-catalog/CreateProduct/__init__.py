@@ -11,11 +11,17 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 from shared.db_utils import get_db_connection, verify_admin
 
 try:
-    from shared.blob_utils import upload_image_base64
+    from shared.blob_utils import (
+        decode_image_data,
+        upload_product_image,
+        validate_image_variants,
+    )
 
     BLOB_STORAGE_AVAILABLE = True
 except Exception as e:
-    upload_image_base64 = None
+    decode_image_data = None
+    upload_product_image = None
+    validate_image_variants = None
     BLOB_STORAGE_AVAILABLE = False
     logging.info(f"Blob storage not available: {str(e)}")
 
@@ -49,6 +55,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     stock_quantity = req_body.get("stock_quantity", 0)
     category = req_body.get("category")
     image_url = req_body.get("image_url")
+    image_variants = req_body.get("image_variants")
     image_data = req_body.get("image_data")
 
     if not name or not price or not category:
@@ -58,12 +65,31 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
+    if image_variants and not image_data:
+        # Variants end up in srcset, so only accept ones UploadProductImage
+        # could have produced for this image_url
+        if validate_image_variants is None:
+            image_variants = None
+        else:
+            try:
+                image_variants = validate_image_variants(image_url, image_variants)
+            except ValueError as e:
+                return func.HttpResponse(
+                    json.dumps({"error": str(e)}),
+                    status_code=400,
+                    mimetype="application/json",
+                )
+
     if image_data:
-        if not BLOB_STORAGE_AVAILABLE or upload_image_base64 is None:
+        image_variants = None
+        if not BLOB_STORAGE_AVAILABLE or upload_product_image is None:
             image_url = None
         else:
             try:
-                image_url = upload_image_base64(image_data, filename=name)
+                image_bytes, content_type = decode_image_data(image_data)
+                image_url, image_variants = upload_product_image(
+                    image_bytes, content_type=content_type, filename=name
+                )
                 logging.info(f"Image uploaded successfully: {image_url}")
             except Exception as e:
                 logging.error(f"Image upload failed: {str(e)}")
@@ -75,8 +101,8 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
         cursor.execute(
             """
-            INSERT INTO products (name, description, price, stock_quantity, category, image_url, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO products (name, description, price, stock_quantity, category, image_url, image_variants, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 name,
@@ -85,6 +111,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 stock_quantity,
                 category,
                 image_url,
+                json.dumps(image_variants) if image_variants else None,
                 datetime.utcnow(),
             ),
         )
@@ -105,6 +132,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                     "name": name,
                     "price": price_value,
                     "image_url": image_url,
+                    "image_variants": image_variants or [],
                 }
             ),
             status_code=201,
@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.bestsellers import BESTSELLERS_TOP_K, get_bestsellers
+from shared.db_utils import get_db_connection
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Get the best-selling products overall or in a category"""
+    logging.info("Get best sellers function triggered")
+
+    category = req.params.get("category")
+
+    try:
+        limit = int(req.params.get("limit", "10"))
+        if limit < 1 or limit > BESTSELLERS_TOP_K:
+            raise ValueError
+    except ValueError:
+        return func.HttpResponse(
+            json.dumps(
+                {"error": f"limit must be an integer between 1 and {BESTSELLERS_TOP_K}"}
+            ),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    try:
+        ranking = get_bestsellers(get_db_connection, category, limit)
+
+        products = []
+        if ranking:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                SELECT id, name, price, stock_quantity, category, image_url
+                FROM products
+                WHERE id IN ({', '.join('?' * len(ranking))})
+                """,
+                [product_id for product_id, units_sold in ranking],
+            )
+            rows = {row[0]: row for row in cursor.fetchall()}
+            conn.close()
+
+            for rank, (product_id, units_sold) in enumerate(ranking, start=1):
+                row = rows.get(product_id)
+                if not row:
+                    continue
+                products.append(
+                    {
+                        "rank": rank,
+                        "id": row[0],
+                        "name": row[1],
+                        "price": float(row[2]),
+                        "stock_quantity": row[3],
+                        "category": row[4],
+                        "image_url": row[5],
+                        "units_sold": units_sold,
+                    }
+                )
+
+        return func.HttpResponse(
+            json.dumps({"category": category, "products": products}),
+            status_code=200,
+            mimetype="application/json",
+        )
+
+    except Exception as e:
+        logging.error(f"Get best sellers error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Internal server error"}),
+            status_code=500,
+            mimetype="application/json",
+        )
@@ -20,7 +20,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         cursor = conn.cursor()
 
         cursor.execute(
-            "SELECT id, name, description, price, stock_quantity, category, image_url, created_at FROM products WHERE id = ?",
+            "SELECT id, name, description, price, stock_quantity, category, image_url, created_at, image_variants FROM products WHERE id = ?",
             (product_id,),
         )
 
@@ -42,6 +42,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             "category": row[5],
             "image_url": row[6],
             "created_at": row[7].isoformat() if row[7] else None,
+            "image_variants": json.loads(row[8]) if row[8] else [],
         }
 
         conn.close()
@@ -6,8 +6,11 @@ import sys
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.bestsellers import get_bestsellers
 from shared.db_utils import get_db_connection
 
+PRODUCT_SORTS = ("newest", "bestselling")
+
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """Get all products with optional filtering"""
@@ -17,12 +20,30 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     search = req.params.get("search")
     limit = req.params.get("limit", "50")
     offset = req.params.get("offset", "0")
+    sort = req.params.get("sort", "newest")
+
+    if sort not in PRODUCT_SORTS:
+        return func.HttpResponse(
+            json.dumps({"error": f"sort must be one of: {', '.join(PRODUCT_SORTS)}"}),
+            status_code=400,
+            mimetype="application/json",
+        )
 
     try:
+        if sort == "bestselling":
+            products = get_bestselling_products(
+                category, search, int(offset), int(limit)
+            )
+            return func.HttpResponse(
+                json.dumps({"products": products}),
+                status_code=200,
+                mimetype="application/json",
+            )
+
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        query = "SELECT id, name, description, price, stock_quantity, category, image_url, created_at FROM products WHERE 1=1"
+        query = "SELECT id, name, description, price, stock_quantity, category, image_url, created_at, image_variants FROM products WHERE 1=1"
         params = []
 
         if category:
@@ -39,20 +60,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
         cursor.execute(query, params)
 
-        products = []
-        for row in cursor.fetchall():
-            products.append(
-                {
-                    "id": row[0],
-                    "name": row[1],
-                    "description": row[2],
-                    "price": float(row[3]),
-                    "stock_quantity": row[4],
-                    "category": row[5],
-                    "image_url": row[6],
-                    "created_at": row[7].isoformat() if row[7] else None,
-                }
-            )
+        products = [row_to_product(row) for row in cursor.fetchall()]
 
         conn.close()
 
@@ -69,3 +77,52 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             status_code=500,
             mimetype="application/json",
         )
+
+
+def row_to_product(row):
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "price": float(row[3]),
+        "stock_quantity": row[4],
+        "category": row[5],
+        "image_url": row[6],
+        "created_at": row[7].isoformat() if row[7] else None,
+        "image_variants": json.loads(row[8]) if row[8] else [],
+    }
+
+
+def get_bestselling_products(category, search, offset, limit):
+    """Products from the cached best-seller ranking, best first.
+
+    Only the top BESTSELLERS_TOP_K of the category are ranked, so pages
+    past that are empty.
+    """
+    ranking = get_bestsellers(get_db_connection, category)
+    if not ranking:
+        return []
+
+    units_sold = dict(ranking)
+    query = (
+        "SELECT id, name, description, price, stock_quantity, category, image_url, created_at, image_variants "
+        f"FROM products WHERE id IN ({', '.join('?' * len(units_sold))})"
+    )
+    params = list(units_sold)
+
+    if search:
+        query += " AND (name LIKE ? OR description LIKE ?)"
+        search_term = f"%{search}%"
+        params.extend([search_term, search_term])
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+
+    products = [
+        dict(row_to_product(row), units_sold=units_sold[row[0]]) for row in rows
+    ]
+    products.sort(key=lambda product: (-product["units_sold"], product["id"]))
+    return products[offset : offset + limit]
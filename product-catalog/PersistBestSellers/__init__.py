@@ -0,0 +1,23 @@
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.bestsellers import persist_bestsellers
+from shared.db_utils import get_db_connection
+
+
+def main(timer: func.TimerRequest) -> None:
+    """Persist best-seller counts for newly paid orders (every 5 minutes)"""
+    logging.info("Persist best sellers function triggered")
+
+    try:
+        conn = get_db_connection()
+        persist_bestsellers(conn)
+        conn.close()
+
+    except Exception as e:
+        logging.error(f"Persist best sellers error: {str(e)}")
+        raise
@@ -8,6 +8,12 @@ import azure.functions as func
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from shared.db_utils import get_db_connection, verify_admin
 
+try:
+    from shared.blob_utils import validate_image_variants
+except Exception as e:
+    validate_image_variants = None
+    logging.info(f"Blob storage not available: {str(e)}")
+
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """Update product (admin only)"""
@@ -34,6 +40,22 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
         )
 
+    # Variants end up in srcset, so only accept ones UploadProductImage
+    # could have produced for the new image_url
+    image_variants = None
+    if "image_url" in req_body and req_body.get("image_variants"):
+        if validate_image_variants is not None:
+            try:
+                image_variants = validate_image_variants(
+                    req_body["image_url"], req_body["image_variants"]
+                )
+            except ValueError as e:
+                return func.HttpResponse(
+                    json.dumps({"error": str(e)}),
+                    status_code=400,
+                    mimetype="application/json",
+                )
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -65,6 +87,10 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             update_fields.append("image_url = ?")
             params.append(req_body["image_url"])
 
+            # Variants of the previous image are stale once the URL changes
+            update_fields.append("image_variants = ?")
+            params.append(json.dumps(image_variants) if image_variants else None)
+
         if not update_fields:
             conn.close()
             return func.HttpResponse(
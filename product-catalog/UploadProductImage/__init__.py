@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import sys
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import verify_admin
+
+try:
+    from shared.blob_utils import upload_product_image
+
+    BLOB_STORAGE_AVAILABLE = True
+except Exception as e:
+    upload_product_image = None
+    BLOB_STORAGE_AVAILABLE = False
+    logging.info(f"Blob storage not available: {str(e)}")
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Upload a raw product image body (admin only)"""
+    logging.info("Upload product image function triggered")
+
+    session_token = req.headers.get("Authorization", "").replace("Bearer ", "")
+    is_admin, user_id = verify_admin(session_token)
+
+    if not is_admin:
+        return func.HttpResponse(
+            json.dumps({"error": "Unauthorized"}),
+            status_code=403,
+            mimetype="application/json",
+        )
+
+    if not BLOB_STORAGE_AVAILABLE or upload_product_image is None:
+        return func.HttpResponse(
+            json.dumps({"error": "Image storage is not configured"}),
+            status_code=503,
+            mimetype="application/json",
+        )
+
+    content_type = req.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    filename = req.params.get("filename")
+
+    try:
+        image_url, image_variants = upload_product_image(
+            req.get_body(), content_type=content_type, filename=filename
+        )
+    except ValueError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            mimetype="application/json",
+        )
+    except Exception as e:
+        logging.error(f"Upload product image error: {str(e)}")
+        return func.HttpResponse(
+            json.dumps({"error": "Failed to upload image"}),
+            status_code=500,
+            mimetype="application/json",
+        )
+
+    return func.HttpResponse(
+        json.dumps(
+            {
+                "success": True,
+                "image_url": image_url,
+                "image_variants": image_variants,
+            }
+        ),
+        status_code=201,
+        mimetype="application/json",
+    )
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+STATE_NAME = "bestsellers"
+BESTSELLERS_TOP_K = int(os.getenv("BESTSELLERS_TOP_K", "100"))
+# How often an instance folds new sales into its in-memory ranking
+BESTSELLERS_REFRESH_SECONDS = int(os.getenv("BESTSELLERS_REFRESH_SECONDS", "60"))
+# How often an instance reloads the persisted counts (picks up category edits)
+BESTSELLERS_RELOAD_SECONDS = int(os.getenv("BESTSELLERS_RELOAD_SECONDS", "3600"))
+# Orders paid in the last few minutes are left for the next pass, so one
+# that commits a little after its paid_at is still counted
+BESTSELLERS_LAG_MINUTES = int(os.getenv("BESTSELLERS_LAG_MINUTES", "5"))
+
+ALL_CATEGORIES = None
+NO_MARK = datetime(1900, 1, 1)
+
+# Units per product for orders paid in (mark, upper]; a seek on IX_orders_paid_at
+DELTA_QUERY = """
+    SELECT oi.product_id, p.category, SUM(oi.quantity)
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    JOIN products p ON p.id = oi.product_id
+    WHERE o.paid_at > ? AND o.paid_at <= ?
+    GROUP BY oi.product_id, p.category
+"""
+
+# The persisted counts together with the mark they are complete up to, in
+# one statement. The mark row is read first (FORCE ORDER) with an update
+# lock held to the end of the statement's transaction: PersistBestSellers
+# takes the same lock before touching the counts, so it cannot commit
+# between reading the mark and reading the counts.
+SNAPSHOT_QUERY = """
+    SELECT s.high_water_mark, b.product_id, p.category, b.units_sold
+    FROM rollup_state s WITH (UPDLOCK, HOLDLOCK)
+    LEFT JOIN (
+        bestseller_counts b
+        JOIN products p ON p.id = b.product_id
+    ) ON 1 = 1
+    WHERE s.name = ?
+    OPTION (FORCE ORDER)
+"""
+
+
+def _read_mark(cursor, lock=False):
+    hint = " WITH (UPDLOCK, HOLDLOCK)" if lock else ""
+    cursor.execute(
+        f"SELECT high_water_mark FROM rollup_state{hint} WHERE name = ?",
+        (STATE_NAME,),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _delta_upper():
+    return datetime.utcnow() - timedelta(minutes=BESTSELLERS_LAG_MINUTES)
+
+
+class BestSellers:
+    """Units sold per product, with the top K kept per category and overall.
+
+    Counts only grow, so a product outside a top-K list can only enter it
+    when its own count goes up; apply() offers just the products in a delta
+    to their two lists instead of re-ranking everything.
+    """
+
+    def __init__(self, top_k=BESTSELLERS_TOP_K):
+        self.top_k = top_k
+        self.units = {}
+        self.categories = {}
+        self.rankings = {}
+        self.high_water_mark = NO_MARK
+
+    def load(self, rows, high_water_mark):
+        """Replace the state with (product_id, category, units) snapshot rows"""
+        self.units = {}
+        self.categories = {}
+        self.rankings = {}
+        self.high_water_mark = high_water_mark or NO_MARK
+
+        for product_id, category, units in rows:
+            self.units[product_id] = units
+            self.categories[product_id] = category
+            self.rankings.setdefault(category, []).append(product_id)
+            self.rankings.setdefault(ALL_CATEGORIES, []).append(product_id)
+
+        for ranking in self.rankings.values():
+            self._trim(ranking)
+
+    def apply(self, rows, high_water_mark):
+        """Add (product_id, category, units) delta rows sold up to the mark"""
+        for product_id, category, units in rows:
+            self.units[product_id] = self.units.get(product_id, 0) + units
+
+            previous = self.categories.get(product_id)
+            if previous is not None and previous != category:
+                ranking = self.rankings.get(previous, [])
+                if product_id in ranking:
+                    ranking.remove(product_id)
+            self.categories[product_id] = category
+
+            for key in (category, ALL_CATEGORIES):
+                ranking = self.rankings.setdefault(key, [])
+                if product_id not in ranking:
+                    ranking.append(product_id)
+                self._trim(ranking)
+
+        self.high_water_mark = high_water_mark
+
+    def top(self, category=ALL_CATEGORIES, limit=None):
+        """Return [(product_id, units_sold)], best first"""
+        ranking = self.rankings.get(category, [])[:limit]
+        return [(product_id, self.units[product_id]) for product_id in ranking]
+
+    def _trim(self, ranking):
+        ranking.sort(key=lambda product_id: (-self.units[product_id], product_id))
+        del ranking[self.top_k :]
+
+
+_bestsellers = BestSellers()
+_lock = threading.Lock()
+_loaded_at = 0.0
+_refreshed_at = 0.0
+
+
+def get_bestsellers(conn_factory, category=ALL_CATEGORIES, limit=None):
+    """Return this instance's ranking for a category, refreshing it if stale.
+
+    The first call loads the counts persisted by PersistBestSellers; later
+    calls only read orders paid since the instance's own high-water mark.
+    """
+    global _loaded_at, _refreshed_at
+
+    with _lock:
+        now = time.monotonic()
+        if now - _refreshed_at >= BESTSELLERS_REFRESH_SECONDS or not _loaded_at:
+            conn = conn_factory()
+            try:
+                cursor = conn.cursor()
+
+                if not _loaded_at or now - _loaded_at >= BESTSELLERS_RELOAD_SECONDS:
+                    cursor.execute(SNAPSHOT_QUERY, (STATE_NAME,))
+                    rows = cursor.fetchall()
+                    conn.commit()
+
+                    mark = rows[0][0] if rows else None
+                    _bestsellers.load(
+                        [row[1:] for row in rows if row[1] is not None], mark
+                    )
+                    _loaded_at = now
+
+                upper = _delta_upper()
+                if upper > _bestsellers.high_water_mark:
+                    cursor.execute(DELTA_QUERY, (_bestsellers.high_water_mark, upper))
+                    _bestsellers.apply(cursor.fetchall(), upper)
+            finally:
+                conn.close()
+
+            _refreshed_at = now
+
+        return _bestsellers.top(category, limit)
+
+
+def persist_bestsellers(conn):
+    """Add sales since the persisted mark into bestseller_counts.
+
+    The counts and the advanced mark commit together, so instances loading
+    the snapshot never miss or double count an order. Returns the number of
+    products updated.
+    """
+    cursor = conn.cursor()
+
+    mark = _read_mark(cursor, lock=True)
+    upper = _delta_upper()
+
+    if mark is None:
+        cursor.execute(
+            "INSERT INTO rollup_state (name, high_water_mark, updated_at) VALUES (?, ?, ?)",
+            (STATE_NAME, NO_MARK, datetime.utcnow()),
+        )
+        mark = NO_MARK
+
+    if mark >= upper:
+        conn.commit()
+        return 0
+
+    cursor.execute(
+        f"""
+        MERGE bestseller_counts AS t
+        USING ({DELTA_QUERY}) AS s (product_id, category, units)
+            ON t.product_id = s.product_id
+        WHEN MATCHED THEN
+            UPDATE SET units_sold = t.units_sold + s.units, updated_at = SYSUTCDATETIME()
+        WHEN NOT MATCHED THEN
+            INSERT (product_id, units_sold, updated_at)
+            VALUES (s.product_id, s.units, SYSUTCDATETIME());
+        """,
+        (mark, upper),
+    )
+    updated = cursor.rowcount
+
+    cursor.execute(
+        "UPDATE rollup_state SET high_water_mark = ?, updated_at = ? WHERE name = ?",
+        (upper, datetime.utcnow(), STATE_NAME),
+    )
+    conn.commit()
+
+    logging.info(f"Persisted best-seller counts for {updated} products up to {upper}")
+    return updated
@@ -1,13 +1,35 @@
 import base64
+import hashlib
+import io
 import logging
 import os
-import uuid
-
-from azure.storage.blob import BlobServiceClient, ContentSettings
-
-STORAGE_ACCOUNT = "shopspherecdn"
-CONTAINER_NAME = "cdn"
-CDN_BASE_URL = f"https://{STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}"
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+import requests
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobBlock, BlobServiceClient, ContentSettings
+
+try:
+    from PIL import Image, ImageOps
+
+    IMAGE_RESIZING_AVAILABLE = True
+except ImportError:
+    Image = None
+    ImageOps = None
+    IMAGE_RESIZING_AVAILABLE = False
+
+STORAGE_ACCOUNT = os.getenv("AZURE_STORAGE_ACCOUNT_NAME", "shopspherecdn")
+CONTAINER_NAME = os.getenv("AZURE_STORAGE_CONTAINER", "cdn")
+CDN_BASE_URL = os.getenv(
+    "CDN_BASE_URL",
+    f"https://{STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}",
+).rstrip("/")
 
 CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 ACCOUNT_KEY = os.getenv("AZURE_STORAGE_ACCOUNT_KEY")
@@ -20,24 +42,91 @@ CONTENT_TYPES = {
     ".gif": "image/gif",
     ".webp": "image/webp",
 }
+MEDIA_CONTENT_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".mov": "video/quicktime",
+}
+
+# Blob names are content hashes, so a URL always refers to the same bytes
+# and can be cached indefinitely by browsers and the CDN.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Names this module gives product images and their variants, at the
+# container root: "<sha256>.<ext>" or "<sha256>_<width>w.<ext>"
+PRODUCT_BLOB_NAME = re.compile(
+    r"[0-9a-f]{64}(?:_\d+w)?\.(?:jpg|png|gif|webp|mp4|webm|mov)"
+)
+
+MAX_FILE_SIZE = int(float(os.getenv("MAX_IMAGE_SIZE_MB", "5")) * 1024 * 1024)
+MAX_MEDIA_SIZE = int(float(os.getenv("MAX_MEDIA_SIZE_MB", "100")) * 1024 * 1024)
+
+# Payloads above UPLOAD_CHUNK_SIZE are sent as staged blocks, with up to
+# UPLOAD_CONCURRENCY blocks in flight and UPLOAD_MAX_RETRIES per block.
+UPLOAD_CHUNK_SIZE = int(float(os.getenv("UPLOAD_CHUNK_SIZE_MB", "4")) * 1024 * 1024)
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "3"))
+UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "0.5"))
+
+VARIANT_WIDTHS = tuple(
+    int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "200,400,800").split(",")
+)
+VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "4"))
+PIL_FORMATS = {
+    "image/jpeg": "JPEG",
+    "image/png": "PNG",
+    "image/webp": "WEBP",
+}
+
+_variant_executor = ThreadPoolExecutor(
+    max_workers=VARIANT_WORKERS, thread_name_prefix="image-variant"
+)
 
-MAX_FILE_SIZE = 5 * 1024 * 1024
+_blob_service_client = None
+_blob_service_client_lock = threading.Lock()
+
+
+def _build_transport():
+    """HTTP transport with a connection pool sized for parallel block uploads"""
+    pool_size = UPLOAD_CONCURRENCY + VARIANT_WORKERS
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session, session_owner=False)
 
 
 def get_blob_service_client():
-    """Get BlobServiceClient instance"""
-    if CONNECTION_STRING:
-        return BlobServiceClient.from_connection_string(CONNECTION_STRING)
-    elif ACCOUNT_KEY:
-        return BlobServiceClient(
-            account_url=f"https://{STORAGE_ACCOUNT}.blob.core.windows.net",
-            credential=ACCOUNT_KEY,
-        )
-    else:
-        raise ValueError(
-            "Azure Storage credentials not configured. "
-            "Set AZURE_STORAGE_CONNECTION_STRING or AZURE_STORAGE_ACCOUNT_KEY."
-        )
+    """Get the shared BlobServiceClient instance"""
+    global _blob_service_client
+
+    if _blob_service_client is not None:
+        return _blob_service_client
+
+    with _blob_service_client_lock:
+        if _blob_service_client is not None:
+            return _blob_service_client
+
+        if CONNECTION_STRING:
+            _blob_service_client = BlobServiceClient.from_connection_string(
+                CONNECTION_STRING, transport=_build_transport()
+            )
+        elif ACCOUNT_KEY:
+            _blob_service_client = BlobServiceClient(
+                account_url=f"https://{STORAGE_ACCOUNT}.blob.core.windows.net",
+                credential=ACCOUNT_KEY,
+                transport=_build_transport(),
+            )
+        else:
+            raise ValueError(
+                "Azure Storage credentials not configured. "
+                "Set AZURE_STORAGE_CONNECTION_STRING or AZURE_STORAGE_ACCOUNT_KEY."
+            )
+
+    return _blob_service_client
 
 
 def get_extension_from_content_type(content_type):
@@ -47,6 +136,9 @@ def get_extension_from_content_type(content_type):
         "image/png": ".png",
         "image/gif": ".gif",
         "image/webp": ".webp",
+        "video/mp4": ".mp4",
+        "video/webm": ".webm",
+        "video/quicktime": ".mov",
     }
     return type_map.get(content_type, ".jpg")
 
@@ -73,98 +165,397 @@ def validate_image_data(image_data):
         return image_data, "image/jpeg"
 
 
+def decode_image_data(image_data):
+    """Decode base64 image data. Returns (image_bytes, content_type)"""
+    base64_data, content_type = validate_image_data(image_data)
+    return base64.b64decode(base64_data), content_type
+
+
 def upload_image_base64(image_data, filename=None):
     """Upload base64 encoded image to Azure Blob Storage"""
     try:
-        base64_data, content_type = validate_image_data(image_data)
-        image_bytes = base64.b64decode(base64_data)
+        image_bytes, content_type = decode_image_data(image_data)
+    except ValueError as e:
+        logging.error(f"Image validation error: {str(e)}")
+        raise
 
-        if len(image_bytes) > MAX_FILE_SIZE:
-            raise ValueError(
-                f"File too large. Max size: {MAX_FILE_SIZE / (1024 * 1024):.1f}MB"
-            )
+    return upload_image_binary(image_bytes, content_type, filename)
 
-        if len(image_bytes) == 0:
-            raise ValueError("File is empty")
 
-        if filename:
-            safe_filename = "".join(c for c in filename if c.isalnum() or c in ".-_")
-            blob_name = safe_filename
-        else:
-            blob_name = f"product_{uuid.uuid4().hex[:12]}"
+def _blob_name_for(data, content_type):
+    """Content-addressed blob name: SHA-256 of the bytes plus extension"""
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{digest}{get_extension_from_content_type(content_type)}"
 
-        ext = get_extension_from_content_type(content_type)
-        if not blob_name.endswith(tuple(ALLOWED_EXTENSIONS)):
-            blob_name += ext
 
-        blob_service_client = get_blob_service_client()
-        blob_client = blob_service_client.get_blob_client(
-            container=CONTAINER_NAME, blob=blob_name
+def _claim_existing_blob(blob_name):
+    """Return True if the blob is already stored, refreshing its
+    Last-Modified time so the orphan collector's grace period restarts
+    for a blob that has just been referenced again."""
+    blob_client = get_blob_service_client().get_blob_client(
+        container=CONTAINER_NAME, blob=blob_name
+    )
+    try:
+        blob_client.set_blob_metadata(
+            {"claimed_at": datetime.now(timezone.utc).isoformat()}
         )
+        return True
+    except ResourceNotFoundError:
+        return False
 
-        blob_client.upload_blob(
-            image_bytes,
-            overwrite=True,
-            content_settings=ContentSettings(content_type=content_type),
-        )
 
-        image_url = f"{CDN_BASE_URL}/{blob_name}"
-        logging.info(f"Image uploaded successfully: {image_url}")
-        return image_url
+def _iter_chunks(data, chunk_size):
+    """Yield chunk_size pieces of a bytes-like object or readable stream"""
+    if hasattr(data, "read"):
+        while True:
+            chunk = data.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        view = memoryview(data)
+        for offset in range(0, len(view), chunk_size):
+            yield bytes(view[offset : offset + chunk_size])
 
-    except ValueError as e:
-        logging.error(f"Image validation error: {str(e)}")
-        raise
-    except Exception as e:
-        logging.error(f"Image upload error: {str(e)}")
-        raise Exception(f"Failed to upload image: {str(e)}")
 
+def _make_block_id(index, chunk):
+    """Block IDs are fixed-length and derived from position and content, so a
+    retried upload of the same payload finds the blocks it already staged."""
+    return f"{index:06d}-{hashlib.md5(chunk, usedforsecurity=False).hexdigest()[:16]}"
 
-def upload_image_binary(image_bytes, content_type="image/jpeg", filename=None):
-    """Upload binary image data to Azure Blob Storage"""
+
+def _get_uncommitted_block_ids(blob_client):
+    """Return IDs of blocks staged by an earlier, interrupted upload"""
+    try:
+        _, uncommitted = blob_client.get_block_list("uncommitted")
+        return {block.id for block in uncommitted}
+    except Exception:
+        return set()
+
+
+def _stage_block_with_retry(blob_client, block_id, chunk):
+    """Stage one block, retrying with exponential backoff"""
+    for attempt in range(UPLOAD_MAX_RETRIES + 1):
+        try:
+            blob_client.stage_block(block_id=block_id, data=chunk, length=len(chunk))
+            return
+        except Exception as e:
+            if attempt == UPLOAD_MAX_RETRIES:
+                raise
+            delay = UPLOAD_RETRY_BACKOFF * (2**attempt)
+            logging.warning(
+                f"Staging block {block_id} failed ({str(e)}), retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+
+def upload_blob_chunked(
+    data, blob_name, content_type, chunk_size=None, concurrency=None
+):
+    """Upload data to Azure Blob Storage as parallel staged blocks.
+
+    data may be bytes or a readable stream. At most ``concurrency`` blocks
+    are held in memory at once. Blocks left uncommitted by a previous
+    attempt with identical content are reused rather than re-sent, so
+    calling this again after a failure resumes the upload.
+    """
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+    concurrency = concurrency or UPLOAD_CONCURRENCY
+
+    blob_client = get_blob_service_client().get_blob_client(
+        container=CONTAINER_NAME, blob=blob_name
+    )
+    staged = _get_uncommitted_block_ids(blob_client)
+
+    block_ids = []
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="block-upload"
+    ) as executor:
+        pending = set()
+        for index, chunk in enumerate(_iter_chunks(data, chunk_size)):
+            block_id = _make_block_id(index, chunk)
+            block_ids.append(block_id)
+            if block_id in staged:
+                continue
+
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+
+            pending.add(
+                executor.submit(_stage_block_with_retry, blob_client, block_id, chunk)
+            )
+
+        for future in wait(pending).done:
+            future.result()
+
+    blob_client.commit_block_list(
+        [BlobBlock(block_id=block_id) for block_id in block_ids],
+        content_settings=ContentSettings(
+            content_type=content_type, cache_control=IMMUTABLE_CACHE_CONTROL
+        ),
+    )
+    logging.info(
+        f"Uploaded {blob_name} in {len(block_ids)} blocks "
+        f"({len(block_ids) - len(staged & set(block_ids))} sent)"
+    )
+
+
+def _upload_bytes(blob_name, data, content_type):
+    """Upload bytes, switching to block upload for large payloads"""
+    if len(data) > UPLOAD_CHUNK_SIZE:
+        upload_blob_chunked(data, blob_name, content_type)
+        return
+
+    blob_client = get_blob_service_client().get_blob_client(
+        container=CONTAINER_NAME, blob=blob_name
+    )
+    blob_client.upload_blob(
+        data,
+        overwrite=True,
+        content_settings=ContentSettings(
+            content_type=content_type, cache_control=IMMUTABLE_CACHE_CONTROL
+        ),
+    )
+
+
+def _upload_binary(data, content_type, filename, allowed_types, max_size):
+    """Validate and upload binary data. Returns the CDN URL.
+
+    The blob is named after the SHA-256 of its content and only uploaded
+    if it is not already stored. filename is only used for logging.
+    """
     try:
-        if content_type not in CONTENT_TYPES.values():
+        if content_type not in allowed_types:
             raise ValueError(f"Invalid content type: {content_type}")
 
-        if len(image_bytes) > MAX_FILE_SIZE:
+        if len(data) > max_size:
             raise ValueError(
-                f"File too large. Max size: {MAX_FILE_SIZE / (1024 * 1024):.1f}MB"
+                f"File too large. Max size: {max_size / (1024 * 1024):.1f}MB"
             )
 
-        if len(image_bytes) == 0:
+        if len(data) == 0:
             raise ValueError("File is empty")
 
-        if filename:
-            safe_filename = "".join(c for c in filename if c.isalnum() or c in ".-_")
-            blob_name = safe_filename
-        else:
-            blob_name = f"product_{uuid.uuid4().hex[:12]}"
-
-        ext = get_extension_from_content_type(content_type)
-        if not blob_name.endswith(tuple(ALLOWED_EXTENSIONS)):
-            blob_name += ext
-
-        blob_service_client = get_blob_service_client()
-        blob_client = blob_service_client.get_blob_client(
-            container=CONTAINER_NAME, blob=blob_name
-        )
+        blob_name = _blob_name_for(data, content_type)
+        url = f"{CDN_BASE_URL}/{blob_name}"
 
-        blob_client.upload_blob(
-            image_bytes,
-            overwrite=True,
-            content_settings=ContentSettings(content_type=content_type),
-        )
+        if _claim_existing_blob(blob_name):
+            logging.info(f"File {filename or blob_name} already stored: {url}")
+            return url
 
-        image_url = f"{CDN_BASE_URL}/{blob_name}"
-        logging.info(f"Image uploaded successfully: {image_url}")
-        return image_url
+        _upload_bytes(blob_name, data, content_type)
+        logging.info(f"File {filename or blob_name} uploaded successfully: {url}")
+        return url
 
     except ValueError as e:
-        logging.error(f"Image validation error: {str(e)}")
+        logging.error(f"Upload validation error: {str(e)}")
         raise
     except Exception as e:
-        logging.error(f"Image upload error: {str(e)}")
-        raise Exception(f"Failed to upload image: {str(e)}")
+        logging.error(f"Upload error: {str(e)}")
+        raise Exception(f"Failed to upload file: {str(e)}")
+
+
+def upload_image_binary(image_bytes, content_type="image/jpeg", filename=None):
+    """Upload binary image data to Azure Blob Storage"""
+    return _upload_binary(
+        image_bytes, content_type, filename, CONTENT_TYPES.values(), MAX_FILE_SIZE
+    )
+
+
+def upload_media_binary(media_bytes, content_type="video/mp4", filename=None):
+    """Upload binary video/media data to Azure Blob Storage"""
+    return _upload_binary(
+        media_bytes,
+        content_type,
+        filename,
+        MEDIA_CONTENT_TYPES.values(),
+        MAX_MEDIA_SIZE,
+    )
+
+
+def _render_variant(image_bytes, width, content_type):
+    """Resize image to the given width and encode it as content_type"""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img = ImageOps.exif_transpose(img)
+        height = max(1, round(img.height * width / img.width))
+        resized = img.resize((width, height), Image.LANCZOS)
+
+    if content_type == "image/jpeg" and resized.mode != "RGB":
+        resized = resized.convert("RGB")
+
+    output = io.BytesIO()
+    resized.save(
+        output,
+        format=PIL_FORMATS[content_type],
+        quality=VARIANT_QUALITY,
+        optimize=True,
+    )
+    return output.getvalue()
+
+
+def _build_variant(image_bytes, width, content_type, stem):
+    """Render and upload one variant. Runs on the variant worker pool.
+
+    stem is the original's content hash, so an existing variant blob was
+    rendered from the same bytes and can be reused.
+    """
+    blob_name = f"{stem}_{width}w{get_extension_from_content_type(content_type)}"
+
+    if not _claim_existing_blob(blob_name):
+        variant_bytes = _render_variant(image_bytes, width, content_type)
+        _upload_bytes(blob_name, variant_bytes, content_type)
+
+    return {
+        "width": width,
+        "content_type": content_type,
+        "url": f"{CDN_BASE_URL}/{blob_name}",
+    }
+
+
+def generate_image_variants(image_bytes, content_type, blob_name):
+    """Generate resized and WebP variants of an uploaded image.
+
+    Each (width, format) pair is rendered and uploaded on the variant
+    worker pool. Widths at or above the original are skipped, as are GIFs
+    (resizing would drop animation frames). Returns a list of
+    {"width", "content_type", "url"} dicts; failed variants are logged and
+    left out.
+    """
+    if not IMAGE_RESIZING_AVAILABLE or content_type not in PIL_FORMATS:
+        return []
+
+    if blob_name.startswith("http"):
+        blob_name = blob_name.split("/")[-1]
+    stem = os.path.splitext(blob_name)[0]
+
+    try:
+        # Variants are rendered upright, so compare against the upright width
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            original_width = ImageOps.exif_transpose(img).width
+    except Exception as e:
+        logging.error(f"Could not read image for variants: {str(e)}")
+        return []
+
+    variant_types = ["image/webp"]
+    if content_type != "image/webp":
+        variant_types.append(content_type)
+
+    futures = [
+        _variant_executor.submit(
+            _build_variant, image_bytes, width, variant_type, stem
+        )
+        for width in VARIANT_WIDTHS
+        if width < original_width
+        for variant_type in variant_types
+    ]
+
+    variants = []
+    for future in futures:
+        try:
+            variants.append(future.result())
+        except Exception as e:
+            logging.error(f"Image variant generation failed: {str(e)}")
+
+    logging.info(f"Generated {len(variants)} variants for {blob_name}")
+    return variants
+
+
+def validate_image_variants(image_url, variants):
+    """Check client-supplied variants against what upload_product_image
+    would have produced for image_url.
+
+    Each variant must be a {"width", "content_type", "url"} dict for one of
+    VARIANT_WIDTHS and PIL_FORMATS, named after image_url's content hash in
+    the CDN container. Returns the variants with only those keys; raises
+    ValueError otherwise.
+    """
+    if not variants:
+        return []
+    if not isinstance(variants, list):
+        raise ValueError("image_variants must be a list")
+
+    prefix = f"{CDN_BASE_URL}/"
+    blob_name = ""
+    if isinstance(image_url, str) and image_url.startswith(prefix):
+        blob_name = image_url[len(prefix):]
+    # Only originals carry variants, and variants are never named "_<width>w"
+    if not PRODUCT_BLOB_NAME.fullmatch(blob_name) or "_" in blob_name:
+        raise ValueError("image_variants require an image_url uploaded to the CDN")
+    stem = os.path.splitext(blob_name)[0]
+
+    validated = []
+    for variant in variants:
+        if not isinstance(variant, dict):
+            raise ValueError("Each image variant must be an object")
+        width = variant.get("width")
+        content_type = variant.get("content_type")
+        if type(width) is not int or width not in VARIANT_WIDTHS:
+            raise ValueError(
+                f"Image variant width must be one of: {', '.join(map(str, VARIANT_WIDTHS))}"
+            )
+        if content_type not in PIL_FORMATS:
+            raise ValueError(
+                f"Image variant content_type must be one of: {', '.join(PIL_FORMATS)}"
+            )
+        extension = get_extension_from_content_type(content_type)
+        url = f"{CDN_BASE_URL}/{stem}_{width}w{extension}"
+        if variant.get("url") != url:
+            raise ValueError(f"Image variant url must be {url}")
+        validated.append({"width": width, "content_type": content_type, "url": url})
+
+    return validated
+
+
+def upload_product_image(image_bytes, content_type="image/jpeg", filename=None):
+    """Upload image and its responsive variants. Returns (url, variants).
+
+    Video content types are stored as-is with no variants.
+    """
+    if content_type in MEDIA_CONTENT_TYPES.values():
+        return upload_media_binary(image_bytes, content_type, filename), []
+
+    image_url = upload_image_binary(image_bytes, content_type, filename)
+    return image_url, generate_image_variants(image_bytes, content_type, image_url)
+
+
+def iter_product_image_blobs(page_size=5000):
+    """Lazily list product image blobs in the CDN container, in name order.
+
+    Only the container root is listed (virtual folders are not descended
+    into), and only names matching PRODUCT_BLOB_NAME are returned, so
+    other assets stored in the container are never candidates for cleanup.
+    """
+    container_client = get_blob_service_client().get_container_client(CONTAINER_NAME)
+    for blob in container_client.walk_blobs(delimiter="/", results_per_page=page_size):
+        if PRODUCT_BLOB_NAME.fullmatch(blob.name):
+            yield blob
+
+
+def delete_images_batch(blobs):
+    """Delete up to 256 blobs in one batch request.
+
+    blobs are BlobProperties from iter_product_image_blobs; each delete is
+    conditional on the listed ETag, so a blob that was re-uploaded or
+    claimed since it was listed is kept. Returns the number deleted.
+    """
+    if not blobs:
+        return 0
+
+    container_client = get_blob_service_client().get_container_client(CONTAINER_NAME)
+    responses = container_client.delete_blobs(
+        *[
+            {
+                "name": blob.name,
+                "etag": blob.etag,
+                "match_condition": MatchConditions.IfNotModified,
+            }
+            for blob in blobs
+        ],
+        raise_on_any_failure=False,
+    )
+    return sum(1 for response in responses if response.status_code == 202)
 
 
 def delete_image(blob_name):
@@ -0,0 +1,162 @@
+"""Chunked block upload against an in-memory stand-in for Blob Storage.
+
+Run from the product-catalog directory:
+    python -m pytest tests
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared import blob_utils
+
+
+class FakeBlock:
+    def __init__(self, block_id):
+        self.id = block_id
+
+
+class FakeBlobClient:
+    """Just the block-blob calls upload_blob_chunked makes"""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def get_block_list(self, block_list_type):
+        staged = self.store.staged.get(self.name, {})
+        return [], [FakeBlock(block_id) for block_id in staged]
+
+    def stage_block(self, block_id, data, length):
+        with self.store.lock:
+            self.store.stage_calls.append(block_id)
+            failures = self.store.failures.get(block_id, 0)
+            if failures:
+                self.store.failures[block_id] = failures - 1
+                raise ConnectionError(f"injected failure for {block_id}")
+            self.store.in_flight += 1
+            self.store.max_in_flight = max(
+                self.store.max_in_flight, self.store.in_flight
+            )
+
+        time.sleep(0.01)
+        assert len(data) == length
+
+        with self.store.lock:
+            self.store.in_flight -= 1
+            self.store.staged.setdefault(self.name, {})[block_id] = bytes(data)
+
+    def commit_block_list(self, blocks, content_settings):
+        staged = self.store.staged.pop(self.name)
+        self.store.blobs[self.name] = b"".join(staged[block.id] for block in blocks)
+        self.store.content_settings[self.name] = content_settings
+
+    def upload_blob(self, data, overwrite, content_settings):
+        self.store.blobs[self.name] = bytes(data)
+        self.store.content_settings[self.name] = content_settings
+
+
+class FakeBlobService:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.staged = {}
+        self.blobs = {}
+        self.content_settings = {}
+        self.stage_calls = []
+        self.failures = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get_blob_client(self, container, blob):
+        return FakeBlobClient(self, blob)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    service = FakeBlobService()
+    monkeypatch.setattr(blob_utils, "get_blob_service_client", lambda: service)
+    monkeypatch.setattr(blob_utils, "UPLOAD_RETRY_BACKOFF", 0)
+    return service
+
+
+def payload(size):
+    return bytes(i % 251 for i in range(size))
+
+
+def block_ids(data, chunk_size):
+    return [
+        blob_utils._make_block_id(index, chunk)
+        for index, chunk in enumerate(blob_utils._iter_chunks(data, chunk_size))
+    ]
+
+
+def test_uploads_bytes_as_ordered_blocks(storage):
+    data = payload(10_000)
+
+    blob_utils.upload_blob_chunked(
+        data, "a.mp4", "video/mp4", chunk_size=1024, concurrency=3
+    )
+
+    assert storage.blobs["a.mp4"] == data
+    assert len(storage.stage_calls) == 10
+    assert storage.content_settings["a.mp4"].content_type == "video/mp4"
+    assert (
+        storage.content_settings["a.mp4"].cache_control
+        == blob_utils.IMMUTABLE_CACHE_CONTROL
+    )
+    assert storage.max_in_flight <= 3
+
+
+def test_uploads_stream(storage):
+    data = payload(5_000)
+
+    blob_utils.upload_blob_chunked(
+        io.BytesIO(data), "b.mp4", "video/mp4", chunk_size=1000, concurrency=2
+    )
+
+    assert storage.blobs["b.mp4"] == data
+    assert storage.max_in_flight <= 2
+
+
+def test_retries_transient_block_failures(storage):
+    data = payload(4_096)
+    flaky = block_ids(data, 1024)[2]
+    storage.failures[flaky] = blob_utils.UPLOAD_MAX_RETRIES
+
+    blob_utils.upload_blob_chunked(data, "c.mp4", "video/mp4", chunk_size=1024)
+
+    assert storage.blobs["c.mp4"] == data
+    assert storage.stage_calls.count(flaky) == blob_utils.UPLOAD_MAX_RETRIES + 1
+
+
+def test_failed_upload_resumes_with_missing_blocks_only(storage):
+    data = payload(8_192)
+    ids = block_ids(data, 1024)
+    storage.failures[ids[5]] = blob_utils.UPLOAD_MAX_RETRIES + 1
+
+    with pytest.raises(ConnectionError):
+        blob_utils.upload_blob_chunked(data, "d.mp4", "video/mp4", chunk_size=1024)
+
+    assert "d.mp4" not in storage.blobs
+    storage.stage_calls.clear()
+
+    blob_utils.upload_blob_chunked(data, "d.mp4", "video/mp4", chunk_size=1024)
+
+    assert storage.blobs["d.mp4"] == data
+    assert storage.stage_calls == [ids[5]]
+
+
+def test_small_payloads_use_a_single_put(storage, monkeypatch):
+    monkeypatch.setattr(blob_utils, "UPLOAD_CHUNK_SIZE", 1024)
+
+    blob_utils._upload_bytes("small.png", payload(1024), "image/png")
+    blob_utils._upload_bytes("large.png", payload(1025), "image/png")
+
+    assert storage.blobs["small.png"] == payload(1024)
+    assert storage.blobs["large.png"] == payload(1025)
+    assert len(storage.stage_calls) == 2
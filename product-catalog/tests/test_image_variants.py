@@ -0,0 +1,69 @@
+"""Validation of client-supplied image variants.
+
+Run from the product-catalog directory:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared import blob_utils
+
+STEM = "ab" * 32
+IMAGE_URL = f"{blob_utils.CDN_BASE_URL}/{STEM}.jpg"
+
+
+def variant(width, content_type, extension):
+    return {
+        "width": width,
+        "content_type": content_type,
+        "url": f"{blob_utils.CDN_BASE_URL}/{STEM}_{width}w{extension}",
+    }
+
+
+def test_accepts_variants_an_upload_would_produce():
+    width = blob_utils.VARIANT_WIDTHS[0]
+    variants = [
+        dict(variant(width, "image/webp", ".webp"), extra="dropped"),
+        variant(width, "image/jpeg", ".jpg"),
+    ]
+
+    assert blob_utils.validate_image_variants(IMAGE_URL, variants) == [
+        variant(width, "image/webp", ".webp"),
+        variant(width, "image/jpeg", ".jpg"),
+    ]
+    assert blob_utils.validate_image_variants(IMAGE_URL, None) == []
+
+
+@pytest.mark.parametrize(
+    "image_url, variants",
+    [
+        (IMAGE_URL, {"width": 200}),
+        (IMAGE_URL, ["not a dict"]),
+        (IMAGE_URL, [variant(123, "image/webp", ".webp")]),
+        (IMAGE_URL, [variant("200", "image/webp", ".webp")]),
+        (IMAGE_URL, [variant(200, "image/gif", ".gif")]),
+        (IMAGE_URL, [variant(200, "image/webp", ".jpg")]),
+        (IMAGE_URL, [dict(variant(200, "image/webp", ".webp"), url="javascript:x")]),
+        (
+            IMAGE_URL,
+            [
+                dict(
+                    variant(200, "image/webp", ".webp"),
+                    url=f"{blob_utils.CDN_BASE_URL}/{'cd' * 32}_200w.webp",
+                )
+            ],
+        ),
+        ("https://example.com/a.jpg", [variant(200, "image/webp", ".webp")]),
+        (
+            f"{blob_utils.CDN_BASE_URL}/{STEM}_400w.jpg",
+            [variant(200, "image/webp", ".webp")],
+        ),
+    ],
+)
+def test_rejects_variants_an_upload_would_not_produce(image_url, variants):
+    with pytest.raises(ValueError):
+        blob_utils.validate_image_variants(image_url, variants)
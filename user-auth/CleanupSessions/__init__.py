@@ -0,0 +1,84 @@
+import logging
+import os
+import sys
+from datetime import datetime
+
+import azure.functions as func
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.db_utils import MAX_SESSIONS_PER_USER, get_db_connection
+
+# Small batches keep each DELETE well under the 5000-lock escalation
+# threshold, so logins and verifications are never blocked on a table lock
+BATCH_SIZE = int(os.getenv("SESSION_CLEANUP_BATCH_SIZE", "1000"))
+
+# Seeks on IX_sessions_expires_at
+DELETE_EXPIRED_SESSIONS = "DELETE TOP (?) FROM sessions WHERE expires_at < ?"
+
+# Revocations are only needed until the token would have expired anyway
+DELETE_EXPIRED_REVOCATIONS = "DELETE TOP (?) FROM revoked_tokens WHERE expires_at < ?"
+
+# Oldest live sessions beyond each user's cap. create_session enforces the
+# cap at login; this is a backstop (e.g. after MAX_SESSIONS_PER_USER is
+# lowered) and normally finds nothing, so it runs as a single batch.
+DELETE_EXCESS_SESSIONS = """
+    WITH ranked AS (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id ORDER BY created_at DESC, id DESC
+        ) AS position
+        FROM sessions
+        WHERE user_id IN (
+            SELECT user_id FROM sessions GROUP BY user_id HAVING COUNT(*) > ?
+        )
+    )
+    DELETE TOP (?) s
+    FROM sessions s
+    JOIN ranked r ON r.id = s.id
+    WHERE r.position > ?
+"""
+
+
+def delete_in_batches(conn, sql, params):
+    """Run a DELETE TOP (BATCH_SIZE) until it removes a short batch.
+
+    Commits after each batch. Returns the number of rows deleted.
+    """
+    cursor = conn.cursor()
+    deleted = 0
+    while True:
+        cursor.execute(sql, params)
+        batch = cursor.rowcount
+        conn.commit()
+        deleted += batch
+        if batch < BATCH_SIZE:
+            return deleted
+
+
+def main(timer: func.TimerRequest) -> None:
+    """Delete expired sessions and enforce MAX_SESSIONS_PER_USER (every 10 minutes)"""
+    logging.info("Cleanup sessions function triggered")
+
+    now = datetime.utcnow()
+
+    try:
+        conn = get_db_connection()
+
+        expired = delete_in_batches(conn, DELETE_EXPIRED_SESSIONS, (BATCH_SIZE, now))
+        excess = delete_in_batches(
+            conn,
+            DELETE_EXCESS_SESSIONS,
+            (MAX_SESSIONS_PER_USER, BATCH_SIZE, MAX_SESSIONS_PER_USER),
+        )
+        revocations = delete_in_batches(
+            conn, DELETE_EXPIRED_REVOCATIONS, (BATCH_SIZE, now)
+        )
+
+        conn.close()
+        logging.info(
+            f"Deleted {expired} expired sessions, {excess} sessions over the "
+            f"per-user cap and {revocations} expired token revocations"
+        )
+
+    except Exception as e:
+        logging.error(f"Cleanup sessions error: {str(e)}")
+        raise
@@ -2,16 +2,14 @@ import json
 import logging
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from shared.db_utils import (
-    generate_session_token,
-    get_db_connection,
-    verify_password,
-)
+from shared.db_utils import create_session, get_db_connection
+from shared.hash_pool import HashPoolBusy, get_hash_pool
+from shared.passwords import hash_password, needs_rehash, verify_password
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -72,7 +70,21 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         user_id = int(user_id)
 
         if salt:
-            if not verify_password(password, password_hash, salt):
+            try:
+                password_ok = get_hash_pool().run(
+                    verify_password, password, password_hash, salt
+                )
+            except HashPoolBusy:
+                conn.close()
+                logging.warning("Login rejected: password hash pool saturated")
+                return func.HttpResponse(
+                    json.dumps({"error": "Server busy, please retry"}),
+                    status_code=503,
+                    headers={"Retry-After": "1"},
+                    mimetype="application/json",
+                )
+
+            if not password_ok:
                 conn.close()
                 logging.warning(f"Login failed: Invalid password for {email}")
                 return func.HttpResponse(
@@ -81,13 +93,20 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                     mimetype="application/json",
                 )
 
-        session_token = generate_session_token()
-        expires_at = datetime.utcnow() + timedelta(days=7)
-
-        cursor.execute(
-            "INSERT INTO sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)",
-            (user_id, session_token, expires_at),
-        )
+            # Upgrade hashes made with an older algorithm or cost while the
+            # plaintext is at hand; if the pool is saturated, try next login
+            if needs_rehash(password_hash):
+                try:
+                    new_hash, new_salt = get_hash_pool().run(hash_password, password)
+                    cursor.execute(
+                        "UPDATE shopusers SET password = ?, salt = ?, updated_at = ? WHERE id = ? AND password = ?",
+                        (new_hash, new_salt, datetime.utcnow(), user_id, password_hash),
+                    )
+                    logging.info(f"Rehashed password for user {user_id}")
+                except HashPoolBusy:
+                    logging.info(f"Password rehash for user {user_id} deferred")
+
+        session_token = create_session(cursor, user_id, user_email)
         conn.commit()
         conn.close()
 
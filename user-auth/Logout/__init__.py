@@ -7,6 +7,11 @@ import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from shared.db_utils import get_db_connection
+from shared.session_tokens import (
+    decode_signed_token,
+    is_signed_token,
+    revoke_signed_token,
+)
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -24,7 +29,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
     session_token = req_body.get("session_token")
 
-    if not session_token:
+    if session_token:
         logging.info("Processing logout request")
 
         try:
@@ -38,7 +43,15 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             )
 
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM sessions WHERE session_token = ?", (session_token,))
+        if is_signed_token(session_token):
+            # Signed tokens stay valid until they expire unless revoked
+            claims = decode_signed_token(session_token)
+            if claims:
+                revoke_signed_token(cursor, claims)
+        else:
+            cursor.execute(
+                "DELETE FROM sessions WHERE session_token = ?", (session_token,)
+            )
         conn.commit()
         conn.close()
 
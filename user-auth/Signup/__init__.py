@@ -2,12 +2,14 @@ import json
 import logging
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from shared.db_utils import generate_session_token, get_db_connection, hash_password
+from shared.db_utils import create_session, get_db_connection
+from shared.hash_pool import HashPoolBusy, get_hash_pool
+from shared.passwords import hash_password
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -59,7 +61,17 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                 mimetype="application/json",
             )
 
-        password_hash, salt = hash_password(password)
+        try:
+            password_hash, salt = get_hash_pool().run(hash_password, password)
+        except HashPoolBusy:
+            conn.close()
+            logging.warning("Signup rejected: password hash pool saturated")
+            return func.HttpResponse(
+                json.dumps({"error": "Server busy, please retry"}),
+                status_code=503,
+                headers={"Retry-After": "1"},
+                mimetype="application/json",
+            )
 
         cursor.execute(
             "INSERT INTO shopusers (email, password, salt, name, created_at) VALUES (?, ?, ?, ?, ?)",
@@ -70,13 +82,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         cursor.execute("SELECT @@IDENTITY AS id")
         user_id = int(cursor.fetchone()[0])
 
-        session_token = generate_session_token()
-        expires_at = datetime.utcnow() + timedelta(days=7)
-
-        cursor.execute(
-            "INSERT INTO sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)",
-            (user_id, session_token, expires_at),
-        )
+        session_token = create_session(cursor, user_id, email)
         conn.commit()
         conn.close()
 
@@ -8,6 +8,7 @@ import azure.functions as func
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from shared.db_utils import get_db_connection
+from shared.session_tokens import is_signed_token, verify_signed_token
 
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -33,6 +34,9 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         )
 
     try:
+        if is_signed_token(session_token):
+            return verify_signed_session(session_token)
+
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -97,3 +101,43 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             status_code=500,
             mimetype="application/json",
         )
+
+
+def verify_signed_session(session_token):
+    """Check a signed token locally, then look up the user's details"""
+    claims = verify_signed_token(session_token, get_db_connection)
+
+    if not claims:
+        logging.warning("Invalid or expired signed session token")
+        return func.HttpResponse(
+            json.dumps({"valid": False, "error": "Invalid session"}),
+            status_code=401,
+            mimetype="application/json",
+        )
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, email, name FROM shopusers WHERE id = ?", (claims["user_id"],)
+    )
+    user = cursor.fetchone()
+    conn.close()
+
+    if not user:
+        return func.HttpResponse(
+            json.dumps({"valid": False, "error": "Invalid session"}),
+            status_code=401,
+            mimetype="application/json",
+        )
+
+    logging.info(f"Signed session verified for user {user[0]}")
+    return func.HttpResponse(
+        json.dumps(
+            {
+                "valid": True,
+                "user": {"id": int(user[0]), "email": user[1], "name": user[2]},
+            }
+        ),
+        status_code=200,
+        mimetype="application/json",
+    )
@@ -1,11 +1,31 @@
-import hashlib
 import logging
 import os
 import secrets
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pyodbc
 
+from shared.session_tokens import (
+    SESSION_TOKEN_FORMAT,
+    is_signed_token,
+    issue_signed_token,
+    verify_signed_token,
+)
+
+SESSION_DAYS = 7
+# Live opaque sessions kept per user; logging in again drops the oldest
+MAX_SESSIONS_PER_USER = int(os.getenv("MAX_SESSIONS_PER_USER", "10"))
+
+# Seeks on IX_sessions_user_id, so it only touches the one user's rows
+DELETE_SESSIONS_OVER_CAP = """
+    DELETE FROM sessions
+    WHERE user_id = ? AND id NOT IN (
+        SELECT TOP (?) id FROM sessions
+        WHERE user_id = ?
+        ORDER BY created_at DESC, id DESC
+    )
+"""
+
 
 def get_db_connection():
     """Create database connection using pyodbc"""
@@ -22,33 +42,47 @@ def get_db_connection():
         raise
 
 
-def hash_password(password, salt=None):
-    """Hash password with salt"""
-    if salt is None:
-        salt = secrets.token_hex(16)
-    pwd_hash = hashlib.pbkdf2_hmac(
-        "sha256", password.encode("utf-8"), salt.encode("utf-8"), 100000
-    )
-    return pwd_hash.hex(), salt
+def generate_session_token():
+    """Generate secure session token"""
+    return secrets.token_urlsafe(32)
 
 
-def verify_password(password, password_hash, salt):
-    """Verify password against hash"""
-    pwd_hash, _ = hash_password(password, salt)
-    return pwd_hash == password_hash
+def create_session(cursor, user_id, email):
+    """Start a session for a user and return its token. Does not commit.
 
+    Signed tokens need no sessions row; opaque tokens are stored, and the
+    user's oldest sessions beyond MAX_SESSIONS_PER_USER are deleted in the
+    same transaction.
+    """
+    expires_at = datetime.utcnow() + timedelta(days=SESSION_DAYS)
 
-def generate_session_token():
-    """Generate secure session token"""
-    return secrets.token_urlsafe(32)
+    if SESSION_TOKEN_FORMAT == "signed":
+        # Same admin rule as verify_admin in the other apps
+        return issue_signed_token(user_id, email == "admin@gmail.com", expires_at)
+
+    session_token = generate_session_token()
+    cursor.execute(
+        "INSERT INTO sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)",
+        (user_id, session_token, expires_at),
+    )
+    cursor.execute(DELETE_SESSIONS_OVER_CAP, (user_id, MAX_SESSIONS_PER_USER, user_id))
+    return session_token
 
 
 def verify_session(session_token):
-    """Verify session and return user_id"""
+    """Verify session and return user_id.
+
+    Accepts both signed tokens (checked locally) and opaque tokens from the
+    sessions table.
+    """
     if not session_token:
         return None
 
     try:
+        if is_signed_token(session_token):
+            claims = verify_signed_token(session_token, get_db_connection)
+            return claims["user_id"] if claims else None
+
         conn = get_db_connection()
         cursor = conn.cursor()
 
@@ -0,0 +1,61 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# hashlib.pbkdf2_hmac releases the GIL, so threads hash in parallel.
+# Sizing the pool to the cores keeps hashing from taking CPU away from
+# every other request on the instance.
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", str(os.cpu_count() or 2)))
+# Hashes allowed to wait for a pool thread; beyond this callers get HashPoolBusy
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", str(HASH_POOL_SIZE * 2)))
+
+
+class HashPoolBusy(Exception):
+    """Every pool thread is busy and the queue is full"""
+
+
+class HashPool:
+    """Bounded thread pool for password hashing with admission control.
+
+    At most size + queue_depth calls are admitted at once; the rest are
+    refused immediately instead of queueing, so a login burst turns into
+    fast 503s rather than request threads all stuck waiting to hash.
+    """
+
+    def __init__(self, size=HASH_POOL_SIZE, queue_depth=HASH_QUEUE_DEPTH):
+        self.size = size
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="password-hash"
+        )
+        self._slots = threading.BoundedSemaphore(size + queue_depth)
+
+    def run(self, fn, *args):
+        """Call fn(*args) on the pool and return its result.
+
+        Raises HashPoolBusy without waiting if the pool is saturated.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy()
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    """Return the process-wide hash pool"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = HashPool()
+        return _hash_pool
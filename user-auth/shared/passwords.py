@@ -0,0 +1,132 @@
+"""Password hashing with the algorithm and cost stored alongside each hash.
+
+Hashes are stored as "<algorithm>$i=<iterations>$<hex digest>" in
+shopusers.password, with the salt in shopusers.salt. Hashes from before
+this format (a bare hex digest) are PBKDF2-SHA256 with 100,000 iterations.
+
+Run from the user-auth directory to pick an iteration count for this
+hardware:
+    python -m shared.passwords --target-ms 250
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import time
+
+ALGORITHMS = {"pbkdf2_sha256": "sha256", "pbkdf2_sha512": "sha512"}
+LEGACY_ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100000
+# Calibration never suggests less than this
+MIN_ITERATIONS = 100000
+
+PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", LEGACY_ALGORITHM)
+PASSWORD_HASH_ITERATIONS = int(
+    os.getenv("PASSWORD_HASH_ITERATIONS", str(LEGACY_ITERATIONS))
+)
+
+# Fail at startup rather than with a 500 on every signup (after the password
+# has already been checked on login)
+if PASSWORD_HASH_ALGORITHM not in ALGORITHMS:
+    raise ValueError(
+        f"PASSWORD_HASH_ALGORITHM must be one of {', '.join(sorted(ALGORITHMS))}, "
+        f"not {PASSWORD_HASH_ALGORITHM!r}"
+    )
+if PASSWORD_HASH_ITERATIONS < 1:
+    raise ValueError("PASSWORD_HASH_ITERATIONS must be positive")
+
+
+def _derive(password, salt, algorithm, iterations):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unsupported password hash algorithm: {algorithm}")
+    return hashlib.pbkdf2_hmac(
+        ALGORITHMS[algorithm],
+        password.encode("utf-8"),
+        salt.encode("utf-8"),
+        iterations,
+    ).hex()
+
+
+def parse_password_hash(password_hash):
+    """Return (algorithm, iterations, hex digest) for a stored hash"""
+    if "$" not in password_hash:
+        return LEGACY_ALGORITHM, LEGACY_ITERATIONS, password_hash
+
+    algorithm, params, digest = password_hash.split("$")
+    return algorithm, int(params.removeprefix("i=")), digest
+
+
+def hash_password(password, salt=None):
+    """Hash a password with the configured algorithm and cost.
+
+    Returns (stored hash, salt).
+    """
+    if salt is None:
+        salt = secrets.token_hex(16)
+    digest = _derive(password, salt, PASSWORD_HASH_ALGORITHM, PASSWORD_HASH_ITERATIONS)
+    return f"{PASSWORD_HASH_ALGORITHM}$i={PASSWORD_HASH_ITERATIONS}${digest}", salt
+
+
+def verify_password(password, password_hash, salt):
+    """Verify a password against a stored hash, using the hash's own parameters"""
+    algorithm, iterations, digest = parse_password_hash(password_hash)
+    candidate = _derive(password, salt, algorithm, iterations)
+    return hmac.compare_digest(candidate, digest)
+
+
+def needs_rehash(password_hash):
+    """True if a stored hash was made with other than the configured parameters.
+
+    Legacy bare-hex hashes always need one, so their parameters get stored.
+    """
+    if "$" not in password_hash:
+        return True
+
+    algorithm, iterations, _ = parse_password_hash(password_hash)
+    return (algorithm, iterations) != (
+        PASSWORD_HASH_ALGORITHM,
+        PASSWORD_HASH_ITERATIONS,
+    )
+
+
+def calibrate_iterations(
+    target_ms, algorithm=PASSWORD_HASH_ALGORITHM, probe_iterations=20000, rounds=5
+):
+    """Pick an iteration count that takes about target_ms on this machine.
+
+    Times a short probe (best of `rounds`) and scales linearly; the result
+    is rounded to a thousand and never below MIN_ITERATIONS.
+    """
+    best = min(_timed(algorithm, probe_iterations) for _ in range(rounds))
+    iterations = int(target_ms / 1000 / best * probe_iterations)
+    return max(MIN_ITERATIONS, round(iterations, -3))
+
+
+def _timed(algorithm, iterations):
+    start = time.perf_counter()
+    _derive("calibration", "0123456789abcdef", algorithm, iterations)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate password hash cost")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument(
+        "--algorithm", choices=sorted(ALGORITHMS), default=PASSWORD_HASH_ALGORITHM
+    )
+    args = parser.parse_args()
+
+    iterations = calibrate_iterations(args.target_ms, args.algorithm)
+    elapsed = _timed(args.algorithm, iterations) * 1000
+
+    print(f"PASSWORD_HASH_ALGORITHM={args.algorithm}")
+    print(f"PASSWORD_HASH_ITERATIONS={iterations}")
+    print(f"# measured {elapsed:.0f} ms per hash on this machine")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
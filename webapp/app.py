@@ -1,7 +1,8 @@
-import base64
 import os
+import uuid
 from datetime import datetime
 from functools import wraps
+from urllib.parse import urlparse
 
 import requests
 from flask import (
@@ -30,6 +31,29 @@ def format_datetime(date_string, format="%B %d, %Y at %I:%M %p"):
         return date_string[:10] if len(date_string) >= 10 else date_string
 
 
+@app.template_filter("srcset")
+def srcset(variants, content_type):
+    """Build an img srcset attribute from product image variants"""
+    return ", ".join(
+        f"{v['url']} {v['width']}w"
+        for v in sorted(variants or [], key=lambda v: v.get("width", 0))
+        if v.get("content_type") == content_type
+    )
+
+
+@app.template_filter("image_content_type")
+def image_content_type(url):
+    """Content type of a CDN image, from its extension"""
+    extension = os.path.splitext(urlparse(url or "").path)[1].lower()
+    return {
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".png": "image/png",
+        ".gif": "image/gif",
+        ".webp": "image/webp",
+    }.get(extension)
+
+
 USER_AUTH_URL = "https://shopsphere-user-auth-bgeqgtg5g7f3eba3.ukwest-01.azurewebsites.net/api"
 PRODUCT_CATALOG_URL = (
     "https://shopsphere-product-catalog-hmhxe7dzfkddhtbb.ukwest-01.azurewebsites.net/api"
@@ -39,6 +63,8 @@ PAYMENT_URL = "https://shopsphere-payment-esfwgag4fmfeg9eb.ukwest-01.azurewebsit
 
 CDN_BASE_URL = "https://shopspherecdn.blob.core.windows.net/cdn/"
 
+HISTORY_PAGE_SIZE = 20
+
 
 def get_auth_headers():
     """Get authorization headers with session token"""
@@ -47,6 +73,24 @@ def get_auth_headers():
     return {}
 
 
+def get_idempotency_headers(key):
+    """Get auth headers plus an Idempotency-Key, if one was supplied"""
+    headers = get_auth_headers()
+    if key:
+        headers["Idempotency-Key"] = key
+    return headers
+
+
+def get_page_params(cursor, status, limit=HISTORY_PAGE_SIZE):
+    """Build query params for a keyset-paginated history endpoint"""
+    params = {"limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+    if status:
+        params["status"] = status
+    return params
+
+
 def login_required(f):
     """Decorator to require login"""
 
@@ -107,11 +151,27 @@ def index():
             "index.html",
             products=products,
             categories=categories,
+            bestsellers=get_bestsellers(),
             user=session.get("user"),
         )
     except Exception as e:
         flash(f"Error loading products: {str(e)}", "danger")
-        return render_template("index.html", products=[], categories=[], user=None)
+        return render_template(
+            "index.html", products=[], categories=[], bestsellers=[], user=None
+        )
+
+
+def get_bestsellers(limit=4):
+    """Top sellers for the homepage; an empty list if the ranking is unavailable"""
+    try:
+        response = requests.get(
+            f"{PRODUCT_CATALOG_URL}/products/bestsellers",
+            params={"limit": limit},
+            timeout=5,
+        )
+        return response.json().get("products", []) if response.ok else []
+    except requests.RequestException:
+        return []
 
 
 @app.route("/products/<int:product_id>")
@@ -358,6 +418,7 @@ def checkout():
         try:
             payment_method_id = request.form.get("payment_method_id")
             payment_method = request.form.get("payment_method", "credit_card")
+            idempotency_key = request.form.get("idempotency_key")
 
             if payment_method_id and payment_method_id != "new":
                 try:
@@ -421,63 +482,31 @@ def checkout():
             shipping_address = "\n".join(shipping_address_parts)
 
             response = requests.post(
-                f"{PAYMENT_URL}/checkout",
+                f"{PAYMENT_URL}/checkout/pay",
                 json={
                     "payment_method": payment_method,
                     "shipping_address": shipping_address,
                 },
-                headers=get_auth_headers(),
+                headers=get_idempotency_headers(idempotency_key),
                 timeout=15,
             )
+            data = response.json()
+            order_id = data.get("order", {}).get("order_id")
 
-            if response.ok:
-                data = response.json()
-
-                if data.get("success"):
-                    order_id = data.get("order_id")
-                    total_amount = data.get("total_amount")
-
-                    try:
-                        payment_response = requests.post(
-                            f"{PAYMENT_URL}/process-payment",
-                            json={
-                                "order_id": order_id,
-                                "amount": total_amount,
-                                "payment_method": payment_method,
-                            },
-                            headers=get_auth_headers(),
-                            timeout=15,
-                        )
-
-                        if payment_response.ok:
-                            payment_data = payment_response.json()
-                            if payment_data.get("success"):
-                                flash(
-                                    f"Order placed and paid successfully! Order ID: {order_id}",
-                                    "success",
-                                )
-                            else:
-                                flash(
-                                    f"Order created but payment failed: {payment_data.get('error', 'Unknown error')}",
-                                    "warning",
-                                )
-                        else:
-                            flash(
-                                f"Order created but payment processing failed. Order ID: {order_id}",
-                                "warning",
-                            )
-                    except Exception as payment_error:
-                        flash(
-                            f"Order created but payment error occurred: {str(payment_error)}. Order ID: {order_id}",
-                            "warning",
-                        )
-
-                    return redirect(url_for("order_detail", order_id=order_id))
-                else:
-                    error = data.get("error", "Checkout failed")
-                    flash(error, "danger")
+            if response.ok and data.get("success"):
+                flash(
+                    f"Order placed and paid successfully! Order ID: {order_id}",
+                    "success",
+                )
+                return redirect(url_for("order_detail", order_id=order_id))
+            elif order_id:
+                flash(
+                    f"Order created but payment failed: {data.get('error', 'Unknown error')}",
+                    "warning",
+                )
+                return redirect(url_for("order_detail", order_id=order_id))
             else:
-                error = response.json().get("error", "Checkout failed")
+                error = data.get("error", "Checkout failed")
                 flash(error, "danger")
 
         except Exception as e:
@@ -532,6 +561,7 @@ def checkout():
             cart_items=cart_items,
             total=total,
             payment_methods=payment_methods,
+            idempotency_key=uuid.uuid4().hex,
             user=session.get("user"),
         )
     except Exception as e:
@@ -543,25 +573,42 @@ def checkout():
 @login_required
 def orders():
     """User's order history"""
+    cursor = request.args.get("cursor")
+    status = request.args.get("status")
+
     try:
         response = requests.get(
             f"{PAYMENT_URL}/orders",
             headers=get_auth_headers(),
+            params=get_page_params(cursor, status),
             timeout=10,
         )
 
         if response.ok:
             data = response.json()
             orders_list = data.get("orders", [])
+            next_cursor = data.get("next_cursor")
         else:
             orders_list = []
+            next_cursor = None
 
         return render_template(
-            "orders.html", orders=orders_list, user=session.get("user")
+            "orders.html",
+            orders=orders_list,
+            next_cursor=next_cursor,
+            cursor=cursor,
+            status=status,
+            user=session.get("user"),
         )
     except Exception as e:
         flash(f"Error loading orders: {str(e)}", "danger")
-        return render_template("orders.html", orders=[], user=session.get("user"))
+        return render_template(
+            "orders.html",
+            orders=[],
+            cursor=cursor,
+            status=status,
+            user=session.get("user"),
+        )
 
 
 @app.route("/orders/<int:order_id>")
@@ -572,6 +619,7 @@ def order_detail(order_id):
         response = requests.get(
             f"{PAYMENT_URL}/orders/{order_id}",
             headers=get_auth_headers(),
+            params={"include": "tracking,transactions"},
             timeout=10,
         )
 
@@ -594,19 +642,6 @@ def order_detail(order_id):
             item["price"] = item.get("price_at_purchase", 0)
             item["subtotal"] = item.get("item_total", 0)
 
-        try:
-            tracking_response = requests.get(
-                f"{PAYMENT_URL}/orders/{order_id}/track",
-                headers=get_auth_headers(),
-                timeout=10,
-            )
-
-            if tracking_response.ok:
-                tracking_data = tracking_response.json()
-                order["tracking"] = tracking_data.get("tracking", {})
-        except Exception:
-            pass
-
         return render_template(
             "order_detail.html", order=order, items=items, user=session.get("user")
         )
@@ -711,16 +746,32 @@ def admin_products():
         category = request.form.get("category")
         image_url = request.form.get("image_url")
 
-        image_data = None
+        image_variants = None
+        image_uploaded = False
         if "product_image" in request.files:
             file = request.files["product_image"]
             if file and file.filename != "":
                 try:
-                    file_bytes = file.read()
-                    image_data = base64.b64encode(file_bytes).decode("utf-8")
-
-                    content_type = file.content_type or "image/jpeg"
-                    image_data = f"data:{content_type};base64,{image_data}"
+                    upload_response = requests.post(
+                        f"{PRODUCT_CATALOG_URL}/products/images",
+                        params={"filename": name},
+                        data=file.stream,
+                        headers={
+                            **get_auth_headers(),
+                            "Content-Type": file.content_type or "image/jpeg",
+                        },
+                        timeout=30,
+                    )
+                    if upload_response.ok:
+                        upload_data = upload_response.json()
+                        image_url = upload_data.get("image_url")
+                        image_variants = upload_data.get("image_variants")
+                        image_uploaded = True
+                    else:
+                        error = upload_response.json().get(
+                            "error", "Failed to upload image"
+                        )
+                        flash(f"Failed to process image: {error}", "warning")
                 except Exception as e:
                     flash(f"Failed to process image: {str(e)}", "warning")
 
@@ -733,10 +784,10 @@ def admin_products():
                 "category": category,
             }
 
-            if image_data:
-                product_data["image_data"] = image_data
-            elif image_url:
+            if image_url:
                 product_data["image_url"] = image_url
+            if image_variants:
+                product_data["image_variants"] = image_variants
             response = requests.post(
                 f"{PRODUCT_CATALOG_URL}/products",
                 json=product_data,
@@ -749,7 +800,7 @@ def admin_products():
                 success_msg = (
                     f"Product '{name}' added successfully! ID: {data.get('product_id')}"
                 )
-                if image_data:
+                if image_uploaded:
                     success_msg += " (with image)"
                 flash(success_msg, "success")
                 return redirect(url_for("admin_products"))
@@ -775,28 +826,41 @@ def admin_products():
 @login_required
 def transactions():
     """User's transaction history"""
+    cursor = request.args.get("cursor")
+    status = request.args.get("status")
+
     try:
         response = requests.get(
             f"{PAYMENT_URL}/payment/transactions",
             headers=get_auth_headers(),
+            params=get_page_params(cursor, status),
             timeout=10,
         )
 
         if response.ok:
             data = response.json()
             transactions_list = data.get("transactions", [])
+            next_cursor = data.get("next_cursor")
         else:
             transactions_list = []
+            next_cursor = None
 
         return render_template(
             "transactions.html",
             transactions=transactions_list,
+            next_cursor=next_cursor,
+            cursor=cursor,
+            status=status,
             user=session.get("user"),
         )
     except Exception as e:
         flash(f"Error loading transactions: {str(e)}", "danger")
         return render_template(
-            "transactions.html", transactions=[], user=session.get("user")
+            "transactions.html",
+            transactions=[],
+            cursor=cursor,
+            status=status,
+            user=session.get("user"),
         )
 
 